@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple, Union
+
+from fastapi import Request, Response, status
+
+Stamp = Union[datetime, str, int, None]
+
+
+def _as_datetime(stamp: Stamp) -> Optional[datetime]:
+    # Cached entities carry their timestamps as ISO strings
+    if isinstance(stamp, str):
+        return datetime.fromisoformat(stamp)
+    return stamp
+
+
+def _version_part(stamp) -> str:
+    if isinstance(stamp, datetime):
+        return stamp.isoformat()
+    return "" if stamp is None else str(stamp)
+
+
+def entity_etag(kind: str, id: int, *stamps: Stamp, fields: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Strong ETag for a representation built from the given rows' updated_at values.
+
+    Counters change without touching updated_at, so they are passed in as
+    plain ints alongside the timestamps and only affect the ETag. A body
+    trimmed to a sparse field set is a representation of its own and is
+    tagged with its `fields`.
+    """
+    parts = [kind, str(id)] + [_version_part(s) for s in map(_as_datetime, stamps)]
+    if fields is not None:
+        parts.append(",".join(fields))
+    return '"' + hashlib.sha1("|".join(parts).encode()).hexdigest() + '"'
+
+
+def last_modified(*stamps: Stamp) -> Optional[datetime]:
+    known = [s for s in map(_as_datetime, stamps) if isinstance(s, datetime)]
+    return max(known) if known else None
+
+
+def _http_date(moment: datetime) -> str:
+    # Timestamps are stored naive and served as UTC
+    return format_datetime(moment.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since as RFC 9110 requires."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def set_validators(response: Response, etag: str, modified: Optional[datetime]):
+    response.headers["ETag"] = etag
+    if modified is not None:
+        response.headers["Last-Modified"] = _http_date(modified)
+
+
+def not_modified(etag: str, modified: Optional[datetime]) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, modified)
+    return response
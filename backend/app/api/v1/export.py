@@ -0,0 +1,98 @@
+"""
+Whole-table exports streamed as NDJSON.
+
+A table is read through one server-side cursor in id order, EXPORT_BATCH_ROWS
+rows at a time (``yield_per``), and every batch is encoded and sent before
+the next is fetched, so memory stays flat however large the table is. Each
+line is one row, encoded exactly as the list endpoints encode their items.
+
+Because rows come in id order, a client whose connection dropped resumes
+with ``after_id`` set to the id on the last complete line it received.
+With gzip each batch is flushed as its own complete block, so every line
+received is decodable too.
+
+The export opens its own session: the response body is sent after the
+route has returned and its dependencies have been closed.
+"""
+import zlib
+from contextlib import aclosing
+from typing import AsyncIterator, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from app.api.v1.fast_json import dumps, schema_columns
+from app.core.config import settings
+from app.db.dependencies import get_db
+
+
+async def export_rows(db, model, schema: Type[BaseModel], after_id: int = 0) -> AsyncIterator[bytes]:
+    """NDJSON lines for every row with an id above `after_id`, one chunk per batch."""
+    fields = list(schema.model_fields)
+    statement = (
+        select(*schema_columns(schema, model))
+        .where(model.id > after_id)
+        .order_by(model.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_ROWS)
+    )
+    result = await db.stream(statement)
+    try:
+        async for rows in result.partitions():
+            yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+    finally:
+        await result.close()
+
+
+def _gzip(level: int):
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+async def export_ndjson(model, schema: Type[BaseModel], after_id: int = 0, gzip: bool = False) -> AsyncIterator[bytes]:
+    """Response body for an export, gzip-compressed on the fly when asked to."""
+    compressor = _gzip(settings.EXPORT_GZIP_LEVEL) if gzip else None
+    # Closing the generator closes the session, also when the client goes away mid-export
+    async with aclosing(get_db()) as sessions:
+        async for db in sessions:
+            async with aclosing(export_rows(db, model, schema, after_id)) as chunks:
+                async for chunk in chunks:
+                    if compressor is not None:
+                        chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                    yield chunk
+            break
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether Accept-Encoding lists gzip with a non-zero quality."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            return _quality(params) > 0
+    return False
+
+
+def export_response(request: Request, model, schema: Type[BaseModel], after_id: int) -> StreamingResponse:
+    gzip = accepts_gzip(request)
+    headers = {"Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_ndjson(model, schema, after_id, gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
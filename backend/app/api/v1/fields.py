@@ -0,0 +1,78 @@
+"""
+Sparse fieldsets: ``?fields=id,title,created_at`` on read endpoints.
+
+The requested names are checked against the endpoint's response schema and
+put back in schema order, so every spelling of a field set is one key and
+the fields come out in the order the full representation has them. List
+endpoints select only those columns, plus the (created_at, id) keyset the
+cursor is built from, so the rest never leave the database; single-entity
+reads project the cached entity. Bodies are encoded through a copy of the
+schema trimmed to the field set, built once per set.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, ConfigDict, create_model
+
+from app.api.v1.fast_json import dumps
+from app.schemas.pagination import Page
+
+Fields = Optional[Tuple[str, ...]]
+
+
+def parse_fields(schema: Type[BaseModel], fields: str) -> Tuple[str, ...]:
+    """The comma-separated `fields` as a tuple in schema order, 400 on an empty list or an unknown name."""
+    requested = {name.strip() for name in fields.split(",")} - {""}
+    if not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fields must name at least one field"
+        )
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+class FieldSelector:
+    """Dependency reading ``fields`` for one response schema; None when the client wants every field."""
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, every field when omitted"),
+    ) -> Fields:
+        return None if fields is None else parse_fields(self.schema, fields)
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """`schema` with only `fields`, each keeping its type and default."""
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+
+def sparse_response(schema: Type[BaseModel], fields: Tuple[str, ...], content, page: bool = False) -> Response:
+    """
+    Encode `content` (a dict or ORM object, or a ``Page`` payload of them
+    when `page` is set) through `schema` trimmed to `fields`.
+
+    Returned as a finished Response, since the route's response_model
+    describes the full representation.
+    """
+    model = sparse_schema(schema, fields)
+    if page:
+        model = Page[model]
+    return Response(
+        content=dumps(model.model_validate(content).model_dump(mode="json")),
+        media_type="application/json",
+    )
@@ -0,0 +1,39 @@
+import os
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+ZERO_COPY = "http.response.zerocopysend"
+
+
+class SendfileResponse(FileResponse):
+    """
+    FileResponse that hands whole-file bodies to the server's sendfile.
+
+    When the ASGI server offers the zero-copy send extension the file
+    descriptor itself is passed down, so the bytes go from the page cache
+    to the socket without ever being read into Python. Range requests,
+    HEAD, and servers without the extension take Starlette's chunked path,
+    which also answers ranges with 206 or 416.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            ZERO_COPY not in scope.get("extensions", {})
+            or scope["method"].upper() != "GET"
+            or "range" in Headers(scope=scope)
+        ):
+            return await super().__call__(scope, receive, send)
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": ZERO_COPY, "file": file, "more_body": False})
+        finally:
+            file.close()
+        if self.background is not None:
+            await self.background()
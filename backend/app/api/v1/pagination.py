@@ -0,0 +1,109 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def encode_key(*values) -> str:
+    """Encode the JSON-serializable sort key of a row into an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_key(cursor: str) -> list:
+    """Decode a cursor produced by encode_key, raising a 400 if it was tampered with."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise _invalid_cursor()
+    if not isinstance(values, list):
+        raise _invalid_cursor()
+    return values
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Encode the (created_at, id) sort key of a row into an opaque cursor."""
+    return encode_key(created_at.isoformat(), id)
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_cursor, raising a 400 if it was tampered with."""
+    try:
+        created_at, id = decode_key(cursor)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+class PageParams:
+    """Query parameters shared by every keyset-paginated list endpoint."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def keyset(statement, model, params: PageParams, descending: bool = True):
+    """
+    Apply keyset pagination ordered by (created_at, id), newest first by default.
+
+    Rows are filtered with a row-value comparison against the cursor so the
+    database seeks straight into the matching composite index instead of
+    skipping over an OFFSET, keeping latency flat however deep the client is.
+    One row past the limit is fetched to learn whether another page follows.
+    """
+    key = tuple_(model.created_at, model.id)
+    if params.cursor is not None:
+        created_at, id = decode_cursor(params.cursor)
+        cursor_key = tuple_(created_at, id)
+        statement = statement.where(key < cursor_key if descending else key > cursor_key)
+
+    if descending:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(model.created_at, model.id)
+    return statement.limit(params.limit + 1)
+
+
+def split_page(rows, params: PageParams) -> tuple:
+    """Trim the probe row fetched by keyset and return (rows, next_cursor)."""
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+async def paginate(db, statement, model, params: PageParams, descending: bool = True, fields=None) -> dict:
+    """
+    Fetch one keyset page of ORM objects as a ``Page`` payload.
+
+    With ``fields`` every other column is deferred with load_only, so only
+    the objects' requested attributes (and their keyset) may be read.
+    """
+    if fields is not None:
+        statement = statement.options(load_only(*(getattr(model, name) for name in fields), model.created_at))
+    rows = (await db.scalars(keyset(statement, model, params, descending))).all()
+    rows, next_cursor = split_page(rows, params)
+    return {"items": rows, "next_cursor": next_cursor}
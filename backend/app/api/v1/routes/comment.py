@@ -1,85 +1,249 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
 
+from app.api.v1.conditional import entity_etag, is_not_modified, last_modified, not_modified, set_validators
+from app.api.v1.export import export_response
+from app.api.v1.fast_json import fast_page
+from app.api.v1.fields import Fields, FieldSelector, sparse_response
+from app.api.v1.pagination import MAX_PAGE_SIZE, PageParams, keyset, paginate, split_page
+from app.db.bulk import bulk_create_comments as bulk_create_comments_in_db
+from app.db.comment_tree import load_ancestors, load_post_thread, load_subtrees, subtree_filter, subtree_ids
+from app.core.config import settings
+from app.core.oauth2 import get_admin_user, get_current_user, get_current_user_data, require_owner
+from app.core.security import TokenClaims
 from app.db.dependencies import get_db
+from app.db.entity_cache import get_comment_data, get_comment_version, get_user_data, invalidate_comments, invalidate_posts
 from app.models.comment import Comment
+from app.schemas.bulk import BulkResult
+from app.schemas.pagination import Page
 from app.schemas.comment import CommentSchema, CommentCreate, CommentUpdate, CommentWithUserSchema, CommentWithRepliesSchema
 
 router = APIRouter()
 
-@router.get("/comments", response_model=List[CommentSchema])
-def get_comments(db: Session = Depends(get_db)):
-    return db.query(Comment).all()
+@router.get("/comments", response_model=Page[CommentSchema])
+async def get_comments(
+    page: PageParams = Depends(),
+    fields: Fields = Depends(FieldSelector(CommentSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    if settings.FAST_LIST_READS:
+        return await fast_page(db, Comment, CommentSchema, page, fields=fields)
+    result = await paginate(db, select(Comment), Comment, page, fields=fields)
+    return result if fields is None else sparse_response(CommentSchema, fields, result, page=True)
+
+# Declared before /comments/{comment_id} so "export" is not parsed as an id
+@router.get("/comments/export", response_class=StreamingResponse)
+async def export_comments(
+    request: Request,
+    after_id: int = Query(0, ge=0, description="Resume after this id, the last one received"),
+    claims: TokenClaims = Depends(get_admin_user)
+):
+    """Every comment as NDJSON in id order, streamed from a server-side cursor."""
+    return export_response(request, Comment, CommentSchema, after_id)
 
 @router.get("/comments/{comment_id}", response_model=CommentWithUserSchema)
-def get_comment(comment_id: int, db: Session = Depends(get_db)):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+async def get_comment(
+    comment_id: int,
+    request: Request,
+    response: Response,
+    fields: Fields = Depends(FieldSelector(CommentWithUserSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    version = await get_comment_version(db, comment_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Comment with ID {comment_id} not found"
+        )
+    etag = entity_etag("comment", comment_id, *version, fields=fields)
+    if is_not_modified(request, etag, last_modified(*version)):
+        return not_modified(etag, last_modified(*version))
+
+    comment = await get_comment_data(db, comment_id)
     if comment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Comment with ID {comment_id} not found"
         )
-    return comment
+    user = await get_user_data(db, comment["user_id"])
+    stamps = (comment["updated_at"], comment["reply_count"], user["updated_at"])
+    if fields is not None:
+        response = sparse_response(CommentWithUserSchema, fields, {**comment, "user": user})
+    set_validators(response, entity_etag("comment", comment_id, *stamps, fields=fields), last_modified(*stamps))
+    return response if fields is not None else {**comment, "user": user}
 
 @router.post("/comments", response_model=CommentSchema, status_code=status.HTTP_201_CREATED)
-def create_comment(comment: CommentCreate, user_id: int, db: Session = Depends(get_db)):
+async def create_comment(
+    comment: CommentCreate,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
     # Create comment object
     db_comment = Comment(
-        user_id=user_id,
+        user_id=claims.user_id,
         content=comment.content,
         post_id=comment.post_id,
         parent_id=comment.parent_id
     )
     
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    await db.commit()
+    # The post's and the parent's counters were bumped in the same transaction
+    await invalidate_posts(comment.post_id)
+    if comment.parent_id is not None:
+        await invalidate_comments(comment.parent_id)
+    await db.refresh(db_comment)
     return db_comment
 
+@router.post("/comments/bulk", response_model=BulkResult[CommentSchema], status_code=status.HTTP_201_CREATED)
+async def bulk_create_comments(
+    items: List[Any],
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user_data)
+):
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batches are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+
+    # Invalid items are reported back and left out, the rest go in one transaction
+    created, errors = await bulk_create_comments_in_db(db, user["id"], items)
+    await db.commit()
+    await invalidate_posts(*{row["post_id"] for row in created})
+    await invalidate_comments(*{row["parent_id"] for row in created if row["parent_id"] is not None})
+    return {"created": created, "errors": errors}
+
 @router.put("/comments/{comment_id}", response_model=CommentSchema)
-def update_comment(comment_id: int, comment_update: CommentUpdate, db: Session = Depends(get_db)):
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+async def update_comment(
+    comment_id: int,
+    comment_update: CommentUpdate,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_comment = await db.get(Comment, comment_id)
     
     if db_comment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Comment with ID {comment_id} not found"
         )
+    require_owner(claims, db_comment.user_id, "comment")
     
     # Update content if provided
     if comment_update.content is not None:
         db_comment.content = comment_update.content
+
+    changed_ids = [comment_id]
+
+    # Move the comment (and its replies) when parent_id is explicitly sent
+    if "parent_id" in comment_update.model_fields_set and comment_update.parent_id != db_comment.parent_id:
+        if comment_update.parent_id is not None:
+            new_parent = await db.get(Comment, comment_update.parent_id)
+            if new_parent is None or new_parent.post_id != db_comment.post_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Parent comment must exist on the same post"
+                )
+            if new_parent.path.startswith(db_comment.path):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A comment cannot be moved under itself or one of its replies"
+                )
+        # Every reply below moves too, so their cached depth goes stale,
+        # and both parents' reply counts change
+        changed_ids = await subtree_ids(db, db_comment)
+        changed_ids += [id for id in (db_comment.parent_id, comment_update.parent_id) if id is not None]
+        db_comment.parent_id = comment_update.parent_id
     
-    db.commit()
-    db.refresh(db_comment)
+    await db.commit()
+    await invalidate_comments(*changed_ids)
+    await db.refresh(db_comment)
     return db_comment
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(comment_id: int, db: Session = Depends(get_db)):
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+async def delete_comment(
+    comment_id: int,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_comment = await db.get(Comment, comment_id)
     
     if db_comment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Comment with ID {comment_id} not found"
         )
+    require_owner(claims, db_comment.user_id, "comment")
     
-    db.delete(db_comment)
-    db.commit()
+    # Replies are re-rooted by the delete, so their cached entries go stale,
+    # as do the counts of the post and the parent
+    changed_ids = await subtree_ids(db, db_comment)
+    if db_comment.parent_id is not None:
+        changed_ids.append(db_comment.parent_id)
+    post_id = db_comment.post_id
+    await db.delete(db_comment)
+    await db.commit()
+    await invalidate_comments(*changed_ids)
+    await invalidate_posts(post_id)
     return None
 
 @router.get("/posts/{post_id}/comments", response_model=List[CommentWithRepliesSchema])
-def get_post_comments(post_id: int, db: Session = Depends(get_db)):
-    # Get only top-level comments (no parent_id)
-    comments = db.query(Comment).filter(
-        Comment.post_id == post_id,
-        Comment.parent_id == None
-    ).all()
-    return comments
-
-@router.get("/comments/{comment_id}/replies", response_model=List[CommentSchema])
-def get_comment_replies(comment_id: int, db: Session = Depends(get_db)):
-    # Get direct replies to a comment
-    replies = db.query(Comment).filter(Comment.parent_id == comment_id).all()
-    return replies
\ No newline at end of file
+async def get_post_comments(
+    post_id: int,
+    request: Request,
+    response: Response,
+    max_depth: Optional[int] = Query(None, ge=0, description="Deepest reply level to include, top-level comments are depth 0"),
+    replies_per_node: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum replies returned under each comment, and top-level comments per page"),
+    cursor: Optional[str] = Query(None, description="With replies_per_node, resume top-level comments from the previous page's Link rel=\"next\""),
+    db: AsyncSession = Depends(get_db)
+):
+    if max_depth is None and replies_per_node is None:
+        # Load the whole thread in one query and return the top-level comments
+        return await load_post_thread(db, post_id)
+    if replies_per_node is None:
+        return await load_subtrees(db, Comment.post_id == post_id, 0, max_depth)
+
+    # Top-level comments are replies to the post: page them oldest first, then
+    # expand only their subtrees so comments past the page cost nothing
+    page = PageParams(cursor=cursor, limit=replies_per_node)
+    statement = select(Comment).where(Comment.post_id == post_id, Comment.parent_id.is_(None))
+    roots, next_cursor = split_page((await db.scalars(keyset(statement, Comment, page, descending=False))).all(), page)
+    if next_cursor is not None:
+        # The body stays a plain list, so the next page is linked from a header
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    if not roots:
+        return []
+    scope = or_(*[subtree_filter(root) for root in roots])
+    await load_subtrees(db, scope, 0, max_depth, replies_per_node)
+    return roots
+
+@router.get("/comments/{comment_id}/replies", response_model=Page[CommentWithRepliesSchema])
+async def get_comment_replies(
+    comment_id: int,
+    page: PageParams = Depends(),
+    max_depth: int = Query(0, ge=0, description="Reply levels to include below each direct reply"),
+    replies_per_node: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum replies returned under each comment"),
+    db: AsyncSession = Depends(get_db)
+):
+    # Page through direct replies oldest first, then expand each one's subtree
+    result = await paginate(db, select(Comment).where(Comment.parent_id == comment_id), Comment, page, descending=False)
+    replies = result["items"]
+    if replies:
+        scope = or_(*[subtree_filter(reply) for reply in replies])
+        await load_subtrees(db, scope, replies[0].depth, max_depth, replies_per_node)
+    return result
+
+@router.get("/comments/{comment_id}/ancestors", response_model=List[CommentSchema])
+async def get_comment_ancestors(comment_id: int, db: AsyncSession = Depends(get_db)):
+    comment = await db.get(Comment, comment_id)
+    if comment is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Comment with ID {comment_id} not found"
+        )
+    # Breadcrumbs from the top-level comment down to the direct parent
+    return await load_ancestors(db, comment)
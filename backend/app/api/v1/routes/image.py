@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from app.api.v1.conditional import is_not_modified, not_modified
+from app.api.v1.files import SendfileResponse
+from app.core.config import settings
+from app.core.images import (
+    CONTENT_TYPES, KEY_PATTERN, ImageTooLarge, UnsupportedImage, image_key, store_upload, thumbnailer
+)
+from app.core.oauth2 import get_current_user
+from app.core.security import TokenClaims
+from app.core.storage import storage
+from app.schemas.image import ImageSchema
+
+router = APIRouter()
+
+# A stored file never changes, whatever is at its URL can be kept for good
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Images are limited to {settings.IMAGE_MAX_BYTES} bytes"
+    )
+
+
+@router.post("/images", response_model=ImageSchema, status_code=status.HTTP_201_CREATED)
+async def upload_image(
+    request: Request,
+    response: Response,
+    claims: TokenClaims = Depends(get_current_user)
+):
+    """Store the raw request body as an image; 200 instead of 201 when those bytes were already stored."""
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > settings.IMAGE_MAX_BYTES:
+        raise _too_large()
+    try:
+        image = await store_upload(request.stream(), settings.IMAGE_MAX_BYTES)
+    except ImageTooLarge:
+        raise _too_large()
+    except UnsupportedImage:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only JPEG, PNG, GIF and WebP images are accepted"
+        )
+
+    if not image.created:
+        response.status_code = status.HTTP_200_OK
+    # Made after this response is sent, by the thumbnail processes
+    thumbnailer.schedule(image.digest, image.ext)
+    return {
+        "hash": image.digest,
+        "url": str(request.url_for("get_image", name=image.key)),
+        "content_type": CONTENT_TYPES[image.ext],
+        "size": image.size,
+        "thumbnails": {
+            size: str(request.url_for("get_image", name=image_key(image.digest, image.ext, size)))
+            for size in settings.IMAGE_THUMBNAIL_SIZES
+        },
+    }
+
+
+@router.api_route("/images/{name}", methods=["GET", "HEAD"], response_class=SendfileResponse)
+async def get_image(name: str, request: Request):
+    match = KEY_PATTERN.match(name)
+    if match and match["size"] and int(match["size"]) not in settings.IMAGE_THUMBNAIL_SIZES:
+        # Not a size thumbnails are made in, it will never exist
+        match = None
+    path = await storage.local_path(name) if match else None
+    served, cache_control = name, IMMUTABLE
+    if path is None and match and match["size"]:
+        # The thumbnail is not made yet: send the original, revalidated until it is
+        served = image_key(match["digest"], match["ext"])
+        path = await storage.local_path(served)
+        if path is not None:
+            thumbnailer.schedule(match["digest"], match["ext"])
+            cache_control = "no-cache"
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    # Names are content hashes, so the name of the file sent is a strong validator
+    etag = f'"{served}"'
+    if is_not_modified(request, etag, None):
+        response = not_modified(etag, None)
+        response.headers["Cache-Control"] = cache_control
+        return response
+    return SendfileResponse(
+        path,
+        media_type=CONTENT_TYPES[match["ext"]],
+        headers={
+            "Cache-Control": cache_control,
+            "ETag": etag,
+            # Uploaded bytes are only ever served as the image type they were checked to be
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, status
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.oauth2 import get_admin_user
+from app.core.startup import startup
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine
+from app.db.slow_queries import slow_queries
+
+# Operational state and controls, for admins only
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+@router.get("/internal/db-pool")
+async def get_db_pool_stats():
+    # Report the engine serving requests first; both are listed so A/B runs compare
+    return {
+        "active": "async" if settings.DB_ASYNC else "sync",
+        "async": pool_status(async_engine.sync_engine.pool),
+        "sync": pool_status(engine.pool),
+        "threadpool_size": settings.THREADPOOL_SIZE,
+    }
+
+@router.get("/internal/cache")
+async def get_cache_stats():
+    return cache.stats()
+
+@router.get("/internal/startup")
+async def get_startup_timings():
+    return startup.report()
+
+@router.get("/internal/slow-queries")
+async def get_slow_queries():
+    # Worst offenders first, by total time spent across all executions
+    return {
+        "threshold_ms": slow_queries.threshold_ms,
+        "capacity": slow_queries.capacity,
+        "evictions": slow_queries.evictions,
+        "entries": slow_queries.entries(),
+    }
+
+@router.delete("/internal/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries():
+    slow_queries.clear()
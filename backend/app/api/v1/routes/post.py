@@ -1,32 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List
+
+from app.api.v1.conditional import entity_etag, is_not_modified, last_modified, not_modified, set_validators
+from app.api.v1.export import export_response
+from app.api.v1.fast_json import fast_page
+from app.api.v1.fields import Fields, FieldSelector, sparse_response
+from app.api.v1.pagination import PageParams, paginate
+from app.core.config import settings
+from app.core.oauth2 import get_admin_user, get_current_user, get_current_user_data, require_owner
+from app.core.security import TokenClaims
+from app.db.bulk import bulk_create_posts as bulk_create_posts_in_db
 from app.db.dependencies import get_db
+from app.db.entity_cache import get_post_data, get_post_version, get_user_data, invalidate_posts
 from app.models.post import Post
+from app.schemas.bulk import BulkResult
+from app.schemas.pagination import Page
 from app.schemas.post import PostSchema, PostCreate, PostUpdate, PostWithUserSchema
 
 router = APIRouter()
 
-@router.get("/posts", response_model=List[PostSchema])
-def get_posts(db: Session = Depends(get_db)):
-    return db.query(Post).all()
+@router.get("/posts", response_model=Page[PostSchema])
+async def get_posts(
+    page: PageParams = Depends(),
+    fields: Fields = Depends(FieldSelector(PostSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    if settings.FAST_LIST_READS:
+        return await fast_page(db, Post, PostSchema, page, fields=fields)
+    result = await paginate(db, select(Post), Post, page, fields=fields)
+    return result if fields is None else sparse_response(PostSchema, fields, result, page=True)
+
+# Declared before /posts/{post_id} so "export" is not parsed as an id
+@router.get("/posts/export", response_class=StreamingResponse)
+async def export_posts(
+    request: Request,
+    after_id: int = Query(0, ge=0, description="Resume after this id, the last one received"),
+    claims: TokenClaims = Depends(get_admin_user)
+):
+    """Every post as NDJSON in id order, streamed from a server-side cursor."""
+    return export_response(request, Post, PostSchema, after_id)
 
 @router.get("/posts/{post_id}", response_model=PostWithUserSchema)
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def get_post(
+    post_id: int,
+    request: Request,
+    response: Response,
+    fields: Fields = Depends(FieldSelector(PostWithUserSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    version = await get_post_version(db, post_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Pots with ID {post_id} not found"
+        )
+    etag = entity_etag("post", post_id, *version, fields=fields)
+    if is_not_modified(request, etag, last_modified(*version)):
+        return not_modified(etag, last_modified(*version))
+
+    post = await get_post_data(db, post_id)
     if post is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Pots with ID {post_id} not found"
         )
-    return post
+    # The author comes from its own cache entry, shared with every other lookup
+    user = await get_user_data(db, post["user_id"])
+    stamps = (post["updated_at"], post["comment_count"], user["updated_at"])
+    if fields is not None:
+        response = sparse_response(PostWithUserSchema, fields, {**post, "user": user})
+    set_validators(response, entity_etag("post", post_id, *stamps, fields=fields), last_modified(*stamps))
+    return response if fields is not None else {**post, "user": user}
 
 
 @router.post("/posts", response_model=PostSchema, status_code=status.HTTP_201_CREATED)
-def create_post(post: PostCreate, user_id: int, db: Session = Depends(get_db)):
+async def create_post(
+    post: PostCreate,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
     db_post = Post(
-        user_id=user_id,
+        user_id=claims.user_id,
         title=post.title,
         content=post.content,
         image_url=post.image_url,
@@ -34,47 +91,85 @@ def create_post(post: PostCreate, user_id: int, db: Session = Depends(get_db)):
     )
 
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await db.refresh(db_post)
     return db_post
 
 
+@router.post("/posts/bulk", response_model=BulkResult[PostSchema], status_code=status.HTTP_201_CREATED)
+async def bulk_create_posts(
+    items: List[Any],
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(get_current_user_data)
+):
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batches are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+
+    # Invalid items are reported back and left out, the rest go in one transaction
+    created, errors = await bulk_create_posts_in_db(db, user["id"], items)
+    await db.commit()
+    return {"created": created, "errors": errors}
+
+
 @router.put("/posts/{post_id}", response_model=PostSchema)
-def update_post(post_id: int, post_update: PostUpdate, db: Session = Depends(get_db)):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+async def update_post(
+    post_id: int,
+    post_update: PostUpdate,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_post = await db.get(Post, post_id)
 
     if db_post is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Post with ID {post_id} not found"
         )
+    require_owner(claims, db_post.user_id, "post")
 
     update_data = post_update.model_dump(exclude_unset=True)
 
     for key, value in update_data.items():
         setattr(db_post, key, value)
 
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await invalidate_posts(post_id)
+    await db.refresh(db_post)
     return db_post
 
 
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(post_id: int, db: Session = Depends(get_db)):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+async def delete_post(
+    post_id: int,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_post = await db.get(Post, post_id)
 
     if db_post is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Post with ID {post_id} not found"
         )
+    require_owner(claims, db_post.user_id, "post")
 
-    db.delete(db_post)
-    db.commit()
+    await db.delete(db_post)
+    await db.commit()
+    await invalidate_posts(post_id)
     return None
 
 
-@router.get("/users/{user_id}/posts", response_model=List[PostSchema])
-def get_user_posts(user_id: int, db: Session = Depends(get_db)):
-    posts = db.query(Post).filter(Post.user_id == user_id).all()
-    return posts
\ No newline at end of file
+@router.get("/users/{user_id}/posts", response_model=Page[PostSchema])
+async def get_user_posts(
+    user_id: int,
+    page: PageParams = Depends(),
+    fields: Fields = Depends(FieldSelector(PostSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    if settings.FAST_LIST_READS:
+        return await fast_page(db, Post, PostSchema, page, Post.user_id == user_id, fields=fields)
+    result = await paginate(db, select(Post).where(Post.user_id == user_id), Post, page, fields=fields)
+    return result if fields is None else sparse_response(PostSchema, fields, result, page=True)
\ No newline at end of file
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+
+from app.api.v1.pagination import PageParams, decode_key, encode_key
+from app.core.oauth2 import get_optional_user
+from app.core.security import TokenClaims
+from app.db.dependencies import get_db
+from app.db.search import COMMENT, POST, search_statement
+from app.schemas.pagination import Page
+from app.schemas.search import SearchHit
+
+router = APIRouter()
+
+
+def _search_cursor(cursor: str) -> list:
+    key = decode_key(cursor)
+    if (
+        len(key) != 3
+        or not isinstance(key[0], (int, float))
+        or key[1] not in (POST, COMMENT)
+        or not isinstance(key[2], int)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return key
+
+
+@router.get("/search", response_model=Page[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for, every one must match"),
+    kind: Optional[Literal["post", "comment"]] = Query(None, alias="type", description="Only return posts or only comments"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    claims: Optional[TokenClaims] = Depends(get_optional_user)
+):
+    # A signed-in searcher also finds their own non-public posts
+    viewer_id = claims.user_id if claims is not None else None
+    after = _search_cursor(page.cursor) if page.cursor is not None else None
+    statement = search_statement(
+        db.bind.dialect.name, q, viewer_id, [kind] if kind else [POST, COMMENT], after, page.limit
+    )
+    if statement is None:
+        return {"items": [], "next_cursor": None}
+
+    rows = (await db.execute(statement)).all()
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_key(last.score, last.kind, last.id)
+    return {
+        "items": [
+            {
+                "type": row.kind, "id": row.id, "post_id": row.post_id, "user_id": row.user_id,
+                "title": row.title, "content": row.content, "created_at": row.created_at, "rank": -row.score,
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    }
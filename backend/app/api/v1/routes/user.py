@@ -1,38 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-
+from typing import List, Optional
+
+from app.api.v1.conditional import entity_etag, is_not_modified, last_modified, not_modified, set_validators
+from app.api.v1.fast_json import fast_page
+from app.api.v1.fields import Fields, FieldSelector, sparse_response
+from app.api.v1.pagination import PageParams, paginate
+from app.core.config import settings
+from app.core.oauth2 import get_current_user, get_current_user_data, get_optional_user, is_admin, require_owner
+from app.core.security import TokenClaims, create_access_token, hash_password, verify_password
 from app.db.dependencies import get_db
+from app.db.entity_cache import get_user_data, get_user_version, invalidate_users
+from app.db.last_login import last_logins
+from app.db.username_index import complete_username, username_index
 from app.models.user import User
-from app.schemas.user import UserSchema, UserCreate, UserUpdate, UserInDB
-import hashlib
+from app.schemas.pagination import Page
+from app.schemas.token import Token
+from app.schemas.user import UserSchema, UserCreate, UserUpdate, UserInDB, UsernameMatch
 
 
 router = APIRouter()
 
 
-@router.get("/users", response_model=List[UserSchema])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/users", response_model=Page[UserSchema])
+async def get_users(
+    page: PageParams = Depends(),
+    fields: Fields = Depends(FieldSelector(UserSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    if settings.FAST_LIST_READS:
+        return await fast_page(db, User, UserSchema, page, transform=last_logins.merge, fields=fields)
+    result = await paginate(db, select(User), User, page, fields=fields)
+    if last_logins:
+        # Only loaded attributes may be read, the id is always among them
+        names = UserSchema.model_fields if fields is None else ("id",) + fields
+        result["items"] = [last_logins.merge({name: getattr(user, name) for name in names}) for user in result["items"]]
+    return result if fields is None else sparse_response(UserSchema, fields, result, page=True)
+
+
+# Declared before /users/{user_id} so "autocomplete" is not parsed as an id
+@router.get("/users/autocomplete", response_model=List[UsernameMatch])
+async def autocomplete_usernames(
+    prefix: str = Query(..., min_length=1, max_length=50, description="Start of the username, matched case-insensitively"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    return [{"id": id, "username": username} for id, username in await complete_username(db, prefix, limit)]
+
+
+@router.get("/users/me", response_model=UserSchema)
+async def get_me(
+    user: dict = Depends(get_current_user_data),
+    fields: Fields = Depends(FieldSelector(UserSchema))
+):
+    return user if fields is None else sparse_response(UserSchema, fields, user)
 
 
 @router.get("/users/{user_id}", response_model=UserSchema)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    fields: Fields = Depends(FieldSelector(UserSchema)),
+    db: AsyncSession = Depends(get_db)
+):
+    version = await get_user_version(db, user_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
+    etag = entity_etag("user", user_id, *version, fields=fields)
+    if is_not_modified(request, etag, last_modified(*version)):
+        return not_modified(etag, last_modified(*version))
+
+    user = await get_user_data(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID {user_id} not found"
         )
-    return user
+    if fields is not None:
+        response = sparse_response(UserSchema, fields, user)
+    # Validators come from the body actually served, in case it changed meanwhile
+    set_validators(response, entity_etag("user", user_id, user["updated_at"], fields=fields), last_modified(user["updated_at"]))
+    return response if fields is not None else user
 
 
 @router.post("/users", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(
+async def create_user(
+    user: UserCreate,
+    db: AsyncSession = Depends(get_db),
+    claims: Optional[TokenClaims] = Depends(get_optional_user)
+):
+    if user.role != "user" and not is_admin(claims):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can assign roles"
+        )
+
+    existing_user = (await db.scalars(select(User).where(
       (User.username == user.username) | (User.email == user.email)
-    ).first()
+    ).limit(1))).first()
 
     if existing_user:
         raise HTTPException(
@@ -40,7 +112,7 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
               detail=f"Username or email already exists"
         )
 
-    password_hash = hashlib.sha256(user.password.encode()).hexdigest()
+    password_hash = await hash_password(user.password)
 
     db_user = User(
         username=user.username,
@@ -54,63 +126,113 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    if db_user.is_active:
+        username_index.add(db_user.id, db_user.username)
     return db_user
 
 
 @router.put("/users/{user_id}", response_model=UserSchema)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def update_user(
+    user_id: int,
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_user = await db.get(User, user_id)
 
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID {user_id} not found"
         )
+    require_owner(claims, user_id, "user")
 
     update_data = user_update.model_dump(exclude_unset=True)
+    if "role" in update_data and not is_admin(claims):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can assign roles"
+        )
 
     if "password" in update_data:
         password = update_data.pop("password")
-        update_data["password_hash"] = hashlib.sha256(password.encode()).hexdigest()
+        update_data["password_hash"] = await hash_password(password)
 
     for key, value in update_data.items():
         setattr(db_user, key, value)
 
     db_user.updated_at = datetime.now()
 
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    await db.commit()
+    await invalidate_users(user_id)
+    await db.refresh(db_user)
+    if db_user.is_active:
+        username_index.add(user_id, db_user.username)
+    else:
+        username_index.remove(user_id)
+    return last_logins.merge(UserSchema.model_validate(db_user).model_dump())
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(get_current_user)
+):
+    db_user = await db.get(User, user_id)
 
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID {user_id} not found"
         )
+    require_owner(claims, user_id, "user")
 
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
+    await invalidate_users(user_id)
+    username_index.remove(user_id)
+    last_logins.discard(user_id)
     return None
 
 
-@router.post("/users/{user_id}/login", response_model=UserSchema)
-def login_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+@router.post("/users/login", response_model=Token)
+async def login_user(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = (await db.scalars(select(User).where(User.username == form.username).limit(1))).first()
+    verified, new_hash = await verify_password(form.password, user.password_hash if user is not None else None)
+    if not verified:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with ID {user_id} not found"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if user.is_active is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
         )
 
-    user.last_login = datetime.now()
-    db.commit()
-    db.refresh(user)
-
-    return user
\ No newline at end of file
+    # Read before the commit expires the row
+    user_id, role = user.id, user.role or "user"
+    changed = new_hash is not None
+    if settings.LAST_LOGIN_BUFFER:
+        # Written with other logins in the next batch, reads merge it in until then
+        last_logins.record(user_id, datetime.now())
+    else:
+        user.last_login = datetime.now()
+        changed = True
+    if new_hash is not None:
+        # Legacy or cheaper hashes are upgraded while the plain password is at hand
+        user.password_hash = new_hash
+    if changed:
+        await db.commit()
+        await invalidate_users(user_id)
+
+    expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return {
+        "access_token": create_access_token(user_id, role, True, expires_in),
+        "token_type": "bearer",
+        "expires_in": expires_in,
+    }
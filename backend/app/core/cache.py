@@ -0,0 +1,133 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+class CacheBackend(ABC):
+    """
+    Interface every cache backend implements.
+
+    Methods are async so a shared, networked backend can be dropped in
+    without touching callers. Values must be JSON-compatible (dicts, lists,
+    strings, numbers) so they survive the trip through such a backend.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, expiring after ttl seconds (the backend default if None)."""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Drop keys if present."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every key."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters for monitoring."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class NullCache(CacheBackend):
+    """Backend used when caching is disabled, every lookup is a miss."""
+
+    def __init__(self):
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "null", "hits": 0, "misses": self.misses, "hit_rate": 0.0}
+
+
+def build_cache() -> CacheBackend:
+    if not settings.CACHE_ENABLED:
+        return NullCache()
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown cache backend {settings.CACHE_BACKEND!r}")
+
+
+cache = build_cache()
@@ -0,0 +1,140 @@
+import os
+import secrets
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return default if value is None else float(value)
+
+
+def _env_ints(name: str, default: list) -> list:
+    value = os.getenv(name)
+    return default if value is None else [int(part) for part in value.split(",") if part.strip()]
+
+
+class Settings:
+    """Application settings, read once from the environment at import time."""
+
+    def __init__(self):
+        # "development" creates the schema and seeds an empty database on boot;
+        # anything else starts without DDL, seeding or dev-only imports
+        self.APP_ENV = os.getenv("APP_ENV", "development")
+        development = self.APP_ENV == "development"
+        self.DB_CREATE_SCHEMA = _env_bool("DB_CREATE_SCHEMA", development)
+        self.DB_SEED = _env_bool("DB_SEED", development)
+
+        # Optional warm-up before the app reports ready: idle connections to open,
+        # and how many of the newest posts (with their authors) to cache
+        self.WARM_POOL_CONNECTIONS = _env_int("WARM_POOL_CONNECTIONS", 0)
+        self.WARM_CACHE_POSTS = _env_int("WARM_CACHE_POSTS", 0)
+
+        self.DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://fastapi:fastapi@db:5432/facebook_clone")
+
+        # Serve requests through the asyncio driver; set DB_ASYNC=false to fall back to
+        # the psycopg2 engine on the threadpool, e.g. to A/B the two under the same load
+        self.DB_ASYNC = _env_bool("DB_ASYNC", True)
+
+        # Connection pool, applied to both the sync and the async engine
+        self.DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+        self.DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+        self.DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 10.0)
+        self.DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+        self.DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+
+        # Worker threads for sync handlers and the sync DB path. Defaults to the
+        # most connections the pool can hand out so threads never queue on it
+        self.THREADPOOL_SIZE = _env_int("THREADPOOL_SIZE", self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW)
+
+        # Read-through entity cache in front of user, post and comment lookups
+        self.CACHE_ENABLED = _env_bool("CACHE_ENABLED", True)
+        self.CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+        self.CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 10000)
+        self.CACHE_TTL_SECONDS = _env_float("CACHE_TTL_SECONDS", 60.0)
+
+        # Serve list endpoints from Core rows encoded straight to JSON, bypassing the
+        # ORM and pydantic; the bytes on the wire are identical either way
+        self.FAST_LIST_READS = _env_bool("FAST_LIST_READS", True)
+
+        # /posts/export and /comments/export read EXPORT_BATCH_ROWS rows per round trip
+        # from a server-side cursor, and gzip the stream at EXPORT_GZIP_LEVEL when the
+        # client accepts it
+        self.EXPORT_BATCH_ROWS = _env_int("EXPORT_BATCH_ROWS", 1000)
+        self.EXPORT_GZIP_LEVEL = _env_int("EXPORT_GZIP_LEVEL", 6)
+
+        # Rows each comment/reply counter is spread over; more shards let more
+        # writers bump the same post's count without waiting on each other
+        self.COUNTER_SHARDS = _env_int("COUNTER_SHARDS", 16)
+
+        # Largest batch accepted by the bulk create endpoints
+        self.BULK_MAX_ITEMS = _env_int("BULK_MAX_ITEMS", 1000)
+
+        # Count and time the SQL of every request, reported in a Server-Timing header
+        # and a JSON log line; requests above QUERY_WARN_COUNT statements log a warning
+        self.QUERY_STATS = _env_bool("QUERY_STATS", True)
+        self.QUERY_WARN_COUNT = _env_int("QUERY_WARN_COUNT", 50)
+
+        # Statements slower than SLOW_QUERY_MS (0 turns the log off) are kept per
+        # fingerprint in a ring of SLOW_QUERY_ENTRIES and, unless SLOW_QUERY_EXPLAIN
+        # is off, explained once on a side connection
+        self.SLOW_QUERY_MS = _env_float("SLOW_QUERY_MS", 250.0)
+        self.SLOW_QUERY_ENTRIES = _env_int("SLOW_QUERY_ENTRIES", 200)
+        self.SLOW_QUERY_EXPLAIN = _env_bool("SLOW_QUERY_EXPLAIN", True)
+
+        # Per-route request counters and latency histograms, served at /metrics
+        self.METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+        # Serve /users/autocomplete from an in-memory index of usernames, built in the
+        # background on first use and rebuilt once older than the TTL; off, every
+        # completion is a prefix query against the database
+        self.USERNAME_INDEX = _env_bool("USERNAME_INDEX", True)
+        self.USERNAME_INDEX_TTL_SECONDS = _env_float("USERNAME_INDEX_TTL_SECONDS", 300.0)
+
+        # Buffer last_login stamps in memory and write them in one batch every
+        # LAST_LOGIN_FLUSH_SECONDS, or once LAST_LOGIN_FLUSH_ENTRIES users are waiting;
+        # off, every login updates its row before answering
+        self.LAST_LOGIN_BUFFER = _env_bool("LAST_LOGIN_BUFFER", True)
+        self.LAST_LOGIN_FLUSH_SECONDS = _env_float("LAST_LOGIN_FLUSH_SECONDS", 5.0)
+        self.LAST_LOGIN_FLUSH_ENTRIES = _env_int("LAST_LOGIN_FLUSH_ENTRIES", 500)
+
+        # Signed access tokens. The key must be set outside development, where a random
+        # one per process is used instead. Claims are trusted until the token expires,
+        # so a role change or deactivation takes at most ACCESS_TOKEN_EXPIRE_MINUTES to
+        # apply; TOKEN_VERIFY_CACHE_SIZE tokens are remembered once verified
+        self.JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY") or (secrets.token_urlsafe(32) if development else None)
+        self.JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+        self.ACCESS_TOKEN_EXPIRE_MINUTES = _env_int("ACCESS_TOKEN_EXPIRE_MINUTES", 15)
+        self.TOKEN_VERIFY_CACHE_SIZE = _env_int("TOKEN_VERIFY_CACHE_SIZE", 4096)
+
+        # Passwords are hashed with bcrypt at BCRYPT_ROUNDS on a pool of PASSWORD_HASH_WORKERS
+        # threads of its own; once PASSWORD_HASH_QUEUE more hashes are waiting, signups and
+        # logins are turned away with a 503 rather than queueing without bound
+        self.BCRYPT_ROUNDS = _env_int("BCRYPT_ROUNDS", 12)
+        self.PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+        self.PASSWORD_HASH_QUEUE = _env_int("PASSWORD_HASH_QUEUE", 64)
+
+        # Uploaded images are stored under MEDIA_ROOT named by their sha256, so the same
+        # bytes are only ever stored once; "local" disk is the only STORAGE_BACKEND so
+        # far. Thumbnails no larger than each of IMAGE_THUMBNAIL_SIZES pixels are made in
+        # the background by IMAGE_THUMBNAIL_WORKERS processes, for images of at most
+        # IMAGE_MAX_PIXELS pixels; larger ones keep serving the original
+        self.STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+        self.MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+        self.IMAGE_MAX_BYTES = _env_int("IMAGE_MAX_BYTES", 10 * 1024 * 1024)
+        self.IMAGE_THUMBNAIL_SIZES = _env_ints("IMAGE_THUMBNAIL_SIZES", [128, 512])
+        self.IMAGE_MAX_PIXELS = _env_int("IMAGE_MAX_PIXELS", 40_000_000)
+        self.IMAGE_THUMBNAIL_WORKERS = _env_int("IMAGE_THUMBNAIL_WORKERS", min(2, os.cpu_count() or 1))
+
+
+settings = Settings()
@@ -0,0 +1,216 @@
+"""
+Image uploads: content-addressed storage and background thumbnails.
+
+An upload is streamed to a staging file chunk by chunk while it is hashed,
+so no more than one chunk is ever held in memory, and is then stored under
+its sha256. Uploading bytes that are already stored costs the hashing and
+nothing else: the staged copy is dropped and the existing file is reused.
+
+Thumbnails, one per IMAGE_THUMBNAIL_SIZES entry, are made after the upload
+has been answered, by a small pool of worker processes so resizing neither
+blocks the event loop nor contends for the GIL. Until a thumbnail exists
+its URL serves the original, and asking for it schedules it again, so a
+thumbnail lost to a restart or a failed resize is eventually made.
+
+Images are only decoded once their header shows at most IMAGE_MAX_PIXELS
+pixels, since a small compressed upload can expand to gigabytes of pixels.
+Larger ones get no thumbnails and are not scheduled again.
+
+Pillow is optional: without it uploads still work and every thumbnail URL
+keeps serving the original.
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.storage import storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    Image = ImageOps = None
+
+logger = logging.getLogger("uvicorn.error")
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+_PIL_FORMATS = {"jpg": "JPEG", "png": "PNG", "gif": "GIF", "webp": "WEBP"}
+_OVERSIZED_ENTRIES = 10000
+
+# A stored image: its sha256, then _<size> for a thumbnail, then its extension
+KEY_PATTERN = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_(?P<size>[1-9][0-9]*))?\.(?P<ext>jpg|png|gif|webp)$")
+
+
+class UnsupportedImage(Exception):
+    """The upload is not a JPEG, PNG, GIF or WebP image."""
+
+
+class ImageTooLarge(Exception):
+    """The upload is larger than IMAGE_MAX_BYTES, or its pixels more than IMAGE_MAX_PIXELS."""
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    digest: str
+    ext: str
+    size: int
+    created: bool
+
+    @property
+    def key(self) -> str:
+        return image_key(self.digest, self.ext)
+
+
+def image_key(digest: str, ext: str, size: Optional[int] = None) -> str:
+    return f"{digest}.{ext}" if size is None else f"{digest}_{size}.{ext}"
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """The extension matching the file's magic bytes, whatever the client claimed it was."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+async def store_upload(chunks: AsyncIterator[bytes], max_bytes: int) -> StoredImage:
+    """Stream `chunks` into storage under their sha256, raising UnsupportedImage or ImageTooLarge."""
+    staged = storage.staging_file()
+    digest = hashlib.sha256()
+    head, size = b"", 0
+    try:
+        with await run_in_threadpool(open, staged, "wb") as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLarge()
+                if len(head) < 12:
+                    head += chunk[:12]
+                digest.update(chunk)
+                await run_in_threadpool(file.write, chunk)
+        ext = sniff(head)
+        if ext is None:
+            raise UnsupportedImage()
+    except BaseException:
+        await storage.discard(staged)
+        raise
+    digest = digest.hexdigest()
+    created = await storage.put(image_key(digest, ext), staged)
+    return StoredImage(digest, ext, size, created)
+
+
+def make_thumbnails(source: str, ext: str, targets: Dict[int, str], max_pixels: int):
+    """Write `source` scaled to fit within each size to its target path. Runs in a worker process."""
+    with Image.open(source) as image:
+        # Only the header has been read so far, refuse before the pixels are decoded
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageTooLarge(f"{width}x{height} pixels")
+        # Phones store rotation as metadata; thumbnails are stripped of it, so apply it first
+        image = ImageOps.exif_transpose(image)
+        for size, target in targets.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            thumbnail.save(target, format=_PIL_FORMATS[ext])
+
+
+class Thumbnailer:
+    """Worker processes making thumbnails in the background, at most one job per image at a time."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, asyncio.Task] = {}
+        # Digests of images too large to ever get thumbnails, oldest dropped first
+        self._oversized: "OrderedDict[str, None]" = OrderedDict()
+        self.made = 0
+        self.failed = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started on first use; spawned rather than forked, the parent runs threads and an event loop
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def schedule(self, digest: str, ext: str):
+        """Make the image's missing thumbnails in the background, unless that is already underway."""
+        if Image is None or not settings.IMAGE_THUMBNAIL_SIZES or digest in self._oversized:
+            return
+        loop = asyncio.get_running_loop()
+        job = self._jobs.get(digest)
+        if job is None or job.done() or job.get_loop() is not loop:
+            self._jobs[digest] = loop.create_task(self._make(digest, ext))
+
+    async def _make(self, digest: str, ext: str):
+        try:
+            await self._make_missing(digest, ext)
+        finally:
+            if self._jobs.get(digest) is asyncio.current_task():
+                del self._jobs[digest]
+
+    async def _make_missing(self, digest: str, ext: str):
+        sizes = [size for size in settings.IMAGE_THUMBNAIL_SIZES if not await storage.exists(image_key(digest, ext, size))]
+        source = await storage.local_path(image_key(digest, ext))
+        if not sizes or source is None:
+            return
+        targets = {size: storage.staging_file() for size in sizes}
+        try:
+            await asyncio.wrap_future(
+                self._pool().submit(make_thumbnails, source, ext, targets, settings.IMAGE_MAX_PIXELS)
+            )
+        except BaseException as e:
+            for staged in targets.values():
+                await storage.discard(staged)
+            if not isinstance(e, Exception):
+                raise
+            self.failed += 1
+            if isinstance(e, ImageTooLarge):
+                self._oversized[digest] = None
+                if len(self._oversized) > _OVERSIZED_ENTRIES:
+                    self._oversized.popitem(last=False)
+                logger.warning("no thumbnails for %s, it has %s", image_key(digest, ext), e)
+                return
+            logger.exception("thumbnails for %s failed, the original is served in their place", image_key(digest, ext))
+            return
+        for size, staged in targets.items():
+            await storage.put(image_key(digest, ext, size), staged)
+        self.made += len(targets)
+
+    async def wait(self):
+        """Wait for every job this event loop has scheduled so far."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(job for job in self._jobs.values() if job.get_loop() is loop), return_exceptions=True)
+
+    async def shutdown(self):
+        # Unfinished thumbnails are made again the next time they are asked for
+        loop = asyncio.get_running_loop()
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*(job for job in jobs if job.get_loop() is loop), return_exceptions=True)
+        self._jobs.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            await run_in_threadpool(executor.shutdown, wait=True, cancel_futures=True)
+
+
+thumbnailer = Thumbnailer(settings.IMAGE_THUMBNAIL_WORKERS)
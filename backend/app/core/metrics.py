@@ -0,0 +1,193 @@
+"""
+Request metrics in the Prometheus text format, served at /metrics.
+
+Recording takes no lock: every thread owns a shard that only it writes to,
+and a scrape sums the shards. Under asyncio all requests are recorded on the
+event loop thread, so in practice there is one hot shard and recording is a
+dict lookup plus a few integer additions. Series are keyed by route template
+rather than raw path so the label set stays bounded.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds, from cache hits to requests that are about to time out
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Series layout: [requests, errors, seconds_sum, one count per bucket..., +Inf count]
+_REQUESTS, _ERRORS, _SUM, _FIRST_BUCKET = 0, 1, 2, 3
+
+
+class _Shard:
+    __slots__ = ("series", "in_flight")
+
+    def __init__(self):
+        self.series: Dict[Tuple[str, str], list] = {}
+        self.in_flight = 0
+
+
+class RequestMetrics:
+    """Per-route request counts, error counts and latency histograms, plus in-flight requests."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            # Once per thread; shards outlive their threads so no count is lost
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def started(self):
+        self._shard().in_flight += 1
+
+    def finished(self, method: str, route: str, seconds: float, error: bool):
+        shard = self._shard()
+        shard.in_flight -= 1
+        series = shard.series.get((method, route))
+        if series is None:
+            series = shard.series[(method, route)] = [0, 0, 0.0] + [0] * (len(BUCKETS) + 1)
+        series[_REQUESTS] += 1
+        if error:
+            series[_ERRORS] += 1
+        series[_SUM] += seconds
+        series[_FIRST_BUCKET + bisect_left(BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str], list], int]:
+        """Merged series and the in-flight count, summed over every shard."""
+        with self._lock:
+            shards = list(self._shards)
+        merged, in_flight = {}, 0
+        for shard in shards:
+            in_flight += shard.in_flight
+            # dict.copy() runs without releasing the GIL, so it never sees a resize halfway
+            for key, series in shard.series.copy().items():
+                total = merged.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        return merged, in_flight
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Record every HTTP request in `request_metrics`; 5xx responses and exceptions count as errors."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.started()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router leaves the matched route in the scope; anything else shares one label
+            route = scope.get("route")
+            self.metrics.finished(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                time.perf_counter() - started,
+                status_code >= 500,
+            )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _family(lines: List[str], name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics: RequestMetrics, pools: Dict[str, dict], cache_stats: dict) -> str:
+    """Exposition text for the request metrics, the pool status of each engine and the cache stats."""
+    series, in_flight = metrics.snapshot()
+    keys = sorted(series)
+    lines: List[str] = []
+
+    _family(lines, "http_requests_total", "counter", "Requests handled, by route template.")
+    for method, route in keys:
+        lines.append(f"http_requests_total{_labels(method=method, route=route)} {series[method, route][_REQUESTS]}")
+
+    _family(lines, "http_request_errors_total", "counter", "Requests that ended in a 5xx or an exception.")
+    for method, route in keys:
+        lines.append(f"http_request_errors_total{_labels(method=method, route=route)} {series[method, route][_ERRORS]}")
+
+    _family(lines, "http_request_duration_seconds", "histogram", "Time from request start to the end of the response.")
+    for method, route in keys:
+        values = series[method, route]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values[_FIRST_BUCKET:]):
+            cumulative += count
+            lines.append(
+                f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+            )
+        lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {_number(values[_SUM])}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {values[_REQUESTS]}")
+
+    _family(lines, "http_requests_in_flight", "gauge", "Requests currently being handled.")
+    lines.append(f"http_requests_in_flight {in_flight}")
+
+    pool_metrics = (
+        ("db_pool_size", "gauge", "size", "Connections the pool keeps open."),
+        ("db_pool_checked_out", "gauge", "checked_out", "Connections currently in use."),
+        ("db_pool_checked_in", "gauge", "checked_in", "Idle connections in the pool."),
+        ("db_pool_overflow", "gauge", "overflow", "Connections open beyond the pool size."),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Connections handed out."),
+        ("db_pool_overflow_events_total", "counter", "overflow_events", "Checkouts that had to open an overflow connection."),
+        ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that gave up waiting."),
+        ("db_pool_wait_seconds_total", "counter", "wait_seconds_total", "Time spent waiting for a connection."),
+        ("db_pool_wait_seconds_max", "gauge", "wait_seconds_max", "Longest wait for a connection."),
+    )
+    for name, kind, field, help_text in pool_metrics:
+        if not any(field in status for status in pools.values()):
+            continue
+        _family(lines, name, kind, help_text)
+        for engine, status in pools.items():
+            if field in status:
+                lines.append(f"{name}{_labels(engine=engine)} {_number(status[field])}")
+
+    cache_metrics = (
+        ("cache_hits_total", "counter", "hits", "Entity cache lookups that found an entry."),
+        ("cache_misses_total", "counter", "misses", "Entity cache lookups that went to the database."),
+        ("cache_evictions_total", "counter", "evictions", "Entries dropped to stay under the size limit."),
+        ("cache_entries", "gauge", "size", "Entries currently cached."),
+        ("cache_hit_ratio", "gauge", "hit_rate", "Hits over lookups since start."),
+    )
+    for name, kind, field, help_text in cache_metrics:
+        if field in cache_stats:
+            _family(lines, name, kind, help_text)
+            lines.append(f"{name}{_labels(backend=cache_stats['backend'])} {_number(cache_stats[field])}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+"""
+Request authentication from bearer tokens.
+
+Identity, role and account status come from the token's signed claims, so
+`get_current_user` answers without touching the database. The few routes
+that need the caller's full row use `get_current_user_data`, which reads it
+through the entity cache and so hits the database at most once per
+CACHE_TTL_SECONDS per user.
+"""
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import InvalidToken, TokenClaims, decode_access_token
+from app.db.dependencies import get_db
+from app.db.entity_cache import get_user_data
+
+ADMIN = "admin"
+
+# Missing tokens are let through here so anonymous reads can share the scheme
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login", auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+async def get_optional_user(token: Optional[str] = Depends(oauth2_scheme)) -> Optional[TokenClaims]:
+    """The caller's claims, or None for an anonymous request; a bad token is still rejected."""
+    if token is None:
+        return None
+    try:
+        claims = decode_access_token(token)
+    except InvalidToken:
+        raise _unauthorized("Invalid or expired token")
+    if not claims.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    return claims
+
+
+async def get_current_user(claims: Optional[TokenClaims] = Depends(get_optional_user)) -> TokenClaims:
+    if claims is None:
+        raise _unauthorized("Not authenticated")
+    return claims
+
+
+async def get_current_user_data(
+    claims: TokenClaims = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> dict:
+    """The caller's user row, through the entity cache."""
+    user = await get_user_data(db, claims.user_id)
+    if user is None:
+        raise _unauthorized("User no longer exists")
+    return user
+
+
+def is_admin(claims: Optional[TokenClaims]) -> bool:
+    return claims is not None and claims.role == ADMIN
+
+
+async def get_admin_user(claims: TokenClaims = Depends(get_current_user)) -> TokenClaims:
+    if not is_admin(claims):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return claims
+
+
+def require_owner(claims: TokenClaims, owner_id: int, what: str):
+    """Let the owner or an admin through, 403 for everyone else."""
+    if claims.user_id != owner_id and not is_admin(claims):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not allowed to change this {what}"
+        )
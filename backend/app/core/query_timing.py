@@ -0,0 +1,59 @@
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.db.query_stats import track_queries
+
+# Same logger as the startup timings, which uvicorn configures out of the box
+logger = logging.getLogger("uvicorn.error")
+
+
+def server_timing(queries: int, db_seconds: float, app_seconds: float) -> str:
+    return f'db;dur={db_seconds * 1000:.2f};desc="{queries} queries", app;dur={app_seconds * 1000:.2f}'
+
+
+class QueryTimingMiddleware:
+    """
+    Count and time the SQL each HTTP request runs, reported in a Server-Timing
+    header and in one JSON log line per request.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so the handler runs in
+    the same context as the tracker and streaming responses are not buffered.
+    The header carries what ran before the response started; the log line is
+    written once the body has been sent and covers everything.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        with track_queries() as stats:
+            async def send_with_timing(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    header = server_timing(stats.count, stats.seconds, time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                elapsed = time.perf_counter() - started
+                level = logging.WARNING if stats.count > settings.QUERY_WARN_COUNT else logging.INFO
+                logger.log(level, json.dumps({
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "queries": stats.count,
+                    "db_ms": round(stats.seconds * 1000, 2),
+                    "duration_ms": round(elapsed * 1000, 2),
+                }))
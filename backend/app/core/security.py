@@ -0,0 +1,231 @@
+"""
+Password hashing and signed access tokens.
+
+An access token is an HS256 JWT carrying everything a request needs to know
+about its caller: the user id, the role and whether the account is active.
+Verifying one is a signature check, not a query, so authenticated requests
+never read the users table. The trade-off is that claims stay valid until
+the token expires, which is why tokens are short-lived.
+
+Checking a signature through python-jose costs tens of microseconds, paid
+again on every request of a session. Tokens that passed verification are
+therefore remembered, keyed by the whole token string, in a small LRU; a
+later request presenting the same token skips straight to the expiry check.
+Only a byte-for-byte copy of a token already proven genuine can hit, so the
+cache never lets an unverified token through.
+
+Passwords are hashed with bcrypt. At production cost a hash takes a few
+hundred milliseconds of CPU, so it never runs on the event loop or the
+request threadpool: `hash_password` and `verify_password` hand it to a
+small dedicated pool (bcrypt releases the GIL, so threads hash in
+parallel). The pool admits a bounded number of waiting hashes and fails
+the rest immediately with `HashingPoolFull`, answered as a 503, so a burst
+of logins cannot queue up behind itself until every client times out.
+Hashes in the old unsalted sha256 format still verify, and are replaced
+with a bcrypt hash the next time their owner logs in.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class InvalidToken(Exception):
+    """The token is malformed, badly signed, expired or missing a claim."""
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    user_id: int
+    role: str
+    is_active: bool
+    expires_at: int
+
+
+# hex_sha256 is the unsalted digest every password used to be stored as
+pwd_context = CryptContext(
+    schemes=["bcrypt", "hex_sha256"],
+    deprecated=["hex_sha256"],
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class HashingPoolFull(Exception):
+    """Every hashing worker is busy and the waiting line is full."""
+
+
+class HashingPool:
+    """Threads reserved for password hashing, with a cap on how many hashes may wait for one."""
+
+    def __init__(self, workers: int, max_waiting: int):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Started on first use, so importing the app starts no threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        """Run `fn(*args)` on the pool, or raise HashingPoolFull at once if too much is already waiting."""
+        pool = self._pool()
+        with self._lock:
+            if self.pending >= self.workers + self.max_waiting:
+                self.rejected += 1
+                raise HashingPoolFull()
+            self.pending += 1
+        # Released when the hash finishes, not when the caller stops waiting for it
+        future = pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_waiting": self.max_waiting,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
+
+
+async def hash_password(password: str) -> str:
+    return await hashing_pool.run(pwd_context.hash, password)
+
+
+def _verify_and_update(password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if password_hash is None:
+        # Spend the time a real check would, so a missing user can't be told apart by timing
+        pwd_context.dummy_verify()
+        return False, None
+    try:
+        return pwd_context.verify_and_update(password, password_hash)
+    except ValueError:
+        # A stored value in no format we know matches no password
+        return False, None
+
+
+async def verify_password(password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Whether `password` matches, plus a replacement hash when the stored one is outdated.
+
+    Pass None for a user that does not exist to get a (False, None) that took
+    as long as a real check.
+    """
+    return await hashing_pool.run(_verify_and_update, password, password_hash)
+
+
+def _signing_key() -> str:
+    if not settings.JWT_SECRET_KEY:
+        raise RuntimeError("JWT_SECRET_KEY must be set outside development")
+    return settings.JWT_SECRET_KEY
+
+
+def create_access_token(user_id: int, role: str, is_active: bool, expires_in: Optional[int] = None) -> str:
+    """A signed token for the user, valid for `expires_in` seconds (ACCESS_TOKEN_EXPIRE_MINUTES by default)."""
+    now = int(time.time())
+    if expires_in is None:
+        expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    claims = {"sub": str(user_id), "role": role, "active": is_active, "iat": now, "exp": now + expires_in}
+    return jwt.encode(claims, _signing_key(), algorithm=settings.JWT_ALGORITHM)
+
+
+class VerifiedTokens:
+    """LRU of tokens whose signature already checked out, with the claims they carry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, TokenClaims]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[TokenClaims]:
+        with self._lock:
+            claims = self._data.get(token)
+            if claims is not None:
+                self._data.move_to_end(token)
+            return claims
+
+    def add(self, token: str, claims: TokenClaims):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[token] = claims
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._data.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+verified_tokens = VerifiedTokens(settings.TOKEN_VERIFY_CACHE_SIZE)
+
+
+def _claims(payload: dict) -> TokenClaims:
+    try:
+        claims = TokenClaims(
+            user_id=int(payload["sub"]),
+            role=payload["role"],
+            is_active=payload["active"],
+            expires_at=payload["exp"],
+        )
+    except (KeyError, TypeError, ValueError):
+        raise InvalidToken("Token is missing a claim")
+    if not isinstance(claims.role, str) or not isinstance(claims.is_active, bool) or not isinstance(claims.expires_at, int):
+        raise InvalidToken("Token has a malformed claim")
+    return claims
+
+
+def decode_access_token(token: str) -> TokenClaims:
+    """The claims of a genuine, unexpired token; InvalidToken otherwise."""
+    claims = verified_tokens.get(token)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, _signing_key(), algorithms=[settings.JWT_ALGORITHM])
+        except JWTError as e:
+            raise InvalidToken(str(e))
+        claims = _claims(payload)
+        verified_tokens.add(token, claims)
+    # jose checked expiry on the way in, a remembered token has to be checked again
+    if claims.expires_at <= time.time():
+        verified_tokens.discard(token)
+        raise InvalidToken("Signature has expired.")
+    return claims
@@ -0,0 +1,38 @@
+import logging
+import time
+from contextlib import contextmanager
+
+# uvicorn configures this logger, so phase timings show up next to its own startup lines
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupTimer:
+    """Wall-clock duration of each boot phase, in the order they ran."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.ready_after = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds * 1000, 2)
+        logger.info("startup phase %s took %.1f ms", name, seconds * 1000)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self):
+        self.ready_after = round((time.perf_counter() - self.started) * 1000, 2)
+        logger.info("ready %.1f ms after app import", self.ready_after)
+
+    def report(self) -> dict:
+        return {"ready": self.ready_after is not None, "ready_after_ms": self.ready_after, "phases_ms": self.phases}
+
+
+# Created when app.main starts importing, so the "import" phase covers the app's own imports
+startup = StartupTimer()
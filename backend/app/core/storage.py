@@ -0,0 +1,93 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class StorageBackend(ABC):
+    """
+    Interface every file storage backend implements.
+
+    Stored files are immutable and named by a key the caller picks; with
+    content-addressed keys, storing the same bytes twice is a no-op. Files
+    are written to a local staging file first and handed over whole with
+    `put`, so a half-written upload is never visible under its key.
+    """
+
+    @abstractmethod
+    def staging_file(self) -> str:
+        """Path of a new, empty local file to write into before `put`."""
+
+    @abstractmethod
+    async def put(self, key: str, staged: str) -> bool:
+        """Store the staged file under key, taking it over; False when key was already stored."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether a file is stored under key."""
+
+    @abstractmethod
+    async def local_path(self, key: str) -> Optional[str]:
+        """Path of the stored file on local disk, for sendfile and thumbnailing; None if not stored."""
+
+    @abstractmethod
+    async def discard(self, staged: str) -> None:
+        """Remove a staging file that will not be stored."""
+
+
+class LocalStorage(StorageBackend):
+    """Files on local disk under `root`, fanned out over two levels of directories by key prefix."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def staging_file(self) -> str:
+        # Inside root, so handing the file over is a rename on the same filesystem
+        staging = os.path.join(self.root, "staging")
+        os.makedirs(staging, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=staging)
+        os.close(fd)
+        return path
+
+    def _put(self, key: str, staged: str) -> bool:
+        path = self._path(key)
+        if os.path.exists(path):
+            os.unlink(staged)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mkstemp files are private to their owner, stored ones are meant to be served
+        os.chmod(staged, 0o644)
+        os.replace(staged, path)
+        return True
+
+    async def put(self, key: str, staged: str) -> bool:
+        return await run_in_threadpool(self._put, key, staged)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self._path(key))
+
+    async def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if await run_in_threadpool(os.path.exists, path) else None
+
+    async def discard(self, staged: str) -> None:
+        try:
+            await run_in_threadpool(os.unlink, staged)
+        except FileNotFoundError:
+            pass
+
+
+def build_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.MEDIA_ROOT)
+    raise ValueError(f"Unknown storage backend {settings.STORAGE_BACKEND!r}")
+
+
+storage = build_storage()
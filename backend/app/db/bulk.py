@@ -0,0 +1,117 @@
+from collections import Counter
+from typing import Any, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.comment import Comment, path_segment
+from app.models.counter import COMMENT_REPLIES, POST_COMMENTS, bump_counter
+from app.models.post import Post
+from app.schemas.bulk import BulkItemError
+from app.schemas.comment import CommentCreate
+from app.schemas.post import PostCreate
+
+# Bulk inserts go through multi-row INSERT ... RETURNING and skip the ORM unit
+# of work, so none of the Comment mapper events run: whatever they maintain
+# (path, depth, counters) is written here explicitly, in the same transaction.
+
+_post_columns = list(Post.__table__.columns)
+_comment_columns = list(Comment.__table__.columns)
+
+
+def _error_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def validate_items(schema, items: List[Any]) -> Tuple[List[Tuple[int, BaseModel]], List[BulkItemError]]:
+    """Validate each raw item on its own, returning (index, model) pairs and per-item errors."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, detail=_error_detail(e)))
+    return valid, errors
+
+
+async def _insert_returning(db: AsyncSession, model, columns, rows: List[dict]) -> list:
+    if not rows:
+        return []
+    result = await db.execute(
+        insert(model).returning(*columns, sort_by_parameter_order=True),
+        rows,
+    )
+    return [row._asdict() for row in result.all()]
+
+
+async def bulk_create_posts(db: AsyncSession, user_id: int, items: List[Any]) -> Tuple[list, List[BulkItemError]]:
+    """Insert every valid post of a batch with one multi-row INSERT; the caller commits."""
+    valid, errors = validate_items(PostCreate, items)
+    rows = [{"user_id": user_id, **post.model_dump()} for _, post in valid]
+    return await _insert_returning(db, Post, _post_columns, rows), errors
+
+
+async def bulk_create_comments(db: AsyncSession, user_id: int, items: List[Any]) -> Tuple[list, List[BulkItemError]]:
+    """
+    Insert every valid comment of a batch, keeping paths and counters exact; the caller commits.
+
+    Posts and parents are checked with one lookup each, and items that point
+    at a missing post or at a parent on another post are reported instead of
+    failing the batch. Paths need the new ids, so they are filled in with a
+    single executemany UPDATE after the INSERT ... RETURNING.
+    """
+    valid, errors = validate_items(CommentCreate, items)
+
+    post_ids = {comment.post_id for _, comment in valid}
+    parent_ids = {comment.parent_id for _, comment in valid if comment.parent_id is not None}
+    existing_posts = set((await db.scalars(select(Post.id).where(Post.id.in_(post_ids)))).all()) if post_ids else set()
+    parents = {}
+    if parent_ids:
+        parents = {
+            row.id: row for row in (await db.execute(
+                select(Comment.id, Comment.post_id, Comment.path, Comment.depth).where(Comment.id.in_(parent_ids))
+            )).all()
+        }
+
+    accepted = []
+    for index, comment in valid:
+        if comment.post_id not in existing_posts:
+            errors.append(BulkItemError(index=index, detail=f"Post with ID {comment.post_id} not found"))
+            continue
+        parent = parents.get(comment.parent_id)
+        if comment.parent_id is not None and (parent is None or parent.post_id != comment.post_id):
+            errors.append(BulkItemError(index=index, detail="Parent comment must exist on the same post"))
+            continue
+        accepted.append((comment, parent))
+    errors.sort(key=lambda error: error.index)
+
+    created = await _insert_returning(db, Comment, _comment_columns, [
+        {"user_id": user_id, **comment.model_dump(), "depth": parent.depth + 1 if parent else 0}
+        for comment, parent in accepted
+    ])
+    if not created:
+        return created, errors
+
+    comments = Comment.__table__
+    for row, (_, parent) in zip(created, accepted):
+        row["path"] = (parent.path if parent else "") + path_segment(row["id"])
+    await db.execute(
+        update(comments).where(comments.c.id == bindparam("comment_id")).values(path=bindparam("new_path")),
+        [{"comment_id": row["id"], "new_path": row["path"]} for row in created],
+    )
+
+    post_counts = Counter(row["post_id"] for row in created)
+    reply_counts = Counter(row["parent_id"] for row in created if row["parent_id"] is not None)
+
+    def bump(session):
+        connection = session.connection()
+        for post_id, count in post_counts.items():
+            bump_counter(connection, POST_COMMENTS, post_id, count)
+        for parent_id, count in reply_counts.items():
+            bump_counter(connection, COMMENT_REPLIES, parent_id, count)
+
+    await db.run_sync(bump)
+    return created, errors
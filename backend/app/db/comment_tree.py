@@ -0,0 +1,154 @@
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy import and_, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.api.v1.pagination import encode_cursor
+from app.models.comment import Comment, path_ancestor_ids, path_upper_bound
+
+
+def _attach(comment: Comment, replies: List[Comment], remaining: int = 0, cursor: Optional[str] = None):
+    set_committed_value(comment, "replies", replies)
+    # Plain attributes read by CommentWithRepliesSchema, not mapped columns
+    comment.remaining_replies = remaining
+    comment.replies_cursor = cursor
+
+
+def build_comment_tree(comments: List[Comment]) -> List[Comment]:
+    """
+    Link a flat list of comments into a tree in a single O(n) pass.
+
+    Each comment's ``replies`` collection is populated in place with
+    set_committed_value, so serializing the tree afterwards never triggers a
+    lazy load. Input order is preserved among siblings. Returns the roots.
+    """
+    children = defaultdict(list)
+    roots = []
+    for comment in comments:
+        if comment.parent_id is None:
+            roots.append(comment)
+        else:
+            children[comment.parent_id].append(comment)
+
+    for comment in comments:
+        _attach(comment, children.get(comment.id, []))
+
+    return roots
+
+
+async def load_post_thread(db: AsyncSession, post_id: int) -> List[Comment]:
+    """Fetch every comment of a post with one query and return the top-level comments as a tree."""
+    comments = (await db.scalars(
+        select(Comment).where(Comment.post_id == post_id).order_by(Comment.created_at, Comment.id)
+    )).all()
+    return build_comment_tree(comments)
+
+
+async def load_subtrees(
+    db: AsyncSession,
+    scope_filter,
+    base_depth: int = 0,
+    max_depth: Optional[int] = None,
+    replies_per_node: Optional[int] = None,
+) -> List[Comment]:
+    """
+    Load the comments at ``base_depth`` within ``scope_filter`` with their replies in one query.
+
+    Every comment at ``base_depth`` in the scope is returned, so callers
+    limiting width page those first and pass their materialized-path ranges
+    as the scope; only the levels below are limited here. Depth limiting
+    is a plain predicate on the stored depth column and a ROW_NUMBER window
+    partitioned by parent_id keeps only the first ``replies_per_node`` replies
+    under each comment. Rows one level past ``max_depth`` are only probed for
+    their count so nodes cut off by depth can still report how many replies
+    they hide.
+
+    Every returned node carries ``remaining_replies``, and nodes truncated by
+    the per-node limit carry ``replies_cursor`` for resuming through
+    ``/comments/{comment_id}/replies``.
+    """
+    relative_depth = (Comment.depth - base_depth).label("depth")
+    ranked = select(
+        Comment.id,
+        relative_depth,
+        func.row_number().over(
+            partition_by=Comment.parent_id,
+            order_by=(Comment.created_at, Comment.id),
+        ).label("position"),
+        func.count().over(partition_by=Comment.parent_id).label("siblings"),
+    ).where(scope_filter, Comment.depth >= base_depth)
+    if max_depth is not None:
+        ranked = ranked.where(Comment.depth <= base_depth + max_depth + 1)
+    ranked = ranked.subquery()
+
+    within_limit = literal(True) if replies_per_node is None else ranked.c.position <= replies_per_node
+    conditions = [ranked.c.depth == 0]
+    if max_depth is None:
+        conditions.append(within_limit)
+    else:
+        conditions.append(and_(ranked.c.depth <= max_depth, within_limit))
+        conditions.append(and_(ranked.c.depth == max_depth + 1, ranked.c.position == 1))
+
+    rows = (await db.execute(
+        select(Comment, ranked.c.depth, ranked.c.siblings)
+        .join(ranked, Comment.id == ranked.c.id)
+        .where(or_(*conditions))
+        .order_by(ranked.c.depth, Comment.created_at, Comment.id)
+    )).all()
+
+    kept = {}
+    roots = []
+    children = defaultdict(list)
+    totals = {}
+    for comment, depth, siblings in rows:
+        if depth == 0:
+            kept[comment.id] = comment
+            roots.append(comment)
+        elif comment.parent_id in kept:
+            # Window counts are per parent, so any child row carries its parent's total
+            totals[comment.parent_id] = siblings
+            if max_depth is None or depth <= max_depth:
+                kept[comment.id] = comment
+                children[comment.parent_id].append(comment)
+
+    for comment in kept.values():
+        replies = children.get(comment.id, [])
+        remaining = totals.get(comment.id, 0) - len(replies)
+        cursor = None
+        if remaining and replies:
+            cursor = encode_cursor(replies[-1].created_at, replies[-1].id)
+        _attach(comment, replies, remaining, cursor)
+
+    return roots
+
+
+def subtree_filter(comment: Comment):
+    """Range predicate matching a comment and all of its descendants."""
+    return and_(Comment.path >= comment.path, Comment.path < path_upper_bound(comment.path))
+
+
+async def subtree_ids(db: AsyncSession, comment: Comment) -> List[int]:
+    """Ids of a comment and all of its descendants."""
+    return (await db.scalars(select(Comment.id).where(subtree_filter(comment)))).all()
+
+
+async def load_ancestors(db: AsyncSession, comment: Comment) -> List[Comment]:
+    """Return the chain of ancestors of a comment, root first, with one primary key lookup."""
+    ids = path_ancestor_ids(comment.path)
+    if not ids:
+        return []
+    return (await db.scalars(
+        select(Comment).where(Comment.id.in_(ids)).order_by(Comment.depth)
+    )).all()
+
+
+async def count_descendants(db: AsyncSession, comment: Comment) -> int:
+    """Count every reply below a comment, at any depth, with one index range scan."""
+    return await db.scalar(
+        select(func.count(Comment.id)).where(
+            Comment.path > comment.path,
+            Comment.path < path_upper_bound(comment.path),
+        )
+    )
@@ -0,0 +1,121 @@
+"""
+Detect and repair drift in the denormalized comment and reply counters.
+
+Counters are kept exact by the Comment mapper events, but writes that go
+around the ORM (manual SQL, restores, a bulk load that forgot to bump) can
+leave them off. Run periodically:
+
+    python -m app.db.counters            # report drift, exit 1 if any
+    python -m app.db.counters --repair   # fold drifted counters to their true value
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.engine import Connection
+
+from app.db.session import engine
+from app.models.comment import Comment
+from app.models.counter import COMMENT_REPLIES, POST_COMMENTS, counter_shards
+# Imported so Comment's relationships resolve when run on its own
+from app.models.post import Post  # noqa: F401
+from app.models.user import User  # noqa: F401
+
+# Kind -> (grouping column whose count is the true value, extra filter)
+_SOURCES = {
+    POST_COMMENTS: (Comment.post_id, None),
+    COMMENT_REPLIES: (Comment.parent_id, Comment.parent_id.isnot(None)),
+}
+
+# Isolation levels in which one transaction sees a single snapshot
+_SNAPSHOT_LEVELS = ("REPEATABLE READ", "SERIALIZABLE")
+
+
+@dataclass
+class Drift:
+    kind: str
+    entity_id: int
+    stored: int
+    actual: int
+
+
+def _actual_counts(kind: str):
+    column, condition = _SOURCES[kind]
+    statement = select(column.label("entity_id"), func.count().label("actual")).group_by(column)
+    if condition is not None:
+        statement = statement.where(condition)
+    return statement
+
+
+def find_drift(connection: Connection) -> List[Drift]:
+    """Compare every stored counter with a fresh count, including counters of vanished entities."""
+    drifts = []
+    for kind in _SOURCES:
+        actual = dict(connection.execute(_actual_counts(kind)).all())
+        stored = dict(connection.execute(
+            select(counter_shards.c.entity_id, func.sum(counter_shards.c.delta))
+            .where(counter_shards.c.kind == kind)
+            .group_by(counter_shards.c.entity_id)
+        ).all())
+        for entity_id in sorted(actual.keys() | stored.keys()):
+            if actual.get(entity_id, 0) != stored.get(entity_id, 0):
+                drifts.append(Drift(kind, entity_id, stored.get(entity_id, 0), actual.get(entity_id, 0)))
+    return drifts
+
+
+def repair(connection: Connection, drifts: List[Drift]):
+    """
+    Replace the shards of each drifted counter with a single shard holding a fresh count.
+
+    The count is taken in the same statement that writes it. On Postgres the
+    connection must be in a REPEATABLE READ (or stricter) transaction so the
+    delete and the recount share one snapshot; a concurrent bump then either
+    lands in both or fails the transaction, which can simply be retried.
+    Anything weaker raises ValueError before a row is touched.
+    """
+    if connection.dialect.name == "postgresql":
+        isolation_level = connection.get_isolation_level()
+        if isolation_level not in _SNAPSHOT_LEVELS:
+            raise ValueError(f"repair() needs REPEATABLE READ or SERIALIZABLE, not {isolation_level}")
+
+    for drift in drifts:
+        column, condition = _SOURCES[drift.kind]
+        connection.execute(delete(counter_shards).where(
+            counter_shards.c.kind == drift.kind, counter_shards.c.entity_id == drift.entity_id
+        ))
+        conditions = [column == drift.entity_id]
+        if condition is not None:
+            conditions.append(condition)
+        recount = (
+            select(literal(drift.kind), literal(drift.entity_id), literal(0), func.count())
+            .select_from(Comment)
+            .where(*conditions)
+            .having(func.count() > 0)
+        )
+        connection.execute(insert(counter_shards).from_select(
+            ["kind", "entity_id", "shard", "delta"], recount
+        ))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the comment and reply counters against the comments table.")
+    parser.add_argument("--repair", action="store_true", help="rewrite drifted counters to their true value")
+    args = parser.parse_args(argv)
+
+    options = {"isolation_level": "REPEATABLE READ"} if engine.dialect.name == "postgresql" else {}
+    with engine.connect().execution_options(**options) as connection:
+        with connection.begin():
+            drifts = find_drift(connection)
+            for drift in drifts:
+                print(f"{drift.kind} {drift.entity_id}: stored {drift.stored}, actual {drift.actual}")
+            if args.repair:
+                repair(connection, drifts)
+
+    print(f"{len(drifts)} drifted counter(s){', repaired' if args.repair and drifts else ''}")
+    return 1 if drifts and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
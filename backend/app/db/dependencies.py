@@ -1,10 +1,17 @@
-from app.db.session import SessionLocal
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from typing import AsyncIterator
 
-def get_db() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import session as db_session
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    if settings.DB_ASYNC:
+        async with db_session.AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = db_session.SyncSessionAdapter(db_session.SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
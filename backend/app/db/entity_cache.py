@@ -0,0 +1,131 @@
+import zlib
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.db.last_login import last_logins
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.user import User
+from app.schemas.comment import CommentSchema
+from app.schemas.post import PostSchema
+from app.schemas.user import UserSchema
+
+# Entities are cached one per key, without their relationships, so composite
+# responses such as PostWithUserSchema reuse the same cached user entry.
+# Users are cached as stored; a login not yet flushed is merged in on the way out.
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def post_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+def comment_key(comment_id: int) -> str:
+    return f"comment:{comment_id}"
+
+
+# Invalidation generations, striped over a fixed number of slots so they stay
+# bounded. A miss notes its key's generation before loading the row and only
+# fills the cache if no invalidation bumped it meanwhile: a reader that loaded
+# the row before a write committed would otherwise put the old version back
+# after the write's invalidation, to be served until CACHE_TTL_SECONDS.
+_GENERATION_SLOTS = 4096
+_generations = [0] * _GENERATION_SLOTS
+
+def _slot(key: str) -> int:
+    return zlib.crc32(key.encode()) % _GENERATION_SLOTS
+
+
+async def _read_through(key: str, load: Callable[[], Awaitable], schema) -> Optional[dict]:
+    data = await cache.get(key)
+    if data is None:
+        generation = _generations[_slot(key)]
+        row = await load()
+        if row is None:
+            return None
+        data = schema.model_validate(row).model_dump(mode="json")
+        if _generations[_slot(key)] == generation:
+            await cache.set(key, data)
+    return data
+
+
+async def get_user_data(db: AsyncSession, user_id: int) -> Optional[dict]:
+    user = await _read_through(user_key(user_id), lambda: db.get(User, user_id), UserSchema)
+    return None if user is None else last_logins.merge(user)
+
+async def get_post_data(db: AsyncSession, post_id: int) -> Optional[dict]:
+    return await _read_through(post_key(post_id), lambda: db.get(Post, post_id), PostSchema)
+
+async def get_comment_data(db: AsyncSession, comment_id: int) -> Optional[dict]:
+    return await _read_through(comment_key(comment_id), lambda: db.get(Comment, comment_id), CommentSchema)
+
+
+# Prime the cache with rows already loaded, e.g. to warm it at startup
+
+async def cache_users(users):
+    for user in users:
+        await cache.set(user_key(user.id), UserSchema.model_validate(user).model_dump(mode="json"))
+
+async def cache_posts(posts):
+    for post in posts:
+        await cache.set(post_key(post.id), PostSchema.model_validate(post).model_dump(mode="json"))
+
+
+# Version lookups return the updated_at values a representation is built from,
+# plus its counters, or None when the entity does not exist. They answer from
+# the cache when the entries are there and otherwise select only those columns,
+# so a conditional GET that ends in a 304 never loads or serializes the full row.
+
+async def get_user_version(db: AsyncSession, user_id: int) -> Optional[list]:
+    cached = await cache.get(user_key(user_id))
+    if cached is not None:
+        return [last_logins.stamp(user_id, cached["updated_at"])]
+    row = (await db.execute(select(User.updated_at).where(User.id == user_id))).first()
+    return None if row is None else [last_logins.stamp(user_id, row[0])]
+
+async def get_post_version(db: AsyncSession, post_id: int) -> Optional[list]:
+    cached = await cache.get(post_key(post_id))
+    if cached is not None:
+        user_version = await get_user_version(db, cached["user_id"])
+        return [cached["updated_at"], cached["comment_count"]] + (user_version or [None])
+    row = (await db.execute(
+        select(Post.updated_at, Post.comment_count, Post.user_id, User.updated_at)
+        .join(User, User.id == Post.user_id)
+        .where(Post.id == post_id)
+    )).first()
+    return None if row is None else [row[0], row[1], last_logins.stamp(row[2], row[3])]
+
+async def get_comment_version(db: AsyncSession, comment_id: int) -> Optional[list]:
+    cached = await cache.get(comment_key(comment_id))
+    if cached is not None:
+        user_version = await get_user_version(db, cached["user_id"])
+        return [cached["updated_at"], cached["reply_count"]] + (user_version or [None])
+    row = (await db.execute(
+        select(Comment.updated_at, Comment.reply_count, Comment.user_id, User.updated_at)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.id == comment_id)
+    )).first()
+    return None if row is None else [row[0], row[1], last_logins.stamp(row[2], row[3])]
+
+
+# Call these after the write has committed. Invalidating first would let a
+# reader refill the cache from the row before the change; invalidating after
+# still races with readers that loaded that row before the commit, which the
+# generation bump keeps from filling the cache.
+
+async def _invalidate(keys):
+    for key in keys:
+        _generations[_slot(key)] += 1
+    await cache.delete(*keys)
+
+async def invalidate_users(*user_ids: int):
+    await _invalidate([user_key(user_id) for user_id in user_ids])
+
+async def invalidate_posts(*post_ids: int):
+    await _invalidate([post_key(post_id) for post_id in post_ids])
+
+async def invalidate_comments(*comment_ids: int):
+    await _invalidate([comment_key(comment_id) for comment_id in comment_ids])
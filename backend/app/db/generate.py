@@ -0,0 +1,339 @@
+"""
+Deterministic synthetic data at production scale.
+
+    python -m app.db.generate --users 1000000 --posts 20000000 --comments 100000000 --workers 8
+
+Every table is produced in fixed-size chunks, and each chunk draws from its
+own RNG seeded with (seed, table, chunk number) and owns a precomputed id
+range, so the output depends only on the seed and the volumes, never on the
+number of workers or the order chunks finish in. Authors and commented posts
+are drawn from a power law, so a few users and posts receive most of the
+activity, and comments form reply threads up to ``max_depth`` deep.
+
+All comments of a post come from the same chunk, which lets a chunk compute
+materialized paths and counter shards on its own. Rows are written with the
+Core, bypassing the mapper events, and ids are explicit.
+
+On Postgres each worker streams its chunks through its own connection with
+COPY; elsewhere workers only generate and the parent inserts with batched
+executemany. Either way at most a couple of chunks per worker are in memory.
+"""
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from faker.providers.lorem.en_US import Provider as LoremProvider
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+
+from app.db.session import engine
+from app.models.comment import Comment, path_segment
+from app.models.counter import COMMENT_REPLIES, POST_COMMENTS, CounterShard
+from app.models.post import Post
+from app.models.user import User
+
+USER_COLUMNS = ("id", "username", "email", "password_hash", "bio", "is_active", "role", "created_at", "updated_at")
+POST_COLUMNS = ("id", "user_id", "title", "content", "visibility", "created_at", "updated_at")
+COMMENT_COLUMNS = ("id", "user_id", "post_id", "content", "parent_id", "path", "depth", "created_at", "updated_at")
+COUNTER_COLUMNS = ("kind", "entity_id", "shard", "delta")
+
+_TABLES = {
+    "users": (User.__table__, USER_COLUMNS),
+    "posts": (Post.__table__, POST_COLUMNS),
+    "comments": (Comment.__table__, COMMENT_COLUMNS),
+    "counter_shards": (CounterShard.__table__, COUNTER_COLUMNS),
+}
+
+_WORDS = LoremProvider.word_list
+_VISIBILITIES = ("PUBLIC", "PUBLIC", "PUBLIC", "FRIENDS", "PRIVATE")
+# Every generated user can log in with "password". The bcrypt hash is fixed
+# rather than computed, which keeps the output deterministic and skips a
+# deliberately slow hash per run
+_PASSWORD_HASH = "$2b$12$pfoSSQNwF7NCV5h/SZxY9uFtcju0x4.2YWeuNARAzoc6Gjvq03ywG"
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Everything a worker needs to rebuild any chunk on its own."""
+    users: int
+    posts: int
+    comments: int
+    seed: int = 0
+    chunk_size: int = 10000
+    # Probability that a comment replies to an earlier comment of its post
+    reply_ratio: float = 0.6
+    max_depth: int = 8
+    # Larger exponents concentrate activity on fewer users and posts
+    skew: float = 3.0
+    start: datetime = datetime(2021, 1, 1)
+    span: timedelta = timedelta(days=3 * 365)
+    # First id of each table, so generated rows land after existing ones
+    offsets: dict = field(default_factory=lambda: {"users": 1, "posts": 1, "comments": 1})
+
+    def chunks(self, table: str) -> int:
+        # Comments are generated alongside the post chunk they belong to
+        rows = self.users if table == "users" else self.posts
+        return math.ceil(rows / self.chunk_size)
+
+
+def _rng(plan: Plan, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{plan.seed}:{table}:{chunk}")
+
+
+def _coprime_stride(n: int) -> int:
+    stride = 2654435761 % n or 1
+    while math.gcd(stride, n) != 1:
+        stride += 1
+    return stride
+
+
+def _power_law(rng: random.Random, n: int, skew: float, stride: int) -> int:
+    """Index in [0, n) drawn from a power law, scattered so the popular ones are not all the first ids."""
+    return (int(n * rng.random() ** skew) * stride) % n
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=rng.randint(low, high))).capitalize() + "."
+
+
+def _created_at(plan: Plan, index: int, total: int) -> datetime:
+    # Ids and timestamps grow together, like rows inserted over the span
+    return plan.start + plan.span * (index / max(total, 1))
+
+
+def user_rows(plan: Plan, chunk: int) -> Iterator[tuple]:
+    rng = _rng(plan, "users", chunk)
+    first = chunk * plan.chunk_size
+    for index in range(first, min(first + plan.chunk_size, plan.users)):
+        id = plan.offsets["users"] + index
+        name = f"{rng.choice(_WORDS)}.{rng.choice(_WORDS)}{id}"
+        created_at = _created_at(plan, index, plan.users)
+        yield (
+            id, name, f"{name}@example.com", _PASSWORD_HASH,
+            _sentence(rng, 3, 12) if rng.random() < 0.7 else None,
+            True, "user", created_at, created_at,
+        )
+
+
+def post_rows(plan: Plan, chunk: int) -> Iterator[tuple]:
+    rng = _rng(plan, "posts", chunk)
+    stride = _coprime_stride(plan.users)
+    first = chunk * plan.chunk_size
+    for index in range(first, min(first + plan.chunk_size, plan.posts)):
+        created_at = _created_at(plan, index, plan.posts)
+        yield (
+            plan.offsets["posts"] + index,
+            plan.offsets["users"] + _power_law(rng, plan.users, plan.skew, stride),
+            _sentence(rng, 2, 6) if rng.random() < 0.5 else None,
+            " ".join(_sentence(rng, 5, 20) for _ in range(rng.randint(1, 4))),
+            rng.choice(_VISIBILITIES),
+            created_at, created_at,
+        )
+
+
+def _comment_range(plan: Plan, chunk: int) -> Tuple[int, int]:
+    """Comments owned by a post chunk, spread over chunks in proportion to their posts."""
+    first_post = chunk * plan.chunk_size
+    last_post = min(first_post + plan.chunk_size, plan.posts)
+    return plan.comments * first_post // plan.posts, plan.comments * last_post // plan.posts
+
+
+def comment_rows(plan: Plan, chunk: int) -> Tuple[List[tuple], List[tuple]]:
+    """Comments of one post chunk, in id order with every parent before its replies, and their counter shards."""
+    rng = _rng(plan, "comments", chunk)
+    first_post = chunk * plan.chunk_size
+    posts_in_chunk = min(first_post + plan.chunk_size, plan.posts) - first_post
+    begin, end = _comment_range(plan, chunk)
+    if begin == end:
+        return [], []
+
+    user_stride = _coprime_stride(plan.users)
+    post_stride = _coprime_stride(posts_in_chunk)
+    per_post = Counter(_power_law(rng, posts_in_chunk, plan.skew, post_stride) for _ in range(end - begin))
+
+    rows, counters = [], []
+    id = plan.offsets["comments"] + begin
+    for post_index in sorted(per_post):
+        post_id = plan.offsets["posts"] + first_post + post_index
+        created_at = _created_at(plan, first_post + post_index, plan.posts)
+        thread = []  # (id, path, depth) of the post's comments so far
+        replies = Counter()
+        for _ in range(per_post[post_index]):
+            created_at += timedelta(seconds=rng.randint(1, 3600))
+            parent = None
+            if thread and rng.random() < plan.reply_ratio:
+                # Recent comments attract most replies
+                parent = thread[-1 - int(len(thread) * rng.random() ** 2)]
+                if parent[2] >= plan.max_depth:
+                    parent = None
+            path = (parent[1] if parent else "") + path_segment(id)
+            depth = parent[2] + 1 if parent else 0
+            parent_id = parent[0] if parent else None
+            rows.append((
+                id, plan.offsets["users"] + _power_law(rng, plan.users, plan.skew, user_stride), post_id,
+                _sentence(rng, 3, 25), parent_id, path, depth, created_at, created_at,
+            ))
+            if parent_id is not None:
+                replies[parent_id] += 1
+            thread.append((id, path, depth))
+            id += 1
+        counters.append((POST_COMMENTS, post_id, 0, per_post[post_index]))
+        counters.extend((COMMENT_REPLIES, parent_id, 0, count) for parent_id, count in replies.items())
+    return rows, counters
+
+
+def chunk_rows(plan: Plan, table: str, chunk: int) -> List[Tuple[str, List[tuple]]]:
+    """Rows of one chunk as (table, rows) pairs, in the order they must be loaded."""
+    if table == "users":
+        return [("users", list(user_rows(plan, chunk)))]
+    if table == "posts":
+        return [("posts", list(post_rows(plan, chunk)))]
+    comments, counters = comment_rows(plan, chunk)
+    return [("comments", comments), ("counter_shards", counters)]
+
+
+def _copy(connection: Connection, table: str, rows: List[tuple]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    columns = ", ".join(_TABLES[table][1])
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def load(connection: Connection, batches: Iterable[Tuple[str, List[tuple]]]) -> Counter:
+    """Write (table, rows) batches with COPY on Postgres and executemany elsewhere, counting rows per table."""
+    written = Counter()
+    for table, rows in batches:
+        if not rows:
+            continue
+        if connection.dialect.name == "postgresql":
+            _copy(connection, table, rows)
+        else:
+            target, columns = _TABLES[table]
+            connection.execute(target.insert(), [dict(zip(columns, row)) for row in rows])
+        written[table] += len(rows)
+    return written
+
+
+# Worker processes keep one connection each for COPY
+_worker_engine = None
+
+def _init_worker(url: Optional[str]):
+    global _worker_engine
+    if url is not None:
+        _worker_engine = create_engine(url, poolclass=NullPool)
+
+def _run_chunk(plan: Plan, table: str, chunk: int):
+    batches = chunk_rows(plan, table, chunk)
+    if _worker_engine is None:
+        return batches
+    with _worker_engine.begin() as connection:
+        return load(connection, batches)
+
+
+def _bounded_map(pool, plan: Plan, table: str, window: int) -> Iterator:
+    """Run every chunk of a table on the pool, yielding results in order with at most `window` in flight."""
+    pending = deque()
+    for chunk in range(plan.chunks(table)):
+        pending.append(pool.apply_async(_run_chunk, (plan, table, chunk)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def id_offsets(connection: Connection) -> dict:
+    """First free id of each table, so a run can add to an existing database."""
+    return {
+        name: (connection.scalar(select(func.max(table.c.id))) or 0) + 1
+        for name, (table, _) in _TABLES.items() if name != "counter_shards"
+    }
+
+
+def reset_sequences(connection: Connection):
+    if connection.dialect.name != "postgresql":
+        return
+    for name in ("users", "posts", "comments"):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT max(id) FROM {name}))"
+        ))
+
+
+def generate(connection: Connection, plan: Plan, workers: int = 0, url: Optional[str] = None, report=None) -> dict:
+    """
+    Generate and load a plan, table by table so foreign keys are always satisfied.
+
+    With ``workers`` the chunks are built in that many processes. Passing
+    the database ``url`` makes every worker load its own chunks (Postgres
+    COPY in parallel); without it rows come back to this process and are
+    written on ``connection``. Returns the number of rows written per table,
+    counter shards included.
+    """
+    written = Counter()
+    pool = multiprocessing.get_context("spawn").Pool(workers, _init_worker, (url,)) if workers else None
+    try:
+        for table in ("users", "posts", "comments"):
+            started = time.perf_counter()
+            if pool is None:
+                results = (_run_chunk(plan, table, chunk) for chunk in range(plan.chunks(table)))
+            else:
+                results = _bounded_map(pool, plan, table, window=2 * workers)
+            for result in results:
+                # Workers that load themselves send back counts instead of rows
+                written.update(result if isinstance(result, Counter) else load(connection, result))
+            if report:
+                report(table, written[table], time.perf_counter() - started)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    reset_sequences(connection)
+    return dict(written)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic users, posts and comments.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--reply-ratio", type=float, default=0.6)
+    parser.add_argument("--max-depth", type=int, default=8)
+    args = parser.parse_args(argv)
+    if args.users < 1 or (args.comments and args.posts < 1):
+        parser.error("posts need at least one user and comments at least one post")
+
+    # Workers load in parallel over their own connections where COPY is available
+    url = engine.url.render_as_string(hide_password=False) if engine.dialect.name == "postgresql" else None
+
+    def report(table, rows, seconds):
+        print(f"{table:<9} {rows:>12,} rows in {seconds:8.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+    with engine.begin() as connection:
+        plan = Plan(
+            users=args.users, posts=args.posts, comments=args.comments, seed=args.seed,
+            chunk_size=args.chunk_size, reply_ratio=args.reply_ratio, max_depth=args.max_depth,
+            offsets=id_offsets(connection),
+        )
+    with engine.begin() as connection:
+        generate(connection, plan, workers=args.workers, url=url, report=report)
+
+
+if __name__ == "__main__":
+    main()
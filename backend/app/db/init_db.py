@@ -1,45 +1,25 @@
-from faker import Faker
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.session import engine
 from app.db.base import Base
+from app.db.generate import Plan, generate, id_offsets
 from app.models.user import User
 from app.models.post import Post
 from app.models.comment import Comment
 from app.db.session import SessionLocal
-import hashlib
-
-Base.metadata.create_all(bind=engine)
 
 def seed_data(db: Session):
-    fake = Faker()
-    
-    def generate_password_hash():
-        password = fake.password(length=12)  # Plain password
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    users = [User(username=fake.user_name(), email=fake.email(), password_hash=generate_password_hash()) for _ in range(5)]
-    db.add_all(users)
-    db.commit()
-
-    posts = []
-    for user in users:
-        for _ in range(2):
-            post = Post(content=fake.paragraph(), user_id=user.id)
-            posts.append(post)
-    db.add_all(posts)
-    db.commit()
-
-    comments = []
-    for post in posts:
-        for _ in range(3):
-            comment = Comment(content=fake.sentence(), post_id=post.id, user_id=post.user_id)
-            comments.append(comment)
-    db.add_all(comments)
+    """Add a small, deterministic sample: 5 users, 10 posts and 30 comments with replies."""
+    connection = db.connection()
+    generate(connection, Plan(users=5, posts=10, comments=30, offsets=id_offsets(connection)))
     db.commit()
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def init_db(create_schema: bool = True, seed: bool = True):
+    """Development bootstrap: create missing tables and seed the database if it is still empty."""
+    if create_schema:
+        Base.metadata.create_all(bind=engine)
 
-    db = SessionLocal()
-    seed_data(db)
-    db.close()
+    if seed:
+        with SessionLocal() as db:
+            if db.scalar(select(User.id).limit(1)) is None:
+                seed_data(db)
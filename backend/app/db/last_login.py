@@ -0,0 +1,208 @@
+"""
+Buffered last_login writes.
+
+Stamping last_login on every login used to cost an UPDATE and a commit per
+request, all landing on the hot users table. Logins now only record the
+time here; the buffer keeps the latest stamp per user and a background task
+writes them out together, every LAST_LOGIN_FLUSH_SECONDS or as soon as
+LAST_LOGIN_FLUSH_ENTRIES users are waiting, whichever comes first. On
+Postgres a flush is a single ``UPDATE users ... FROM (VALUES ...)`` per
+chunk of users, elsewhere one executemany. Whatever is still buffered is
+written when the app shuts down.
+
+Until a stamp is written, readers of this process merge it into the user
+they serve (see `merge`), so /users/me and friends show the login at once
+and their ETags change with it. Other processes see it after the flush.
+A stamp never overwrites a later one already stored, so flushes from
+several processes can land in any order.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import aclosing, suppress
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+from sqlalchemy import DateTime, Integer, bindparam, case, column, or_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dependencies import get_db
+from app.models.user import User
+
+logger = logging.getLogger("uvicorn.error")
+
+# Two parameters per row, well under the driver's limit per statement
+_CHUNK_ROWS = 1000
+
+users = User.__table__
+
+
+def _stamped(login_at):
+    # updated_at moves up to the login as `merge` shows it, rather than to the time of the flush
+    return {
+        "last_login": login_at,
+        "updated_at": case((users.c.updated_at > login_at, users.c.updated_at), else_=login_at),
+    }
+
+
+def _as_datetime(value: Union[datetime, str, None]) -> Optional[datetime]:
+    # Cached entries hold their datetimes as ISO strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def write_last_logins(db: AsyncSession, stamps: Dict[int, datetime]):
+    """Store `stamps` (user id to login time) without committing, skipping users that have a later one already."""
+    rows = sorted(stamps.items())
+    if db.bind.dialect.name == "postgresql":
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            pending = values(
+                column("id", Integer), column("last_login", DateTime), name="pending"
+            ).data(rows[start:start + _CHUNK_ROWS])
+            await db.execute(
+                update(users)
+                .where(users.c.id == pending.c.id)
+                .where(or_(users.c.last_login.is_(None), users.c.last_login < pending.c.last_login))
+                .values(**_stamped(pending.c.last_login))
+            )
+    else:
+        # SQLite has no column list on a VALUES alias; one prepared statement run per row instead
+        await db.execute(
+            update(users)
+            .where(users.c.id == bindparam("user_id"))
+            .where(or_(users.c.last_login.is_(None), users.c.last_login < bindparam("login_at")))
+            .values(**_stamped(bindparam("login_at"))),
+            [{"user_id": user_id, "login_at": login_at} for user_id, login_at in rows]
+        )
+
+
+class LastLoginBuffer:
+    """Latest unwritten login time per user id, safe to use from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, datetime] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.written = 0
+
+    def record(self, user_id: int, login_at: datetime):
+        """Buffer a login and make sure a flush is coming."""
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or login_at > current:
+                self._pending[user_id] = login_at
+            full = len(self._pending) >= settings.LAST_LOGIN_FLUSH_ENTRIES
+        self._schedule(now=full)
+
+    def pending(self, user_id: int) -> Optional[datetime]:
+        return self._pending.get(user_id)
+
+    def discard(self, user_id: int):
+        with self._lock:
+            self._pending.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def merge(self, user: dict) -> dict:
+        """
+        `user` as it will read once its pending login is written: last_login
+        set to it and updated_at moved up to it, in the type `user` holds
+        its datetimes in. Only the id is required, a sparse user gets only
+        the keys it has. Returns `user` itself when nothing is pending.
+        """
+        login_at = self._pending.get(user["id"])
+        if login_at is None:
+            return user
+        stored = _as_datetime(user.get("last_login"))
+        if stored is not None and stored >= login_at:
+            return user
+        # Cached users are full and hold ISO strings; sparse ones only come straight from rows
+        as_text = isinstance(user.get("updated_at"), str)
+        merged = dict(user)
+        if "last_login" in user:
+            merged["last_login"] = login_at.isoformat() if as_text else login_at
+        if "updated_at" in user:
+            updated_at = max(_as_datetime(user["updated_at"]), login_at)
+            merged["updated_at"] = updated_at.isoformat() if as_text else updated_at
+        return merged
+
+    def stamp(self, user_id: int, updated_at):
+        """The user's updated_at as `merge` would report it, for version lookups."""
+        login_at = self._pending.get(user_id)
+        if login_at is None or updated_at is None or _as_datetime(updated_at) >= login_at:
+            return updated_at
+        return login_at.isoformat() if isinstance(updated_at, str) else login_at
+
+    def _schedule(self, now: bool):
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._flusher = loop.create_task(self._run())
+        if now:
+            self._wake.set()
+
+    async def _run(self):
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.LAST_LOGIN_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Kept for the next round; meanwhile reads still merge them
+                logger.exception("last_login flush failed, %d stamps kept for the next one", len(self))
+
+    async def flush(self, db: Optional[AsyncSession] = None) -> int:
+        """Write every buffered stamp now, returning how many were written."""
+        with self._lock:
+            stamps = dict(self._pending)
+        if not stamps:
+            return 0
+        if db is None:
+            # Closing the generator closes the session even though we leave it early
+            async with aclosing(get_db()) as sessions:
+                async for db in sessions:
+                    await self._write(db, stamps)
+                    break
+        else:
+            await self._write(db, stamps)
+        return len(stamps)
+
+    async def _write(self, db: AsyncSession, stamps: Dict[int, datetime]):
+        # Imported here, the entity cache merges from this buffer
+        from app.db.entity_cache import invalidate_users
+
+        await write_last_logins(db, stamps)
+        await db.commit()
+        with self._lock:
+            for user_id, login_at in stamps.items():
+                # A login recorded during the write stays for the next flush
+                if self._pending.get(user_id) == login_at:
+                    del self._pending[user_id]
+            self.flushes += 1
+            self.written += len(stamps)
+        await invalidate_users(*stamps)
+
+    async def close(self):
+        """Stop the background flusher and write what is left."""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None and not flusher.done() and flusher.get_loop() is asyncio.get_running_loop():
+            flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await flusher
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("last_login flush at shutdown failed, %d stamps lost", len(self))
+
+
+last_logins = LastLoginBuffer()
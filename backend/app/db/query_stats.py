@@ -0,0 +1,75 @@
+"""
+Count and time the SQL statements issued while serving one request.
+
+Listeners on the Engine class see every cursor execution, from the sync
+engine, from the async engine (which runs them in a greenlet carrying the
+caller's context) and from test engines alike. They add to the QueryStats
+bound to the current context, so only work done inside `track_queries()`
+is counted; the threadpool copies the context, which shares the same
+QueryStats object with the request that scheduled the work.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Statements executed within one tracked scope, safe to update from any thread."""
+
+    def __init__(self, keep_statements: bool = False):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            if self.statements is not None:
+                self.statements.append(statement)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False) -> Iterator[QueryStats]:
+    """Collect the statements executed in this context until the block exits."""
+    stats = QueryStats(keep_statements)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
@@ -0,0 +1,86 @@
+import re
+from typing import Optional, Sequence
+
+from sqlalchemy import Float, String, cast, func, literal, literal_column, null, or_, select, table, tuple_, union_all
+
+from app.models.comment import Comment
+from app.models.post import Post, VisibilityType
+from app.models.search import SEARCH_CONFIG, fts_table
+
+POST = "post"
+COMMENT = "comment"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# bm25 weight of each FTS5 column, in the order they were indexed
+_FTS_WEIGHTS = {POST: (10.0, 1.0), COMMENT: (1.0,)}
+
+
+def fts_query(q: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching documents that contain every word.
+
+    Each word is quoted, so operators and stray punctuation in user input are
+    searched for literally instead of failing to parse. None when there is no
+    word to search for.
+    """
+    words = _WORD.findall(q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+def visible_to(viewer_id: Optional[int]):
+    """Posts anyone may see, plus every post of the viewer."""
+    condition = Post.visibility == VisibilityType.PUBLIC
+    if viewer_id is not None:
+        condition = or_(condition, Post.user_id == viewer_id)
+    return condition
+
+
+def _match(dialect: str, kind: str, q: str):
+    """(source, score, condition) matching `q` against one full-text index; ascending score sorts best first."""
+    model = Post if kind == POST else Comment
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+        vector = literal_column(f"{model.__tablename__}.search_vector")
+        return model.__table__, -cast(func.ts_rank(vector, query), Float), vector.op("@@")(query)
+
+    fts = fts_table(model.__tablename__)
+    index = literal_column(fts)
+    source = table(fts).join(model.__table__, model.id == literal_column(f"{fts}.rowid"))
+    score = func.bm25(index, *(literal(weight, Float) for weight in _FTS_WEIGHTS[kind]))
+    return source, score, index.op("MATCH")(q)
+
+
+def search_statement(dialect: str, q: str, viewer_id: Optional[int], kinds: Sequence[str], after: Optional[list], limit: int):
+    """
+    One ranked page of posts and comments matching `q`, best match first, or None if `q` has nothing to search for.
+
+    Each kind is matched through its own full-text index and the branches are
+    merged with UNION ALL. Pages are cut on (score, kind, id), so `after` is the
+    key of the last hit of the previous page and the next page seeks past it.
+    Comments are only returned when their post is visible to the viewer.
+    """
+    if dialect != "postgresql":
+        q = fts_query(q)
+        if q is None:
+            return None
+
+    branches = []
+    for kind in kinds:
+        source, score, match = _match(dialect, kind, q)
+        if kind == POST:
+            columns = (Post.id, Post.id.label("post_id"), Post.user_id, Post.title, Post.content, Post.created_at)
+        else:
+            source = source.join(Post.__table__, Post.id == Comment.post_id)
+            columns = (Comment.id, Comment.post_id, Comment.user_id, null().label("title"), Comment.content, Comment.created_at)
+        branches.append(
+            select(literal_column(f"'{kind}'", String).label("kind"), *columns, score.label("score"))
+            .select_from(source)
+            .where(match, visible_to(viewer_id))
+        )
+
+    hits = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("hits")
+    statement = select(hits)
+    if after is not None:
+        statement = statement.where(tuple_(hits.c.score, hits.c.kind, hits.c.id) > tuple_(*after))
+    return statement.order_by(hits.c.score, hits.c.kind, hits.c.id).limit(limit + 1)
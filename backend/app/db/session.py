@@ -1,11 +1,147 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
 from app.db.base import Base
+from app.db.pool import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool
+from app.db.slow_queries import slow_queries
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://fastapi:fastapi@db:5432/facebook_clone")
+DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL, future=True)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def async_database_url(url: str) -> str:
+    """Swap the sync DBAPI in a database URL for its asyncio counterpart."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def pool_options(url: str, poolclass) -> dict:
+    """Engine keyword arguments for the configured, instrumented connection pool."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives and dies with a single connection
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, future=True, **pool_options(DATABASE_URL, InstrumentedQueuePool))
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    **pool_options(DATABASE_URL, InstrumentedAsyncAdaptedQueuePool),
+)
+
+# Objects stay usable after commit; handlers refresh explicitly when they need to
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if settings.SLOW_QUERY_MS > 0:
+    slow_queries.watch(engine)
+    slow_queries.watch(async_engine)
+
+
+class SyncSessionAdapter:
+    """
+    Expose a sync Session through the subset of the AsyncSession API used by
+    the route handlers, running every database call on the threadpool.
+
+    This keeps a single async implementation of each handler while still
+    allowing the psycopg2 engine to serve requests when DB_ASYNC is off.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expire(self, instance, attribute_names=None):
+        self.sync_session.expire(instance, attribute_names)
+
+    async def execute(self, statement, params=None, execution_options=None, **kw):
+        # Buffer rows like AsyncSession does so results never touch the
+        # connection again from the event loop thread
+        options = dict(execution_options or {}, prebuffer_rows=True)
+        return await run_in_threadpool(
+            self.sync_session.execute, statement, params, execution_options=options, **kw
+        )
+
+    async def stream(self, statement, params=None, execution_options=None, **kw):
+        # Unbuffered, so rows come off the cursor only as the caller asks for them
+        options = dict(execution_options or {}, stream_results=True)
+        result = await run_in_threadpool(
+            self.sync_session.execute, statement, params, execution_options=options, **kw
+        )
+        return SyncStreamedResult(result)
+
+    async def scalar(self, statement, params=None, **kw):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kw)
+
+    async def scalars(self, statement, params=None, **kw):
+        result = await self.execute(statement, params, **kw)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kw):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kw):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kw)
+
+
+class SyncStreamedResult:
+    """The part of AsyncResult that streaming readers use, over a sync Result read on the threadpool."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size=None):
+        partitions = self._result.partitions(size)
+        while True:
+            partition = await run_in_threadpool(next, partitions, None)
+            if partition is None:
+                return
+            yield partition
+
+    async def close(self):
+        await run_in_threadpool(self._result.close)
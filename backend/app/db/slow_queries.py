@@ -0,0 +1,230 @@
+"""
+Slow-query log: statements over SLOW_QUERY_MS, grouped by fingerprint, with a plan.
+
+Each statement that crosses the threshold is normalized (literals and bind
+placeholders become `?`, IN lists collapse) and fingerprinted, so the same
+query with different values lands on one entry. The first time a fingerprint
+is seen it is logged with its parameters and its plan is captured off the
+request path, on a separate connection. Parameters of statements that touch
+a secret column (users.password_hash) are never kept or logged.
+
+- Postgres: EXPLAIN (ANALYZE, BUFFERS) for SELECTs, which runs the query once
+  more inside a transaction that is rolled back; a plain EXPLAIN for writes so
+  they are never executed twice.
+- SQLite: EXPLAIN QUERY PLAN.
+
+Entries live in a bounded in-memory ring, least recently seen evicted first,
+and are read through /internal/slow-queries.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import List, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"(?:%\([^)]+\)s|%s|\$\d+|\?)(?:::\w+(?:\[\])?)?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_SECRET = re.compile(r"\bpassword_hash\b", re.IGNORECASE)
+
+# Execution option marking the log's own EXPLAIN connections, which are never timed
+_SKIP = "slow_query_log_skip"
+
+
+def normalize(statement: str) -> str:
+    """Strip the values out of a statement so every execution of one query reads the same."""
+    statement = _STRING.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _LIST.sub("(?, ...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def explain_statement(dialect: str, statement: str) -> Optional[str]:
+    if dialect == "postgresql":
+        analyze = statement.lstrip().upper().startswith("SELECT")
+        return ("EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN ") + statement
+    if dialect == "sqlite":
+        return "EXPLAIN QUERY PLAN " + statement
+    return None
+
+
+def _describe(statement: str, parameters, limit: int = 500) -> str:
+    if _SECRET.search(statement):
+        return "[redacted]"
+    if isinstance(parameters, list):
+        # executemany: show the first row and how many followed it
+        text = f"{parameters[0]!r} (+{len(parameters) - 1} more rows)" if parameters else "[]"
+    else:
+        text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    sql: str
+    parameters: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: float = 0.0
+    plan: Optional[List[str]] = None
+
+    def as_dict(self) -> dict:
+        entry = asdict(self)
+        entry["mean_ms"] = round(self.total_ms / self.count, 2) if self.count else 0.0
+        entry["total_ms"] = round(self.total_ms, 2)
+        entry["max_ms"] = round(self.max_ms, 2)
+        return entry
+
+
+class SlowQueryLog:
+    """Aggregates of slow statements by fingerprint, safe to update from any thread."""
+
+    def __init__(self, threshold_ms: float, capacity: int, explain: bool = True):
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self.explain = explain
+        self.evictions = 0
+        self._entries: "OrderedDict[str, SlowQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._pending = set()
+
+    def record(self, statement: str, parameters, seconds: float) -> Optional[SlowQuery]:
+        """Add one execution, returning the entry if its fingerprint was not being tracked yet."""
+        milliseconds = seconds * 1000
+        if milliseconds < self.threshold_ms:
+            return None
+        sql = normalize(statement)
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            new = entry is None
+            if new:
+                entry = self._entries[key] = SlowQuery(key, sql, _describe(statement, parameters))
+                if len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(key)
+            entry.count += 1
+            entry.total_ms += milliseconds
+            entry.max_ms = max(entry.max_ms, milliseconds)
+            entry.last_seen = time.time()
+        if new:
+            logger.warning(json.dumps({
+                "event": "slow_query", "fingerprint": key, "ms": round(milliseconds, 2),
+                "sql": sql, "parameters": entry.parameters,
+            }))
+        return entry if new else None
+
+    def _attach_plan(self, key: str, plan: List[str]):
+        with self._lock:
+            if key in self._entries:
+                self._entries[key].plan = plan
+        logger.warning(json.dumps({"event": "slow_query_plan", "fingerprint": key, "plan": plan}))
+
+    def entries(self) -> List[dict]:
+        with self._lock:
+            entries = [entry.as_dict() for entry in self._entries.values()]
+        return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.evictions = 0
+
+    async def wait_for_plans(self):
+        """Wait for the EXPLAINs already scheduled to finish."""
+        pending = list(self._pending)
+        await asyncio.gather(*(
+            asyncio.wrap_future(job) if not isinstance(job, asyncio.Future) else job for job in pending
+        ), return_exceptions=True)
+
+    def _track(self, job):
+        self._pending.add(job)
+        job.add_done_callback(self._pending.discard)
+
+    def _explain_sync(self, engine: Engine, key: str, statement: str, parameters):
+        try:
+            with engine.connect().execution_options(**{_SKIP: True}) as connection:
+                rows = connection.exec_driver_sql(statement, parameters).all()
+            self._attach_plan(key, [str(row[-1]) for row in rows])
+        except Exception as e:
+            self._attach_plan(key, [f"EXPLAIN failed: {e}"])
+
+    async def _explain_async(self, engine: AsyncEngine, key: str, statement: str, parameters):
+        try:
+            async with engine.connect() as connection:
+                connection = await connection.execution_options(**{_SKIP: True})
+                rows = (await connection.exec_driver_sql(statement, parameters)).all()
+            self._attach_plan(key, [str(row[-1]) for row in rows])
+        except Exception as e:
+            self._attach_plan(key, [f"EXPLAIN failed: {e}"])
+
+    def _schedule_explain(self, engine: Union[Engine, AsyncEngine], entry: SlowQuery, statement: str, parameters):
+        explain = explain_statement(engine.dialect.name, statement)
+        if explain is None:
+            return
+        if isinstance(parameters, list):
+            parameters = parameters[0] if parameters else ()
+        if isinstance(engine, AsyncEngine):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._track(loop.create_task(self._explain_async(engine, entry.fingerprint, explain, parameters)))
+        else:
+            self._track(self._explainer.submit(self._explain_sync, engine, entry.fingerprint, explain, parameters))
+
+    def watch(self, engine: Union[Engine, AsyncEngine]):
+        """Time every statement run through `engine`, explaining new slow ones on a side connection."""
+        sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_started", []).append(perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def stop_timer(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.get("slow_query_started")
+            if not started:
+                return
+            seconds = perf_counter() - started.pop()
+            if conn.get_execution_options().get(_SKIP):
+                return
+            entry = self.record(statement, parameters, seconds)
+            if entry is not None and self.explain:
+                self._schedule_explain(engine, entry, statement, parameters)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def discard_timer(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("slow_query_started"):
+                connection.info["slow_query_started"].pop()
+
+
+slow_queries = SlowQueryLog(settings.SLOW_QUERY_MS, settings.SLOW_QUERY_ENTRIES, settings.SLOW_QUERY_EXPLAIN)
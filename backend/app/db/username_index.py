@@ -0,0 +1,171 @@
+"""
+In-memory prefix index over active usernames, for mention and friend-picker completion.
+
+Usernames are kept lowercased in one sorted array, so a completion is a
+bisect to the first candidate followed by a short scan: no allocation per
+entry and no database round trip. The index is built during startup, as the
+timed `username_index` phase; if that build fails, the first completion
+request schedules another in the background, and until one finishes
+completions are served from the database.
+
+The user routes of this process keep the index current. Writes made by
+other processes are picked up two ways: a prefix with no match at all asks
+the database (a prefix LIKE on lower(username), served by a text_pattern_ops
+index on Postgres) and folds what it finds back in, and the whole index is
+rebuilt once it is older than USERNAME_INDEX_TTL_SECONDS, which drops users
+renamed, deactivated or deleted elsewhere.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from contextlib import aclosing
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dependencies import get_db
+from app.models.user import User
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def fold(username: str) -> str:
+    return username.lower()
+
+
+class UsernameIndex:
+    """Sorted (lowercased username, id) pairs with the display username of each id, safe to use from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, int]] = []
+        self._names: Dict[int, str] = {}
+        self.ready = False
+        self.loaded_at = 0.0
+        self._rebuild: Optional[asyncio.Task] = None
+
+    def load(self, users: Iterable[Tuple[int, str]]):
+        """Replace the index with `users` as (id, username) pairs and start serving lookups from it."""
+        names = dict(users)
+        keys = sorted((fold(username), id) for id, username in names.items())
+        with self._lock:
+            self._keys, self._names = keys, names
+            self.ready = True
+            self.loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._names = [], {}
+            self.ready = False
+            self.loaded_at = 0.0
+
+    def stale(self, ttl: float) -> bool:
+        return not self.ready or time.monotonic() - self.loaded_at > ttl
+
+    def schedule_rebuild(self):
+        """Rebuild the index in a background task unless one is already running."""
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.get_running_loop().create_task(_rebuild())
+
+    def _remove(self, id: int):
+        username = self._names.pop(id, None)
+        if username is not None:
+            key = (fold(username), id)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def add(self, id: int, username: str):
+        """Insert or rename a user."""
+        with self._lock:
+            if self._names.get(id) == username:
+                return
+            self._remove(id)
+            self._names[id] = username
+            insort(self._keys, (fold(username), id))
+
+    def remove(self, id: int):
+        with self._lock:
+            self._remove(id)
+
+    def complete(self, prefix: str, limit: int) -> Optional[List[Tuple[int, str]]]:
+        """Up to `limit` (id, username) pairs starting with `prefix`, case-insensitively and in order, None until loaded."""
+        if not self.ready:
+            return None
+        prefix = fold(prefix)
+        matches = []
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(matches) < limit:
+                key, id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                matches.append((id, self._names[id]))
+                position += 1
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+username_index = UsernameIndex()
+
+
+def _like_prefix(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+async def query_usernames(db: AsyncSession, prefix: str, limit: int) -> List[Tuple[int, str]]:
+    """Active users whose lowercased username starts with `prefix`, straight from the database."""
+    rows = await db.execute(
+        select(User.id, User.username)
+        .where(User.is_active.is_not(False), func.lower(User.username).like(_like_prefix(prefix.lower()), escape="\\"))
+        .order_by(func.lower(User.username), User.id)
+        .limit(limit)
+    )
+    return [(row.id, row.username) for row in rows.all()]
+
+
+async def complete_username(db: AsyncSession, prefix: str, limit: int) -> List[Tuple[int, str]]:
+    """Completions from the index, or from the database while it is not loaded or has no match."""
+    if not settings.USERNAME_INDEX:
+        return await query_usernames(db, prefix, limit)
+
+    matches = username_index.complete(prefix, limit)
+    if not matches:
+        matches = await query_usernames(db, prefix, limit)
+        if username_index.ready:
+            for id, username in matches:
+                username_index.add(id, username)
+    # Scheduled after this request is done with its session, never alongside it
+    if username_index.stale(settings.USERNAME_INDEX_TTL_SECONDS):
+        username_index.schedule_rebuild()
+    return matches
+
+
+async def load_username_index(db: AsyncSession) -> int:
+    """Build the index from every active user, returning how many were loaded."""
+    rows = await db.execute(select(User.id, User.username).where(User.is_active.is_not(False)))
+    username_index.load((row.id, row.username) for row in rows.all())
+    return len(username_index)
+
+
+async def build_username_index() -> Optional[int]:
+    """Build the index on a session of its own, returning its size, or None if the build failed."""
+    try:
+        # Closing the generator closes the session even though we leave it early
+        async with aclosing(get_db()) as sessions:
+            async for db in sessions:
+                return await load_username_index(db)
+    except Exception:
+        logger.exception("username index build failed, completions keep using the database")
+    return None
+
+
+async def _rebuild():
+    await build_username_index()
@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import aclosing
+
+from sqlalchemy import select, text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.dependencies import get_db
+from app.db.entity_cache import cache_posts, cache_users
+from app.db.session import async_engine, engine
+from app.models.post import Post
+from app.models.user import User
+
+
+def _warm_sync_pool(size: int):
+    connections = [engine.connect() for _ in range(size)]
+    try:
+        for connection in connections:
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def warm_pool(size: int) -> int:
+    """
+    Open `size` connections on the engine serving requests and return them to the pool.
+
+    They are all held at once so the pool really ends up with that many idle
+    connections; the count is capped at DB_POOL_SIZE since overflow
+    connections are discarded as soon as they are returned.
+    """
+    size = min(size, settings.DB_POOL_SIZE)
+    if not settings.DB_ASYNC:
+        await run_in_threadpool(_warm_sync_pool, size)
+        return size
+
+    connections = await asyncio.gather(*(async_engine.connect() for _ in range(size)))
+    try:
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in connections))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections))
+    return size
+
+
+async def warm_cache(posts: int) -> int:
+    """Cache the newest `posts` posts and their authors with two queries, returning how many entries were set."""
+    # Closing the generator closes the session even though we leave it early
+    async with aclosing(get_db()) as sessions:
+        async for db in sessions:
+            recent = (await db.scalars(
+                select(Post).order_by(Post.created_at.desc(), Post.id.desc()).limit(posts)
+            )).all()
+            authors = (await db.scalars(
+                select(User).where(User.id.in_({post.user_id for post in recent}))
+            )).all() if recent else []
+            await cache_posts(recent)
+            await cache_users(authors)
+            return len(recent) + len(authors)
@@ -1,17 +1,62 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+from anyio import to_thread
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.db.init_db import init_db
-from app.api.v1.routes import user, post, comment
-
-app = FastAPI(title="Facebook Clone API", version="1.0.0")
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.images import thumbnailer
+from app.core.metrics import MetricsMiddleware, render, request_metrics
+from app.core.query_timing import QueryTimingMiddleware
+from app.core.security import HashingPoolFull, hashing_pool
+from app.core.startup import startup
+from app.db.last_login import last_logins
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine
+from app.db.username_index import build_username_index
+from app.db.warmup import warm_cache, warm_pool
+from app.api.v1.routes import user, post, comment, internal, search, image
 
-# Erase init_db() once real user data is used
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    yield
-    # Shutdown: Could add cleanup code here
+    with startup.phase("threadpool"):
+        # Size the threadpool from the connection pool so sync work can't outgrow it
+        to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+    # Engines are disposed however startup or shutdown ends, so no pooled connection keeps the process alive
+    try:
+        if settings.DB_CREATE_SCHEMA or settings.DB_SEED:
+            with startup.phase("init_db"):
+                # Development only, imported here so production never loads Faker or the generator
+                from app.db.init_db import init_db
+                init_db(create_schema=settings.DB_CREATE_SCHEMA, seed=settings.DB_SEED)
+
+        if settings.WARM_POOL_CONNECTIONS:
+            with startup.phase("warm_pool"):
+                await warm_pool(settings.WARM_POOL_CONNECTIONS)
+
+        if settings.WARM_CACHE_POSTS:
+            with startup.phase("warm_cache"):
+                await warm_cache(settings.WARM_CACHE_POSTS)
+
+        if settings.USERNAME_INDEX:
+            with startup.phase("username_index"):
+                # Not fatal: until a rebuild succeeds, completions are served from the database
+                await build_username_index()
+
+        startup.ready()
+        yield
+    finally:
+        # Buffered logins go out while the engines can still write them
+        await last_logins.close()
+        await async_engine.dispose()
+        engine.dispose()
+        hashing_pool.shutdown()
+        await thumbnailer.shutdown()
 
 app = FastAPI(
     title="Facebook Clone API", 
@@ -25,12 +70,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.QUERY_STATS:
+    app.add_middleware(QueryTimingMiddleware)
+if settings.METRICS_ENABLED:
+    # Added last so it is outermost and times the other middleware too
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(user.router, prefix="/api/v1", tags=["users"])
 app.include_router(post.router, prefix="/api/v1", tags=["posts"])
 app.include_router(comment.router, prefix="/api/v1", tags=["comments"])
+app.include_router(search.router, prefix="/api/v1", tags=["search"])
+app.include_router(image.router, prefix="/api/v1", tags=["images"])
+app.include_router(internal.router, prefix="/api/v1", tags=["internal"])
+
+@app.exception_handler(HashingPoolFull)
+async def hashing_pool_full(request: Request, exc: HashingPoolFull):
+    # Shed the request now rather than let it wait behind a queue of bcrypt hashes
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many password checks in progress, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to Facebook Clone API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    pools = {"async": pool_status(async_engine.sync_engine.pool), "sync": pool_status(engine.pool)}
+    return PlainTextResponse(
+        render(request_metrics, pools, cache.stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+startup.record("import", time.perf_counter() - _import_started)
@@ -1,7 +1,27 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, case, event, func, literal, select
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 from app.db.base import Base
+from app.models.counter import COMMENT_REPLIES, POST_COMMENTS, bump_counter, counter_column, drop_counter
+from app.models.search import searchable
+
+# Materialized paths are the zero-padded ids of every ancestor followed by the
+# comment's own id. Fixed-width digit segments sort the same under any collation,
+# so a whole subtree is the contiguous range [path, path_upper_bound(path)).
+PATH_SEGMENT_WIDTH = 10
+
+def path_segment(comment_id: int) -> str:
+    return str(comment_id).zfill(PATH_SEGMENT_WIDTH)
+
+def path_upper_bound(path: str) -> str:
+    """Smallest path that sorts after every descendant of `path`."""
+    return str(int(path) + 1).zfill(len(path))
+
+def path_ancestor_ids(path: str) -> list:
+    """Ids of every ancestor encoded in `path`, root first."""
+    return [int(path[i:i + PATH_SEGMENT_WIDTH]) for i in range(0, len(path) - PATH_SEGMENT_WIDTH, PATH_SEGMENT_WIDTH)]
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -13,6 +33,11 @@ class Comment(Base):
         Integer, 
         ForeignKey("comments.id", ondelete="SET NULL"), 
         nullable=True)
+    # Maintained by the mapper events below, never set these by hand
+    path = Column(String, nullable=True, index=True)
+    depth = Column(Integer, nullable=False, default=0)
+    # Direct replies, summed from counter_shards and maintained by the events below
+    reply_count = counter_column(COMMENT_REPLIES, id)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -33,4 +58,115 @@ class Comment(Base):
         cascade="all, save-update, merge, refresh-expire", 
         foreign_keys=[parent_id],
         passive_deletes=True
-    )
\ No newline at end of file
+    )
+
+    # Composite indexes backing keyset pagination on (created_at, id)
+    # and single-query loading of a post's thread and a comment's replies in display order
+    __table_args__ = (
+        Index("ix_comments_created_at_id", "created_at", "id"),
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_comments_parent_id_created_at_id", "parent_id", "created_at", "id"),
+    )
+
+
+# Full-text index over content, see app/models/search.py
+searchable(
+    Comment.__table__,
+    "to_tsvector('english', content)",
+    ("content",),
+)
+
+# Path maintenance runs on the flush's own connection, so the tree is kept
+# consistent in the same transaction as the insert, move or delete. Core-level
+# bulk writes bypass these events and must maintain path/depth themselves.
+comments = Comment.__table__
+
+def _position(connection, comment_id):
+    """Return the (path, depth) stored for a comment, ("", -1) for no comment."""
+    if comment_id is None:
+        return "", -1
+    row = connection.execute(
+        select(comments.c.path, comments.c.depth).where(comments.c.id == comment_id)
+    ).first()
+    return (row.path, row.depth) if row else ("", -1)
+
+@event.listens_for(Comment, "after_insert")
+def _assign_path(mapper, connection, target):
+    parent_path, parent_depth = _position(connection, target.parent_id)
+    path = parent_path + path_segment(target.id)
+    depth = parent_depth + 1
+    connection.execute(
+        comments.update()
+        .where(comments.c.id == target.id)
+        .values(path=path, depth=depth, updated_at=target.updated_at)
+    )
+    set_committed_value(target, "path", path)
+    set_committed_value(target, "depth", depth)
+
+@event.listens_for(Comment, "after_update")
+def _move_subtree(mapper, connection, target):
+    if not sa_inspect(target).attrs.parent_id.history.has_changes():
+        return
+
+    old_path, old_depth = _position(connection, target.id)
+    parent_path, parent_depth = _position(connection, target.parent_id)
+    if parent_path.startswith(old_path):
+        raise ValueError("A comment cannot be moved under itself or one of its replies")
+
+    new_path = parent_path + path_segment(target.id)
+    connection.execute(
+        comments.update()
+        .where(comments.c.path >= old_path, comments.c.path < path_upper_bound(old_path))
+        .values(
+            path=literal(new_path, String) + func.substr(comments.c.path, len(old_path) + 1),
+            depth=comments.c.depth + (parent_depth + 1 - old_depth),
+        )
+    )
+    set_committed_value(target, "path", new_path)
+    set_committed_value(target, "depth", parent_depth + 1)
+
+@event.listens_for(Comment, "before_delete")
+def _promote_replies(mapper, connection, target):
+    # Replies of a deleted comment become top-level comments, matching the
+    # ON DELETE SET NULL foreign key, and their subtrees are re-rooted with them
+    path, depth = _position(connection, target.id)
+    if not path:
+        return
+    connection.execute(
+        comments.update()
+        .where(comments.c.path > path, comments.c.path < path_upper_bound(path))
+        .values(
+            path=func.substr(comments.c.path, len(path) + 1),
+            depth=comments.c.depth - (depth + 1),
+            parent_id=case((comments.c.parent_id == target.id, None), else_=comments.c.parent_id),
+        )
+    )
+
+# Counters are bumped in the same flush as the write, so they commit or roll
+# back with it. Bulk writes bypass these events and must bump them themselves.
+@event.listens_for(Comment, "after_insert")
+def _count_insert(mapper, connection, target):
+    bump_counter(connection, POST_COMMENTS, target.post_id, 1)
+    if target.parent_id is not None:
+        bump_counter(connection, COMMENT_REPLIES, target.parent_id, 1)
+
+@event.listens_for(Comment, "before_update")
+def _count_move(mapper, connection, target):
+    if not sa_inspect(target).attrs.parent_id.history.has_changes():
+        return
+    # Read the stored parent, the attribute history is empty if it was never loaded
+    old_parent_id = connection.scalar(select(comments.c.parent_id).where(comments.c.id == target.id))
+    if old_parent_id == target.parent_id:
+        return
+    if old_parent_id is not None:
+        bump_counter(connection, COMMENT_REPLIES, old_parent_id, -1)
+    if target.parent_id is not None:
+        bump_counter(connection, COMMENT_REPLIES, target.parent_id, 1)
+
+@event.listens_for(Comment, "before_delete")
+def _count_delete(mapper, connection, target):
+    bump_counter(connection, POST_COMMENTS, target.post_id, -1)
+    if target.parent_id is not None:
+        bump_counter(connection, COMMENT_REPLIES, target.parent_id, -1)
+    # Its replies are promoted to top-level, so the comment no longer has any
+    drop_counter(connection, COMMENT_REPLIES, target.id)
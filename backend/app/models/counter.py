@@ -0,0 +1,63 @@
+import random
+
+from sqlalchemy import Column, Integer, String, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import column_property
+
+from app.core.config import settings
+from app.db.base import Base
+
+# Counter kinds, one per denormalized count
+POST_COMMENTS = "post_comments"
+COMMENT_REPLIES = "comment_replies"
+
+class CounterShard(Base):
+    """
+    One slice of a denormalized counter.
+
+    A count is the sum of the deltas of all shards of an (kind, entity_id)
+    pair. Writers add to a random shard, so concurrent comments on the same
+    post upsert different rows instead of queueing on one row lock.
+    """
+    __tablename__ = "counter_shards"
+    kind = Column(String, primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    delta = Column(Integer, nullable=False, default=0)
+
+
+counter_shards = CounterShard.__table__
+
+_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+def counter_column(kind: str, entity_id_column):
+    """Read-only mapped attribute summing the shards of a counter, loaded with the row."""
+    return column_property(
+        select(func.coalesce(func.sum(counter_shards.c.delta), 0))
+        .where(counter_shards.c.kind == kind, counter_shards.c.entity_id == entity_id_column)
+        .correlate_except(counter_shards)
+        .scalar_subquery()
+    )
+
+def bump_counter(connection, kind: str, entity_id: int, delta: int):
+    """Add `delta` to a random shard of a counter, on the caller's connection and transaction."""
+    insert = _INSERTS[connection.dialect.name]
+    statement = insert(counter_shards).values(
+        kind=kind,
+        entity_id=entity_id,
+        shard=random.randrange(settings.COUNTER_SHARDS),
+        delta=delta,
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[counter_shards.c.kind, counter_shards.c.entity_id, counter_shards.c.shard],
+        set_={"delta": counter_shards.c.delta + statement.excluded.delta},
+    ))
+
+def drop_counter(connection, kind: str, entity_id: int):
+    connection.execute(
+        delete(counter_shards).where(counter_shards.c.kind == kind, counter_shards.c.entity_id == entity_id)
+    )
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from app.db.base import Base
+from app.models.counter import POST_COMMENTS, counter_column, drop_counter
+from app.models.search import searchable
 
 class VisibilityType(str, enum.Enum):
     PUBLIC = "public"
@@ -19,5 +21,24 @@ class Post(Base):
     visibility = Column(Enum(VisibilityType), default=VisibilityType.PUBLIC)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Summed from counter_shards, maintained by the Comment mapper events
+    comment_count = counter_column(POST_COMMENTS, id)
 
-    user = relationship("User", backref="posts")
\ No newline at end of file
+    user = relationship("User", backref="posts")
+
+    # Composite indexes backing keyset pagination on (created_at, id)
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+# Full-text index over title (weighted higher) and content, see app/models/search.py
+searchable(
+    Post.__table__,
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', content), 'B')",
+    ("title", "content"),
+)
+
+@event.listens_for(Post, "after_delete")
+def _drop_comment_count(mapper, connection, target):
+    drop_counter(connection, POST_COMMENTS, target.id)
@@ -0,0 +1,54 @@
+from sqlalchemy import DDL, Table, event
+
+# Full-text indexes live outside the mapped columns because their types only
+# exist on one backend. They are created with their table by create_all and by
+# the add_full_text_search migration, and the database itself keeps them in
+# step with every insert, update and delete, bulk writes and COPY included:
+#
+# - Postgres: a generated tsvector column `search_vector` with a GIN index.
+# - SQLite: an external-content FTS5 table `<table>_fts` kept current by triggers.
+
+SEARCH_CONFIG = "english"
+
+
+def fts_table(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def searchable(table: Table, vector: str, columns: tuple):
+    """
+    Attach the full-text index DDL to `table`.
+
+    `vector` is the Postgres tsvector expression over the row's columns and
+    `columns` the text columns copied into the SQLite FTS5 index, in the order
+    their bm25 weights are given at query time.
+    """
+    name = table.name
+    fts = fts_table(name)
+    listed = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    postgres = [
+        f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{name}_search_vector ON {name} USING gin (search_vector)",
+    ]
+    sqlite = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({listed}, content='{name}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {name} BEGIN "
+        f"INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {name} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {listed} ON {name} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values}); END",
+        # Index whatever the table already holds
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+    for statement in postgres:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in sqlite:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    # The triggers go with the table, the FTS5 table has to be dropped with it
+    event.listen(table, "after_drop", DDL(f"DROP TABLE IF EXISTS {fts}").execute_if(dialect="sqlite"))
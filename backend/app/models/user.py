@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, func
 from datetime import datetime
 from app.db.base import Base
 
@@ -16,4 +16,14 @@ class User(Base):
     role = Column(String, default="user")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    
\ No newline at end of file
+
+    # Composite index backing keyset pagination on (created_at, id), and a
+    # pattern-ops index so case-insensitive prefix LIKEs on Postgres can seek
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_users_username_lower_pattern",
+            func.lower(username).label("username_lower"),
+            postgresql_ops={"username_lower": "text_pattern_ops"},
+        ),
+    )
@@ -1,3 +1,8 @@
 from app.schemas.user import UserSchema, UserCreate, UserUpdate, UserInDB
 from app.schemas.post import PostSchema, PostCreate, PostUpdate, PostWithUserSchema, VisibilityType
-from app.schemas.comment import CommentSchema, CommentCreate, CommentUpdate, CommentWithUserSchema, CommentWithRepliesSchema
\ No newline at end of file
+from app.schemas.comment import CommentSchema, CommentCreate, CommentUpdate, CommentWithUserSchema, CommentWithRepliesSchema
+from app.schemas.pagination import Page
+from app.schemas.bulk import BulkItemError, BulkResult
+from app.schemas.search import SearchHit
+from app.schemas.token import Token
+from app.schemas.image import ImageSchema
\ No newline at end of file
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+class BulkItemError(BaseModel):
+    # Position of the rejected item in the submitted batch
+    index: int
+    detail: str
+
+class BulkResult(BaseModel, Generic[T]):
+    # Created rows, in the order their items were submitted
+    created: List[T]
+    errors: List[BulkItemError]
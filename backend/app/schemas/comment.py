@@ -12,10 +12,14 @@ class CommentCreate(CommentBase):
 
 class CommentUpdate(BaseModel):
     content: Optional[str] = None
+    # Send null to turn a reply into a top-level comment
+    parent_id: Optional[int] = None
 
 class CommentSchema(CommentBase):
     id: int
     user_id: int
+    depth: int = 0
+    reply_count: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -28,6 +32,9 @@ class CommentWithUserSchema(CommentSchema):
 
 class CommentWithRepliesSchema(CommentSchema):
     replies: List["CommentWithRepliesSchema"] = Field(default_factory=list)
+    # Replies left out by max_depth/replies_per_node, fetch them via /comments/{id}/replies
+    remaining_replies: int = 0
+    replies_cursor: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
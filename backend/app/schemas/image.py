@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Dict
+
+class ImageSchema(BaseModel):
+    # sha256 of the bytes, which is also the file's name
+    hash: str
+    url: str
+    content_type: str
+    size: int
+    # Keyed by the longest side in pixels; each URL serves the original until its thumbnail is made
+    thumbnails: Dict[int, str]
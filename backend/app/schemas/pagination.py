@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    # Opaque cursor for the next page, None once the last page is reached
+    next_cursor: Optional[str] = None
@@ -26,6 +26,7 @@ class PostUpdate(BaseModel):
 class PostSchema(PostBase):
     id: int
     user_id: int
+    comment_count: int = 0
     created_at: datetime
     updated_at: datetime
 
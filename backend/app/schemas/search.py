@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+
+class SearchHit(BaseModel):
+    type: Literal["post", "comment"]
+    id: int
+    # The post itself for post hits, the post commented on for comment hits
+    post_id: int
+    user_id: int
+    title: Optional[str] = None
+    content: str
+    created_at: datetime
+    # Relevance, higher is better; only meaningful relative to other hits of the same search
+    rank: float
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    # Seconds until the token stops being accepted
+    expires_in: int
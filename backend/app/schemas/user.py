@@ -33,6 +33,10 @@ class UserInDB(UserBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class UsernameMatch(BaseModel):
+    id: int
+    username: str
+
 class UserSchema(UserBase):
     id: int
     last_login: Optional[datetime] = None
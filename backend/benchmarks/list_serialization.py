@@ -0,0 +1,123 @@
+"""
+Rows/sec of the two list-endpoint read paths, ORM + pydantic vs Core rows + direct JSON.
+
+Both paths page through the same SQLite table with the production keyset
+query, and every page is rendered to the bytes the route would send. The
+ORM path goes through the same validate/serialize/JSONResponse steps
+FastAPI applies to a ``response_model``; the bodies are checked to be
+identical before anything is timed.
+
+    cd backend && python -m benchmarks.list_serialization --rows 20000 --limit 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.fast_json import fast_page, orjson
+from app.api.v1.pagination import PageParams, paginate
+from app.db.base import Base
+from app.models.comment import Comment
+from app.models.post import Post, VisibilityType
+from app.models.user import User
+from app.schemas.comment import CommentSchema
+from app.schemas.pagination import Page
+from app.schemas.post import PostSchema
+from app.schemas.user import UserSchema
+
+
+async def seed(engine, rows: int):
+    base = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x",
+             "bio": f"Bio of user {i}", "role": "user", "is_active": True,
+             "created_at": base + timedelta(seconds=i), "updated_at": base + timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+        await conn.execute(insert(Post), [
+            {"user_id": i % rows + 1, "title": f"Post {i}", "content": "Lorem ipsum dolor sit amet " * 4,
+             "visibility": VisibilityType.PUBLIC, "created_at": base + timedelta(seconds=i),
+             "updated_at": base + timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+        await conn.execute(insert(Comment), [
+            {"user_id": i % rows + 1, "post_id": i % rows + 1, "content": f"Comment {i}",
+             "path": f"{i + 1:010d}", "depth": 0, "created_at": base + timedelta(seconds=i),
+             "updated_at": base + timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+
+
+async def orm_page(db, model, schema, params):
+    adapter = TypeAdapter(Page[schema])
+    payload = await paginate(db, select(model), model, params)
+    value = adapter.validate_python(payload, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+async def core_page(db, model, schema, params):
+    return (await fast_page(db, model, schema, params)).body
+
+
+async def walk(session_factory, render, model, schema, limit: int) -> list:
+    bodies = []
+    cursor = None
+    while True:
+        async with session_factory() as db:
+            body = await render(db, model, schema, PageParams(cursor=cursor, limit=limit))
+        bodies.append(body)
+        cursor = json.loads(body)["next_cursor"]
+        if cursor is None:
+            return bodies
+
+
+async def main(rows: int, limit: int, repeat: int):
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    await seed(engine, rows)
+
+    def session_factory():
+        return AsyncSession(engine, expire_on_commit=False)
+
+    print(f"{rows} rows, pages of {limit}, best of {repeat}, encoder: {'orjson' if orjson else 'json'}")
+    for model, schema in ((Post, PostSchema), (User, UserSchema), (Comment, CommentSchema)):
+        assert await walk(session_factory, orm_page, model, schema, limit) == \
+            await walk(session_factory, core_page, model, schema, limit), f"{model.__name__} bodies differ"
+
+        results = {}
+        for name, render in (("orm+pydantic", orm_page), ("core+json", core_page)):
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await walk(session_factory, render, model, schema, limit)
+                best = min(best, time.perf_counter() - started)
+            results[name] = rows / best
+        speedup = results["core+json"] / results["orm+pydantic"]
+        print(
+            f"{model.__tablename__:<9} orm+pydantic {results['orm+pydantic']:>10,.0f} rows/s   "
+            f"core+json {results['core+json']:>10,.0f} rows/s   x{speedup:.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat))
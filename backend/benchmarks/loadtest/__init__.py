@@ -0,0 +1,9 @@
+"""
+End-to-end HTTP load test: boot the app on a generated dataset, drive a mixed
+workload through an async client and report per-route latency percentiles.
+
+    cd backend && python -m benchmarks.loadtest --boot --duration 30 --out result.json
+    python -m benchmarks.loadtest --url http://localhost:8000 --baseline baseline.json
+
+See ``python -m benchmarks.loadtest --help`` for dataset, mix and gate options.
+"""
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import nullcontext
+
+import httpx
+
+from benchmarks.loadtest.scenarios import MIX, Traffic, id_ranges, parse_mix, picker
+from benchmarks.loadtest.server import boot, prepare_dataset
+from benchmarks.loadtest.stats import Recorder, compare
+
+
+async def run(base_url: str, concurrency: int, duration: float, warmup: float, mix: dict, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        max_user_id, max_post_id = await id_ranges(client)
+
+        async def virtual_user(number: int, recorder: Recorder, until: float):
+            rng = random.Random(f"{seed}:{number}")
+            traffic = Traffic(client, recorder, rng, max_user_id, max_post_id)
+            pick = picker(rng, mix)
+            while time.perf_counter() < until:
+                await pick(traffic)
+
+        async def phase(seconds: float) -> Recorder:
+            recorder = Recorder()
+            until = time.perf_counter() + seconds
+            await asyncio.gather(*(virtual_user(i, recorder, until) for i in range(concurrency)))
+            return recorder
+
+        if warmup:
+            await phase(warmup)
+        started = time.perf_counter()
+        recorder = await phase(duration)
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(elapsed, meta={
+        "base_url": base_url, "concurrency": concurrency, "seed": seed, "mix": mix,
+        "max_user_id": max_user_id, "max_post_id": max_post_id,
+    })
+
+
+def print_report(result: dict):
+    print(f"{'route':<32} {'req':>8} {'err':>5} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    rows = list(result["routes"].items()) + [("total", result["total"])]
+    for route, s in rows:
+        print(f"{route:<32} {s['requests']:>8} {s['errors']:>5} {s['rps']:>9.1f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mixed-traffic HTTP load test with per-route latency percentiles.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of an already running app")
+    target.add_argument("--boot", action="store_true", help="generate a dataset and boot the app under uvicorn")
+    parser.add_argument("--database-url", default="sqlite:///./loadtest.db", help="dataset location for --boot")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--comments", type=int, default=500000)
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=",".join(f"{name}={weight}" for name, weight in MIX.items()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON result here")
+    parser.add_argument("--baseline", help="JSON result to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown as a fraction")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.boot:
+        prepare_dataset(args.database_url, args.users, args.posts, args.comments, args.seed, os.cpu_count())
+        server = boot(args.database_url, workers=args.uvicorn_workers)
+    else:
+        server = nullcontext(args.url)
+
+    with server as base_url:
+        result = asyncio.run(run(base_url, args.concurrency, args.duration, args.warmup, mix, args.seed))
+
+    print_report(result)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regression beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import random
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+
+import httpx
+
+from benchmarks.loadtest.stats import Recorder
+
+API = "/api/v1"
+# Pages a scrolling client reads before starting over from the top
+SCROLL_DEPTH = 5
+# Every generated user's password
+PASSWORD = "password"
+
+
+class Traffic:
+    """
+    One virtual user's view of the workload: a seeded RNG plus the id ranges to draw from.
+
+    Ids are drawn with a power-law skew toward the newest rows, so a small
+    set of hot posts and users takes most of the traffic, as in production.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                 max_user_id: int, max_post_id: int, skew: float = 2.0):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.max_user_id = max_user_id
+        self.max_post_id = max_post_id
+        self.skew = skew
+        self.token = None
+        self._usernames: Dict[int, str] = {}
+
+    def _hot(self, max_id: int) -> int:
+        return max(1, max_id - int(max_id * self.rng.random() ** self.skew))
+
+    async def request(self, route: str, method: str, url: str, **kw) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kw)
+        except httpx.HTTPError:
+            self.recorder.record(route, time.perf_counter() - started, ok=False)
+            return None
+        # A 404 on a generated id is the dataset's gap, not a server error
+        self.recorder.record(route, time.perf_counter() - started, ok=response.status_code < 500)
+        return response
+
+    async def read_post(self):
+        await self.request("GET /posts/{post_id}", "GET", f"{API}/posts/{self._hot(self.max_post_id)}")
+
+    async def read_thread(self):
+        await self.request(
+            "GET /posts/{post_id}/comments", "GET", f"{API}/posts/{self._hot(self.max_post_id)}/comments",
+            params={"max_depth": 2, "replies_per_node": 10},
+        )
+
+    async def scroll_posts(self):
+        params = {"limit": 20}
+        for _ in range(self.rng.randint(1, SCROLL_DEPTH)):
+            response = await self.request("GET /posts", "GET", f"{API}/posts", params=params)
+            if response is None or response.status_code != 200:
+                return
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                return
+            params = {"limit": 20, "cursor": cursor}
+
+    async def _username(self, user_id: int) -> str:
+        # Looked up once per user and left out of the numbers, it is setup rather than traffic
+        if user_id not in self._usernames:
+            response = await self.client.get(f"{API}/users/{user_id}")
+            self._usernames[user_id] = response.json()["username"] if response.status_code == 200 else None
+        return self._usernames[user_id]
+
+    async def create_comment(self):
+        if self.token is None:
+            await self.login()
+            if self.token is None:
+                return
+        await self.request(
+            "POST /comments", "POST", f"{API}/comments",
+            headers={"Authorization": f"Bearer {self.token}"},
+            json={"content": "Load test comment", "post_id": self._hot(self.max_post_id)},
+        )
+
+    async def login(self):
+        username = await self._username(self._hot(self.max_user_id))
+        if username is None:
+            return
+        response = await self.request(
+            "POST /users/login", "POST", f"{API}/users/login", data={"username": username, "password": PASSWORD}
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+
+# Scenario name -> relative weight in the mix
+MIX: Dict[str, int] = {
+    "read_post": 30,
+    "read_thread": 20,
+    "scroll_posts": 20,
+    "create_comment": 15,
+    "login": 15,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse "read_post=30,login=5" into a mix, rejecting unknown scenarios and bad weights."""
+    mix = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in MIX:
+            raise ValueError(f"Unknown scenario {name!r}, expected one of {', '.join(MIX)}")
+        if not weight.isdigit():
+            raise ValueError(f"Weight of {name!r} must be a non-negative integer, got {weight!r}")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("At least one scenario needs a weight above zero")
+    return mix
+
+
+def picker(rng: random.Random, mix: Dict[str, int]) -> Callable[[Traffic], Awaitable]:
+    weighted = [(name, weight) for name, weight in mix.items() if weight > 0]
+    if not weighted:
+        raise ValueError("At least one scenario needs a weight above zero")
+    names, weights = zip(*weighted)
+    def pick(traffic: Traffic) -> Awaitable:
+        return getattr(traffic, rng.choices(names, weights)[0])()
+    return pick
+
+
+async def id_ranges(client: httpx.AsyncClient) -> Tuple[int, int]:
+    """Newest user and post ids, read through the API so any dataset works."""
+    users = (await client.get(f"{API}/users", params={"limit": 1})).json()["items"]
+    posts = (await client.get(f"{API}/posts", params={"limit": 1})).json()["items"]
+    if not users or not posts:
+        raise RuntimeError("The target has no users or posts, generate a dataset first")
+    return users[0]["id"], posts[0]["id"]
@@ -0,0 +1,86 @@
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+from sqlalchemy import create_engine, func, inspect, select
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+
+def prepare_dataset(url: str, users: int, posts: int, comments: int, seed: int, workers: int):
+    """Create the schema and load a generated dataset, unless the database already holds one."""
+    from app.db.base import Base
+    from app.db.generate import Plan, generate, id_offsets
+    from app.models.user import User
+
+    engine = create_engine(url)
+    try:
+        if inspect(engine).has_table("users"):
+            with engine.connect() as connection:
+                existing = connection.scalar(select(func.count()).select_from(User.__table__))
+            if existing:
+                print(f"reusing dataset with {existing:,} users at {engine.url.render_as_string()}")
+                return
+
+        Base.metadata.create_all(engine)
+        plan_url = url if engine.dialect.name == "postgresql" else None
+        with engine.begin() as connection:
+            plan = Plan(users=users, posts=posts, comments=comments, seed=seed, offsets=id_offsets(connection))
+            generate(connection, plan, workers=workers, url=plan_url,
+                     report=lambda table, rows, seconds: print(f"generated {rows:,} {table} in {seconds:.1f}s"))
+    finally:
+        engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def boot(database_url: str, workers: int = 1, timeout: float = 60.0, env: dict = None) -> Iterator[str]:
+    """
+    Run the app under uvicorn in production mode and yield its base URL once it is ready.
+
+    Readiness is the first successful response from the root route; uvicorn
+    only serves requests once the lifespan (warm-up included) has completed.
+    /internal/startup would say the same but is for admins only.
+    """
+    port = _free_port()
+    process_env = dict(os.environ, APP_ENV="production", DATABASE_URL=database_url, **(env or {}))
+    # Production refuses to sign tokens without a key; every worker has to share it
+    process_env.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND, env=process_env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode} during startup")
+            try:
+                if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"app not ready after {timeout:.0f}s")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,75 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Latencies and error counts per route label, e.g. "GET /posts/{post_id}"."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.latencies[route].append(seconds * 1000)
+        if not ok:
+            self.errors[route] += 1
+
+    def _summary(self, values: List[float], errors: int, duration: float) -> dict:
+        values = sorted(values)
+        summary = {
+            "requests": len(values),
+            "errors": errors,
+            "rps": round(len(values) / duration, 2),
+            "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        }
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(percentile(values, p), 3)
+        return summary
+
+    def report(self, duration: float, meta: Optional[dict] = None) -> dict:
+        every = [value for values in self.latencies.values() for value in values]
+        return {
+            "meta": dict(meta or {}, duration_s=round(duration, 2)),
+            "total": self._summary(every, sum(self.errors.values()), duration),
+            "routes": {
+                route: self._summary(values, self.errors[route], duration)
+                for route, values in sorted(self.latencies.items())
+            },
+        }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    List every regression of `result` against `baseline`.
+
+    A route regresses when one of its percentiles is more than `tolerance`
+    (a fraction) slower, its throughput is more than `tolerance` lower, or
+    it starts returning errors. A baseline route with no results at all
+    regresses too; routes new in `result` have nothing to compare against.
+    """
+    regressions = []
+    for route, base in baseline.get("routes", {}).items():
+        current = result["routes"].get(route)
+        if current is None:
+            regressions.append(f"{route} missing, {base['requests']} requests in the baseline")
+            continue
+        for p in PERCENTILES:
+            key = f"p{p}_ms"
+            if base[key] and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{route} {key} {base[key]:.1f} -> {current[key]:.1f}")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{route} rps {base['rps']:.1f} -> {current['rps']:.1f}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{route} errors {base['errors']} -> {current['errors']}")
+    return regressions
@@ -0,0 +1,131 @@
+"""
+Signup and login throughput with bcrypt on the bounded hashing pool, at several pool sizes.
+
+For each pool size the app is driven in-process over ASGI by a fixed number
+of concurrent clients: first every client signs up new users for the given
+duration, then every client logs in as the users just created. Reported per
+phase are accepted requests per second, the median and p99 latency of those,
+and how many requests were shed with a 503 because the pool's waiting line
+was full. The same SQLite file backs every run, so the numbers differ only
+in how hashing is scheduled.
+
+    cd backend && python -m benchmarks.password_hashing --pool-sizes 1,2,4,8 --concurrency 32 --duration 5
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+parser.add_argument("--pool-sizes", default="1,2,4,8", help="comma-separated hashing worker counts")
+parser.add_argument("--queue", type=int, default=64, help="hashes allowed to wait for a worker")
+parser.add_argument("--concurrency", type=int, default=32, help="clients sending requests at once")
+parser.add_argument("--duration", type=float, default=5.0, help="seconds per phase")
+parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+args = parser.parse_args()
+
+database = os.path.join(tempfile.mkdtemp(), "hashing.db")
+os.environ.update({
+    "APP_ENV": "production",
+    "DATABASE_URL": f"sqlite:///{database}",
+    "JWT_SECRET_KEY": "benchmark",
+    "BCRYPT_ROUNDS": str(args.rounds),
+    # Only hashing should set the pace
+    "QUERY_STATS": "false",
+    "SLOW_QUERY_MS": "0",
+    "METRICS_ENABLED": "false",
+    "USERNAME_INDEX": "false",
+})
+
+import httpx
+
+from app.core import security
+from app.db.base import Base
+from app.db.session import async_engine, engine
+from app.main import app
+
+names = itertools.count()
+
+
+async def phase(client: httpx.AsyncClient, request, duration: float) -> dict:
+    latencies, shed, failed = [], 0, 0
+    until = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal shed, failed
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            response = await request(client)
+            if response.status_code == 503:
+                shed += 1
+            elif response.status_code >= 400:
+                failed += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "shed": shed,
+        "failed": failed,
+    }
+
+
+async def run(workers: int) -> dict:
+    security.hashing_pool = security.HashingPool(workers, args.queue)
+    created = []
+
+    async def signup(client):
+        name = f"bench{next(names)}"
+        response = await client.post("/api/v1/users", json={
+            "username": name, "email": f"{name}@example.com", "password": "password",
+        })
+        if response.status_code == 201:
+            created.append(name)
+        return response
+
+    logins = itertools.count()
+
+    async def login(client):
+        name = created[next(logins) % len(created)]
+        return await client.post("/api/v1/users/login", data={"username": name, "password": "password"})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        result = {"signup": await phase(client, signup, args.duration)}
+        result["login"] = await phase(client, login, args.duration) if created else None
+    security.hashing_pool.shutdown()
+    return result
+
+
+async def run_all() -> list:
+    # One event loop for every run, the async engine's connections belong to it
+    try:
+        return [(int(n), await run(int(n))) for n in args.pool_sizes.split(",")]
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    Base.metadata.create_all(engine)
+    print(f"bcrypt cost {args.rounds}, {args.concurrency} concurrent clients, waiting line of {args.queue}")
+    print(f"{'workers':>7}  {'phase':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'503s':>6}")
+    for workers, result in asyncio.run(run_all()):
+        for name in ("signup", "login"):
+            stats = result[name]
+            if stats is None:
+                continue
+            print(f"{workers:>7}  {name:<6} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                  f"{stats['p99_ms']:>8.1f} {stats['shed']:>6}")
+
+
+if __name__ == "__main__":
+    main()
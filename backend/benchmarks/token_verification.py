@@ -0,0 +1,69 @@
+"""
+Cost of authenticating a request from its bearer token.
+
+Three measurements, per request:
+
+- a full python-jose signature check, what every request would pay without
+  the verified-token cache;
+- ``decode_access_token`` on a token it has already verified, what a
+  session pays from its second request on;
+- ``decode_access_token`` over more distinct tokens than the cache holds,
+  the worst case where every lookup misses.
+
+For scale, the users-table lookup the claims replace is timed on SQLite.
+
+    cd backend && python -m benchmarks.token_verification --calls 20000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from jose import jwt
+from sqlalchemy import create_engine, insert, select
+
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token, verified_tokens
+from app.db.base import Base
+from app.models.user import User
+
+
+def per_call_us(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    token = create_access_token(1, "user", True)
+    key, algorithms = settings.JWT_SECRET_KEY, [settings.JWT_ALGORITHM]
+    print(f"jose.jwt.decode:                {per_call_us(lambda i: jwt.decode(token, key, algorithms=algorithms), args.calls):8.2f} µs")
+
+    verified_tokens.clear()
+    decode_access_token(token)
+    print(f"decode_access_token, cached:    {per_call_us(lambda i: decode_access_token(token), args.calls):8.2f} µs")
+
+    # Twice the cache size, cycled, so every lookup misses and evicts
+    tokens = [create_access_token(i, "user", True) for i in range(2 * max(verified_tokens.max_entries, 1))]
+    print(f"decode_access_token, missing:   {per_call_us(lambda i: decode_access_token(tokens[i % len(tokens)]), args.calls):8.2f} µs")
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+            for i in range(1, 1001)
+        ])
+    lookup = select(User.id, User.role, User.is_active).where(User.id == 1)
+    with engine.connect() as connection:
+        print(f"users lookup by id (SQLite):    {per_call_us(lambda i: connection.execute(lookup).one(), args.calls):8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
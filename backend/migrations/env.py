@@ -15,6 +15,7 @@ from app.db.base import Base
 from app.models.user import User
 from app.models.post import Post
 from app.models.comment import Comment
+from app.models.counter import CounterShard
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,48 @@
+"""add_comment_materialized_path
+
+Revision ID: 9b4f6a2d8c15
+Revises: 7e2b4d91c3a6
+Create Date: 2025-05-19 22:31:08.764402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f6a2d8c15'
+down_revision: Union[str, None] = '7e2b4d91c3a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('comments', sa.Column('path', sa.String(), nullable=True))
+    op.add_column('comments', sa.Column('depth', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill one level at a time: roots first, then every comment whose
+    # parent already has a path, until no row is left to update
+    conn = op.get_bind()
+    conn.execute(sa.text(
+        "UPDATE comments SET path = lpad(id::text, 10, '0'), depth = 0 "
+        "WHERE parent_id IS NULL"
+    ))
+    while True:
+        result = conn.execute(sa.text(
+            "UPDATE comments AS c "
+            "SET path = p.path || lpad(c.id::text, 10, '0'), depth = p.depth + 1 "
+            "FROM comments AS p "
+            "WHERE c.parent_id = p.id AND c.path IS NULL AND p.path IS NOT NULL"
+        ))
+        if result.rowcount == 0:
+            break
+
+    op.create_index(op.f('ix_comments_path'), 'comments', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_comments_path'), table_name='comments')
+    op.drop_column('comments', 'depth')
+    op.drop_column('comments', 'path')
@@ -0,0 +1,45 @@
+"""add_counter_shards
+
+Revision ID: c3e8a1f45b70
+Revises: 9b4f6a2d8c15
+Create Date: 2025-05-21 09:12:40.318925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f45b70'
+down_revision: Union[str, None] = '9b4f6a2d8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'counter_shards',
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'entity_id', 'shard'),
+    )
+
+    # Backfill every existing count into shard 0
+    conn = op.get_bind()
+    conn.execute(sa.text(
+        "INSERT INTO counter_shards (kind, entity_id, shard, delta) "
+        "SELECT 'post_comments', post_id, 0, count(*) FROM comments GROUP BY post_id"
+    ))
+    conn.execute(sa.text(
+        "INSERT INTO counter_shards (kind, entity_id, shard, delta) "
+        "SELECT 'comment_replies', parent_id, 0, count(*) FROM comments "
+        "WHERE parent_id IS NOT NULL GROUP BY parent_id"
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('counter_shards')
@@ -0,0 +1,71 @@
+"""add_full_text_search
+
+Revision ID: e5b9d3a27c18
+Revises: c3e8a1f45b70
+Create Date: 2025-05-27 14:36:02.551904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d3a27c18'
+down_revision: Union[str, None] = 'c3e8a1f45b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (Postgres tsvector expression, columns indexed by SQLite FTS5)
+SEARCHABLE = {
+    'posts': (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', content), 'B')",
+        ('title', 'content'),
+    ),
+    'comments': ("to_tsvector('english', content)", ('content',)),
+}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table, (vector, columns) in SEARCHABLE.items():
+        if dialect == 'postgresql':
+            # Filling the generated column rewrites the table once; Postgres keeps it current from then on
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+        elif dialect == 'sqlite':
+            fts = f"{table}_fts"
+            listed = ", ".join(columns)
+            new_values = ", ".join(f"new.{column}" for column in columns)
+            old_values = ", ".join(f"old.{column}" for column in columns)
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({listed}, content='{table}', content_rowid='id')")
+            op.execute(
+                f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {listed} ON {table} BEGIN "
+                f"INSERT INTO {fts} ({fts}, rowid, {listed}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts} (rowid, {listed}) VALUES (new.id, {new_values}); END"
+            )
+            op.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table in SEARCHABLE:
+        if dialect == 'postgresql':
+            op.execute(f"DROP INDEX ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+        elif dialect == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER {table}_fts_{trigger}")
+            op.execute(f"DROP TABLE {table}_fts")
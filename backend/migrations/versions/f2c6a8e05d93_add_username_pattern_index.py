@@ -0,0 +1,32 @@
+"""add_username_pattern_index
+
+Revision ID: f2c6a8e05d93
+Revises: e5b9d3a27c18
+Create Date: 2025-05-29 11:08:47.730162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a8e05d93'
+down_revision: Union[str, None] = 'e5b9d3a27c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # text_pattern_ops lets lower(username) LIKE 'prefix%' seek the index under any collation
+    op.create_index(
+        'ix_users_username_lower_pattern',
+        'users',
+        [sa.text('lower(username) text_pattern_ops' if op.get_bind().dialect.name == 'postgresql' else 'lower(username)')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_username_lower_pattern', table_name='users')
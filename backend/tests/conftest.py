@@ -1,13 +1,27 @@
+import asyncio
+import os
 import pytest
-from sqlalchemy import create_engine, text
+# The cheapest bcrypt cost, read when app.core.security is imported below
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 
+from app.core.cache import cache
+from app.core.security import create_access_token, verified_tokens
 from app.db.base import Base
 from app.main import app
 from app.db.dependencies import get_db
+from app.db.session import SyncSessionAdapter
+from app.db import username_index as username_index_module
+from app.db.username_index import username_index
+from app.db import last_login as last_login_module
+from app.api.v1 import export as export_module
+from app.db.last_login import last_logins
 from app.models.user import User
 from app.models.post import Post, VisibilityType
 from app.models.comment import Comment
@@ -35,6 +49,15 @@ def override_lifespan():
     # Restore original lifespan (if needed for cleanup)
     app.router.lifespan_context = original_lifespan
 
+# Ids restart for every test database, so cached entities must not leak between tests
+@pytest.fixture(scope="function", autouse=True)
+def clear_cache():
+    asyncio.run(cache.clear())
+    username_index.clear()
+    verified_tokens.clear()
+    last_logins.clear()
+    yield
+
 @pytest.fixture(scope="function")
 def test_engine():
     engine = create_engine(
@@ -61,18 +84,70 @@ def test_db(test_engine):
         db.close()
 
 @pytest.fixture(scope="function")
-def client(test_db):
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            pass
+def client(test_db, monkeypatch):
+    async def override_get_db():
+        # Routes use the AsyncSession API, served here by the sync test session
+        yield SyncSessionAdapter(test_db)
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Index rebuilds, last_login flushes and exports open their own session outside dependency injection
+    monkeypatch.setattr(username_index_module, "get_db", override_get_db)
+    monkeypatch.setattr(last_login_module, "get_db", override_get_db)
+    monkeypatch.setattr(export_module, "get_db", override_get_db)
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def async_client(test_engine, monkeypatch):
+    """Client whose requests go through a real AsyncSession on the aiosqlite driver."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(username_index_module, "get_db", override_get_db)
+    monkeypatch.setattr(last_login_module, "get_db", override_get_db)
+    monkeypatch.setattr(export_module, "get_db", override_get_db)
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
 
+@pytest.fixture(scope="function")
+def count_queries():
+    """Context manager collecting every statement executed, on any engine, inside the block."""
+    @contextmanager
+    def count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+    return count
+
+@pytest.fixture(scope="function")
+def assert_max_queries(count_queries):
+    """Context manager failing the test when the block runs more than `limit` statements."""
+    @contextmanager
+    def assert_max(limit):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries, expected at most {limit}:" + "".join(f"\n  {s}" for s in statements)
+        )
+    return assert_max
+
 @pytest.fixture(scope="function")
 def test_user(test_db):
     user = User(
@@ -88,6 +163,22 @@ def test_user(test_db):
     test_db.refresh(user)
     return user
 
+@pytest.fixture(scope="function")
+def token_headers():
+    """Authorization headers carrying a token for the given user id and role."""
+    def headers(user_id, role="user", is_active=True, expires_in=None):
+        return {"Authorization": f"Bearer {create_access_token(user_id, role, is_active, expires_in)}"}
+    return headers
+
+@pytest.fixture(scope="function")
+def auth_headers(test_user, token_headers):
+    return token_headers(test_user.id, test_user.role)
+
+@pytest.fixture(scope="function")
+def admin_headers(token_headers):
+    # Admin rights come from the claims alone, no matching row is needed
+    return token_headers(0, "admin")
+
 @pytest.fixture(scope="function")
 def test_post(test_db, test_user):
     post = Post(
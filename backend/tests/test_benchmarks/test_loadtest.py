@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from benchmarks.loadtest.scenarios import MIX, parse_mix, picker
+from benchmarks.loadtest.stats import Recorder, compare, percentile
+
+
+def test_percentile_is_nearest_rank():
+    """Test that percentiles pick an observed value by nearest rank."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7.0], 95) == 7
+    assert percentile([], 50) == 0.0
+
+def test_recorder_report_per_route_and_total():
+    """Test that the report summarises each route and all of them together."""
+    recorder = Recorder()
+    for ms in (10, 20, 30, 40):
+        recorder.record("GET /posts", ms / 1000, ok=True)
+    recorder.record("POST /comments", 0.1, ok=False)
+
+    report = recorder.report(2.0, meta={"seed": 1})
+    assert report["meta"] == {"seed": 1, "duration_s": 2.0}
+    posts = report["routes"]["GET /posts"]
+    assert posts["requests"] == 4 and posts["errors"] == 0
+    assert posts["rps"] == 2.0
+    assert posts["mean_ms"] == 25.0
+    assert posts["p50_ms"] == 20.0 and posts["p99_ms"] == 40.0
+    assert report["routes"]["POST /comments"]["errors"] == 1
+    assert report["total"]["requests"] == 5 and report["total"]["errors"] == 1
+
+def _result(**routes):
+    recorder = Recorder()
+    for route, (ms, count, errors) in routes.items():
+        for i in range(count):
+            recorder.record(route, ms / 1000, ok=i >= errors)
+    return recorder.report(1.0)
+
+def test_compare_flags_slowdowns_errors_and_missing_routes():
+    """Test that slower, failing or vanished routes regress while noise within tolerance does not."""
+    baseline = _result(**{"GET /posts": (10, 10, 0), "GET /users": (10, 10, 0), "POST /comments": (10, 10, 0)})
+    assert compare(baseline, baseline, 0.2) == []
+
+    result = _result(**{"GET /posts": (11, 10, 0), "GET /users": (20, 10, 2), "GET /new": (5, 10, 0)})
+    regressions = compare(result, baseline, 0.2)
+    assert not [r for r in regressions if r.startswith("GET /posts") or r.startswith("GET /new")]
+    assert "GET /users p50_ms 10.0 -> 20.0" in regressions
+    assert "GET /users errors 0 -> 2" in regressions
+    # A scenario that stopped producing results is a regression, not a pass
+    assert "POST /comments missing, 10 requests in the baseline" in regressions
+
+def test_parse_mix():
+    """Test that mixes parse and unknown scenarios or unusable weights are rejected."""
+    assert parse_mix("read_post=30,login=0,") == {"read_post": 30, "login": 0}
+    for spec in ("posting=1", "read_post=-1", "read_post=x", "read_post=0,login=0", ""):
+        with pytest.raises(ValueError):
+            parse_mix(spec)
+
+def test_picker_follows_weights():
+    """Test that scenarios are drawn by weight, zero-weight ones never, and an empty mix is refused."""
+    class Traffic:
+        def __getattr__(self, name):
+            return lambda: name
+
+    pick = picker(random.Random(0), {"read_post": 3, "login": 1, "read_thread": 0})
+    drawn = Counter(pick(Traffic()) for _ in range(4000))
+    assert set(drawn) == {"read_post", "login"}
+    assert 2.5 < drawn["read_post"] / drawn["login"] < 3.5
+
+    with pytest.raises(ValueError):
+        picker(random.Random(0), dict.fromkeys(MIX, 0))
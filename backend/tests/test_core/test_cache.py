@@ -0,0 +1,71 @@
+import pytest
+from app.core.cache import MemoryCache
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss():
+    """Test that stored values are returned and counted as hits."""
+    cache = MemoryCache(max_entries=10, ttl=60)
+    assert await cache.get("user:1") is None
+    await cache.set("user:1", {"id": 1})
+    assert await cache.get("user:1") == {"id": 1}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted when the cache is full."""
+    cache = MemoryCache(max_entries=2, ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_cache_ttl_expiry():
+    """Test that entries are dropped once their TTL has passed."""
+    cache = MemoryCache(max_entries=10, ttl=60)
+    await cache.set("a", 1, ttl=0)
+    assert await cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_cache_delete_and_clear():
+    """Test explicit invalidation."""
+    cache = MemoryCache(max_entries=10, ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.delete("a", "missing")
+    assert await cache.get("a") is None
+    await cache.clear()
+    assert await cache.get("b") is None
+
+@pytest.mark.asyncio
+async def test_read_through_does_not_refill_with_a_row_invalidated_while_loading(test_post):
+    """Test that a miss which loaded a row before a write's invalidation leaves the cache empty."""
+    from app.core.cache import cache
+    from app.db.entity_cache import get_post_data, invalidate_posts, post_key
+
+    class Session:
+        async def get(self, model, id):
+            # The write commits and invalidates while this reader holds the old row
+            await invalidate_posts(id)
+            return test_post
+
+    assert (await get_post_data(Session(), test_post.id))["id"] == test_post.id
+    assert await cache.get(post_key(test_post.id)) is None
+
+    class Quiet:
+        async def get(self, model, id):
+            return test_post
+
+    await get_post_data(Quiet(), test_post.id)
+    assert await cache.get(post_key(test_post.id)) is not None
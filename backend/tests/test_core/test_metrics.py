@@ -0,0 +1,60 @@
+import re
+import threading
+
+import pytest
+
+from app.core.metrics import BUCKETS, RequestMetrics, render
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if labels else "") + r" (\S+)"
+    match = re.search("^" + pattern + "$", text, re.MULTILINE)
+    assert match, f"{name} {labels} not in metrics"
+    return float(match.group(1))
+
+
+def test_histogram_buckets_and_thread_shards():
+    """Test that observations from several threads merge into cumulative le buckets."""
+    metrics = RequestMetrics()
+
+    def observe(seconds):
+        for _ in range(100):
+            metrics.started()
+            metrics.finished("GET", "/items/{id}", seconds, error=seconds > 1)
+
+    threads = [threading.Thread(target=observe, args=(seconds,)) for seconds in (0.004, 0.05, 3.0, 20.0)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = render(metrics, {}, {})
+    labels = {"method": "GET", "route": "/items/{id}"}
+    assert _sample(text, "http_requests_total", **labels) == 400
+    assert _sample(text, "http_request_errors_total", **labels) == 200
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le=0.005) == 100
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le=0.05) == 200
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le=BUCKETS[-1]) == 300
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="+Inf") == 400
+    assert _sample(text, "http_request_duration_seconds_sum", **labels) == pytest.approx(
+        sum(s * 100 for s in (0.004, 0.05, 3.0, 20.0)))
+    assert _sample(text, "http_requests_in_flight") == 0
+
+def test_metrics_endpoint(client, test_post):
+    """Test that /metrics reports routes by template, errors, pool gauges and cache stats."""
+    client.get(f"/api/v1/posts/{test_post.id}")
+    client.get(f"/api/v1/posts/{test_post.id}")
+    client.get("/no/such/page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert _sample(text, "http_requests_total", method="GET", route="/api/v1/posts/{post_id}") >= 2
+    assert _sample(text, "http_requests_total", method="GET", route="unmatched") >= 1
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert _sample(text, "db_pool_checkouts_total", engine="sync") >= 0
+    assert _sample(text, "cache_hits_total", backend="memory") >= 1
+    # The scrape itself is in flight while it renders
+    assert _sample(text, "http_requests_in_flight") >= 1
@@ -0,0 +1,63 @@
+import json
+import logging
+import re
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.query_stats import track_queries
+
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)')
+
+
+def _timing(response):
+    match = SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert match, response.headers["server-timing"]
+    return int(match.group(2)), float(match.group(1)), float(match.group(3))
+
+
+def test_track_queries_counts_only_inside_the_block(test_engine):
+    """Test that statements are counted for the tracked scope and not outside it."""
+    with test_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with track_queries(keep_statements=True) as stats:
+            connection.execute(text("SELECT 2"))
+            connection.execute(text("SELECT 3"))
+        connection.execute(text("SELECT 4"))
+    assert stats.count == 2
+    assert stats.statements == ["SELECT 2", "SELECT 3"]
+    assert stats.seconds >= 0
+
+def test_server_timing_header_counts_request_queries(client, test_post, count_queries):
+    """Test that the header reports the statements the request ran, sync session path."""
+    with count_queries() as statements:
+        response = client.get(f"/api/v1/posts/{test_post.id}")
+    assert response.status_code == 200
+    queries, db_ms, app_ms = _timing(response)
+    assert queries == len(statements) > 0
+    assert 0 <= db_ms <= app_ms
+
+def test_server_timing_header_on_async_session(async_client, test_post):
+    """Test that queries run through an AsyncSession are attributed to the request too."""
+    response = async_client.get("/api/v1/posts")
+    assert response.status_code == 200
+    assert _timing(response)[0] > 0
+
+def test_server_timing_without_queries(client):
+    """Test that a request touching no database reports zero queries."""
+    response = client.get("/")
+    assert _timing(response)[0] == 0
+
+def test_request_log_line(client, test_post, caplog, monkeypatch):
+    """Test that each request writes a JSON log line, escalated to a warning above the threshold."""
+    with caplog.at_level(logging.INFO, logger="uvicorn.error"):
+        client.get(f"/api/v1/posts/{test_post.id}")
+        monkeypatch.setattr(settings, "QUERY_WARN_COUNT", 0)
+        client.get("/api/v1/posts/999999")
+
+    records = [r for r in caplog.records if r.name == "uvicorn.error" and '"event": "request"' in r.getMessage()]
+    found, missing = [json.loads(r.getMessage()) for r in records[-2:]]
+    assert found["path"] == f"/api/v1/posts/{test_post.id}"
+    assert found["status"] == 200 and found["queries"] > 0
+    assert missing["status"] == 404
+    assert [r.levelno for r in records[-2:]] == [logging.INFO, logging.WARNING]
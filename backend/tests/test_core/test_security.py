@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+import pytest
+
+from app.core.security import (
+    HashingPool, HashingPoolFull, InvalidToken, VerifiedTokens, create_access_token, decode_access_token,
+    hash_password, verified_tokens, verify_password,
+)
+
+
+@pytest.mark.asyncio
+async def test_password_hash_round_trip():
+    """Test that a password verifies against its own salted bcrypt hash only."""
+    password_hash = await hash_password("secret")
+    assert password_hash.startswith("$2b$")
+    assert password_hash != await hash_password("secret")
+    assert await verify_password("secret", password_hash) == (True, None)
+    assert await verify_password("Secret", password_hash) == (False, None)
+    assert await verify_password("secret", "not a hash") == (False, None)
+    assert await verify_password("secret", None) == (False, None)
+
+@pytest.mark.asyncio
+async def test_legacy_hash_verifies_and_asks_to_be_replaced():
+    """Test that an old sha256 hash still matches and comes back with its bcrypt replacement."""
+    verified, new_hash = await verify_password("secret", hashlib.sha256(b"secret").hexdigest())
+    assert verified
+    assert new_hash.startswith("$2b$")
+    assert await verify_password("secret", new_hash) == (True, None)
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_beyond_its_waiting_line():
+    """Test that work beyond workers + max_waiting fails fast, and capacity returns as work finishes."""
+    pool = HashingPool(workers=1, max_waiting=1)
+    release = threading.Event()
+    try:
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HashingPoolFull):
+            await pool.run(release.wait)
+        assert pool.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(*running)
+        assert await pool.run(lambda: "done") == "done"
+        assert pool.stats()["pending"] == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_token_round_trip():
+    """Test that a token decodes to the claims it was issued with."""
+    claims = decode_access_token(create_access_token(7, "admin", True, expires_in=60))
+    assert (claims.user_id, claims.role, claims.is_active) == (7, "admin", True)
+    assert claims.expires_at > time.time()
+
+def test_tampered_and_garbage_tokens_are_rejected():
+    """Test that a token fails once any part of it changes."""
+    header, payload, signature = create_access_token(7, "user", True).split(".")
+    other_payload = create_access_token(8, "admin", True).split(".")[1]
+    other_signature = ("B" if signature[0] == "A" else "A") + signature[1:]
+    for token in (f"{header}.{other_payload}.{signature}", f"{header}.{payload}.{other_signature}", "not-a-token"):
+        with pytest.raises(InvalidToken):
+            decode_access_token(token)
+
+def test_verified_tokens_are_remembered_until_they_expire(monkeypatch):
+    """Test that a second decode skips the signature check and a cached token still expires."""
+    token = create_access_token(7, "user", True, expires_in=60)
+    decode_access_token(token)
+    assert verified_tokens.get(token) is not None
+
+    from app.core import security
+    monkeypatch.setattr(security.jwt, "decode", lambda *args, **kwargs: pytest.fail("signature checked twice"))
+    assert decode_access_token(token).user_id == 7
+
+    monkeypatch.setattr(security.time, "time", lambda: verified_tokens.get(token).expires_at + 1)
+    with pytest.raises(InvalidToken):
+        decode_access_token(token)
+    assert verified_tokens.get(token) is None
+
+def test_verified_tokens_stay_bounded():
+    """Test that the least recently used token is evicted first."""
+    tokens = VerifiedTokens(max_entries=2)
+    claims = decode_access_token(create_access_token(1, "user", True))
+    tokens.add("a", claims)
+    tokens.add("b", claims)
+    tokens.get("a")
+    tokens.add("c", claims)
+    assert len(tokens) == 2
+    assert tokens.get("b") is None and tokens.get("a") is not None
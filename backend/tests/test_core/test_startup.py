@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db import username_index as username_index_module
+from app.db import warmup
+from app.db.entity_cache import post_key, user_key
+from app.db.session import SyncSessionAdapter
+from app.db.username_index import username_index
+from app.main import app, lifespan
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+
+def test_production_import_has_no_side_effects(tmp_path):
+    """Test that importing and starting the app in production runs no DDL and loads no dev dependencies."""
+    database = tmp_path / "prod.db"
+    script = (
+        "import asyncio, sys\n"
+        "from app.main import app, lifespan\n"
+        "async def boot():\n"
+        "    async with lifespan(app):\n"
+        "        pass\n"
+        "asyncio.run(boot())\n"
+        "print(sorted(m for m in ('faker', 'app.db.init_db', 'app.db.generate') if m in sys.modules))\n"
+    )
+    env = dict(os.environ, APP_ENV="production", DATABASE_URL=f"sqlite:///{database}")
+    for name in ("DB_CREATE_SCHEMA", "DB_SEED", "WARM_POOL_CONNECTIONS", "WARM_CACHE_POSTS"):
+        env.pop(name, None)
+    # Building the username index only reads, but it needs a database to read from
+    env["USERNAME_INDEX"] = "false"
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    # No schema was created, so SQLite never even had to create the file
+    assert not database.exists()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_pool_and_cache(test_db, test_engine, test_post, test_user, monkeypatch):
+    """Test that warm-up runs before the app reports ready and every phase is timed."""
+    closed = []
+
+    async def test_get_db():
+        try:
+            yield SyncSessionAdapter(test_db)
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(settings, "DB_ASYNC", False)
+    monkeypatch.setattr(settings, "DB_CREATE_SCHEMA", False)
+    monkeypatch.setattr(settings, "DB_SEED", False)
+    monkeypatch.setattr(settings, "WARM_POOL_CONNECTIONS", 2)
+    monkeypatch.setattr(settings, "WARM_CACHE_POSTS", 10)
+    monkeypatch.setattr(warmup, "engine", test_engine)
+    monkeypatch.setattr(warmup, "get_db", test_get_db)
+    monkeypatch.setattr(username_index_module, "get_db", test_get_db)
+
+    async with lifespan(app):
+        assert await cache.get(post_key(test_post.id)) is not None
+        assert await cache.get(user_key(test_user.id)) is not None
+        assert username_index.complete(test_user.username[:3], 10) == [(test_user.id, test_user.username)]
+        # The warm-up session is closed as soon as it is done, not left to the garbage collector
+        assert closed
+
+    from app.core.startup import startup
+    report = startup.report()
+    assert report["ready"]
+    assert {"import", "threadpool", "warm_pool", "warm_cache", "username_index"} <= set(report["phases_ms"])
+    assert "init_db" not in report["phases_ms"]
+
+
+def test_get_startup_timings(client, admin_headers):
+    """Test that boot timings are exposed."""
+    response = client.get("/api/v1/internal/startup", headers=admin_headers)
+    assert response.status_code == 200
+    assert "import" in response.json()["phases_ms"]
@@ -0,0 +1,40 @@
+import pytest
+from app.db.comment_tree import count_descendants, load_ancestors, subtree_filter
+from app.db.session import SyncSessionAdapter
+from app.models.comment import Comment
+
+
+def _chain(test_db, user_id, post_id, length, parent=None):
+    comments = []
+    for i in range(length):
+        comment = Comment(user_id=user_id, post_id=post_id, content=f"Level {i}",
+                          parent_id=parent.id if parent else None)
+        test_db.add(comment)
+        test_db.commit()
+        comments.append(comment)
+        parent = comment
+    return comments
+
+@pytest.mark.asyncio
+async def test_count_descendants(test_db, test_user, test_post):
+    """Test counting every reply below a comment at any depth."""
+    chain = _chain(test_db, test_user.id, test_post.id, 4)
+    _chain(test_db, test_user.id, test_post.id, 2, parent=chain[1])
+    # An unrelated thread must not be counted
+    _chain(test_db, test_user.id, test_post.id, 3)
+
+    db = SyncSessionAdapter(test_db)
+    assert await count_descendants(db, chain[0]) == 5
+    assert await count_descendants(db, chain[1]) == 4
+    assert await count_descendants(db, chain[3]) == 0
+
+@pytest.mark.asyncio
+async def test_subtree_filter_and_ancestors(test_db, test_user, test_post):
+    """Test that a subtree range scan and the ancestor lookup agree with parent_id links."""
+    chain = _chain(test_db, test_user.id, test_post.id, 3)
+
+    subtree = test_db.query(Comment).filter(subtree_filter(chain[1])).order_by(Comment.depth).all()
+    assert [c.id for c in subtree] == [chain[1].id, chain[2].id]
+
+    ancestors = await load_ancestors(SyncSessionAdapter(test_db), chain[2])
+    assert [c.id for c in ancestors] == [chain[0].id, chain[1].id]
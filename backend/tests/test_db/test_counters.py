@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import func, select, update
+
+from app.db.counters import Drift, find_drift, repair
+from app.models.comment import Comment
+from app.models.counter import COMMENT_REPLIES, POST_COMMENTS, CounterShard
+from app.models.post import Post
+
+
+def _comment(test_db, user_id, post_id, parent=None):
+    comment = Comment(user_id=user_id, post_id=post_id, content="Counted",
+                      parent_id=parent.id if parent else None)
+    test_db.add(comment)
+    test_db.commit()
+    return comment
+
+def _counts(test_db, post, *comments):
+    test_db.expire_all()
+    return test_db.get(Post, post.id).comment_count, [test_db.get(Comment, c.id).reply_count for c in comments]
+
+def test_counters_follow_inserts_moves_and_deletes(test_db, test_user, test_post):
+    """Test that post and reply counts track every ORM write to comments."""
+    root = _comment(test_db, test_user.id, test_post.id)
+    other = _comment(test_db, test_user.id, test_post.id)
+    replies = [_comment(test_db, test_user.id, test_post.id, parent=root) for _ in range(3)]
+    assert _counts(test_db, test_post, root, other) == (5, [3, 0])
+
+    replies[0].parent_id = other.id
+    test_db.commit()
+    assert _counts(test_db, test_post, root, other) == (5, [2, 1])
+
+    # Deleting a comment promotes its replies, so it leaves no reply count behind
+    test_db.delete(test_db.get(Comment, root.id))
+    test_db.commit()
+    assert _counts(test_db, test_post, other) == (4, [1])
+    assert test_db.scalar(
+        select(func.count()).select_from(CounterShard)
+        .where(CounterShard.kind == COMMENT_REPLIES, CounterShard.entity_id == root.id)
+    ) == 0
+
+def test_counters_spread_over_shards(test_db, test_user, test_post):
+    """Test that bumps to one post land on several shard rows."""
+    for _ in range(30):
+        _comment(test_db, test_user.id, test_post.id)
+    shards = test_db.scalar(
+        select(func.count()).select_from(CounterShard)
+        .where(CounterShard.kind == POST_COMMENTS, CounterShard.entity_id == test_post.id)
+    )
+    assert shards > 1
+    assert _counts(test_db, test_post)[0] == 30
+
+def test_reconcile_detects_and_repairs_drift(test_db, test_user, test_post):
+    """Test that drift from writes around the ORM is reported and folded back to the true count."""
+    root = _comment(test_db, test_user.id, test_post.id)
+    _comment(test_db, test_user.id, test_post.id, parent=root)
+    # A raw write that skips the mapper events
+    test_db.execute(update(CounterShard).where(CounterShard.kind == POST_COMMENTS).values(delta=CounterShard.delta + 5))
+    test_db.add(CounterShard(kind=COMMENT_REPLIES, entity_id=9999, shard=0, delta=2))
+    test_db.commit()
+
+    connection = test_db.connection()
+    drifts = {(d.kind, d.entity_id): (d.stored, d.actual) for d in find_drift(connection)}
+    assert drifts[(POST_COMMENTS, test_post.id)][1] == 2
+    assert drifts[(COMMENT_REPLIES, 9999)] == (2, 0)
+    assert (COMMENT_REPLIES, root.id) not in drifts
+
+    repair(connection, find_drift(connection))
+    test_db.commit()
+    assert find_drift(test_db.connection()) == []
+    assert _counts(test_db, test_post, root) == (2, [1])
+
+
+def test_repair_refuses_a_weaker_isolation_level_on_postgres():
+    """Test that repair() on Postgres outside a snapshot transaction fails before writing anything."""
+    class ReadCommitted:
+        dialect = type("Dialect", (), {"name": "postgresql"})()
+
+        def get_isolation_level(self):
+            return "READ COMMITTED"
+
+        def execute(self, statement):
+            raise AssertionError("repair() wrote without a snapshot")
+
+    with pytest.raises(ValueError, match="REPEATABLE READ"):
+        repair(ReadCommitted(), [Drift(POST_COMMENTS, 1, 3, 2)])
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.db import last_login as last_login_module
+from app.db.last_login import last_logins, write_last_logins
+from app.db.session import SyncSessionAdapter
+from app.models.user import User
+
+
+def _login(client, username="testuser", password="secret"):
+    return client.post("/api/v1/users/login", data={"username": username, "password": password})
+
+def _users(test_db, count):
+    users = [User(username=f"login{i}", email=f"login{i}@example.com", password_hash="x") for i in range(count)]
+    test_db.add_all(users)
+    test_db.commit()
+    return users
+
+def _stored(test_db, user):
+    test_db.expire_all()
+    return test_db.get(User, user.id).last_login
+
+def test_login_buffers_last_login_and_reads_merge_it(client, test_db, test_user, count_queries):
+    """Test that a login writes nothing to users yet every read already shows it."""
+    test_user.password_hash = pwd_context.hash("secret")
+    test_db.commit()
+    before = client.get(f"/api/v1/users/{test_user.id}")
+
+    with count_queries() as statements:
+        assert _login(client).status_code == 200
+    assert not [s for s in statements if s.startswith("UPDATE users")]
+    assert _stored(test_db, test_user) is None
+
+    login_at = last_logins.pending(test_user.id)
+    user = client.get(f"/api/v1/users/{test_user.id}")
+    assert datetime.fromisoformat(user.json()["last_login"]) == login_at
+    assert user.headers["etag"] != before.headers["etag"]
+    listed = next(u for u in client.get("/api/v1/users").json()["items"] if u["id"] == test_user.id)
+    assert listed == user.json()
+
+    assert asyncio.run(last_logins.flush(SyncSessionAdapter(test_db))) == 1
+    assert len(last_logins) == 0
+    assert _stored(test_db, test_user) == login_at
+    # Once written the row reads exactly as the merged view did
+    after = client.get(f"/api/v1/users/{test_user.id}")
+    assert after.json() == user.json()
+    assert after.headers["etag"] == user.headers["etag"]
+
+def test_flush_is_one_statement_and_keeps_later_logins(test_db, count_queries):
+    """Test that a batch is written in one statement and never moves last_login back."""
+    users = _users(test_db, 3)
+    later = datetime.now() + timedelta(hours=1)
+    users[2].last_login = later
+    test_db.commit()
+
+    async def flush():
+        now = datetime.now()
+        for user in users:
+            last_logins.record(user.id, now)
+        with count_queries() as statements:
+            await last_logins.flush(SyncSessionAdapter(test_db))
+        return now, statements
+
+    now, statements = asyncio.run(flush())
+    assert len([s for s in statements if s.startswith("UPDATE users")]) == 1
+    assert [_stored(test_db, user) for user in users] == [now, now, later]
+
+def test_postgres_flush_updates_from_values(monkeypatch):
+    """Test that Postgres gets UPDATE ... FROM (VALUES ...), one statement per chunk."""
+    monkeypatch.setattr(last_login_module, "_CHUNK_ROWS", 2)
+    executed = []
+
+    class Recorder:
+        class bind:
+            class dialect:
+                name = "postgresql"
+
+        async def execute(self, statement, params=None):
+            executed.append(str(statement.compile(dialect=postgresql.asyncpg.dialect())))
+
+    now = datetime.now()
+    asyncio.run(write_last_logins(Recorder(), {1: now, 2: now, 3: now}))
+    assert len(executed) == 2
+    assert "FROM (VALUES" in executed[0] and "AS pending (id, last_login)" in executed[0]
+
+def test_full_buffer_flushes_without_waiting(test_db, monkeypatch):
+    """Test that reaching LAST_LOGIN_FLUSH_ENTRIES flushes at once instead of after the interval."""
+    async def override_get_db():
+        yield SyncSessionAdapter(test_db)
+
+    monkeypatch.setattr(last_login_module, "get_db", override_get_db)
+    monkeypatch.setattr(settings, "LAST_LOGIN_FLUSH_ENTRIES", 2)
+    monkeypatch.setattr(settings, "LAST_LOGIN_FLUSH_SECONDS", 60.0)
+    users = _users(test_db, 2)
+
+    async def record():
+        last_logins.record(users[0].id, datetime.now())
+        await asyncio.sleep(0.05)
+        assert len(last_logins) == 1
+        last_logins.record(users[1].id, datetime.now())
+        for _ in range(100):
+            if not last_logins:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(record())
+    assert len(last_logins) == 0
+    assert all(_stored(test_db, user) is not None for user in users)
+
+def test_close_flushes_the_buffer(test_db, monkeypatch):
+    """Test that logins still buffered at shutdown are written before the flusher stops."""
+    async def override_get_db():
+        yield SyncSessionAdapter(test_db)
+
+    monkeypatch.setattr(last_login_module, "get_db", override_get_db)
+    monkeypatch.setattr(settings, "LAST_LOGIN_FLUSH_SECONDS", 60.0)
+    user = _users(test_db, 1)[0]
+
+    async def login_then_stop():
+        last_logins.record(user.id, datetime.now())
+        await asyncio.sleep(0)
+        await last_logins.close()
+
+    asyncio.run(login_then_stop())
+    assert len(last_logins) == 0
+    assert _stored(test_db, user) is not None
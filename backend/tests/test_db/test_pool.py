@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool import InstrumentedQueuePool, pool_status
+
+
+@pytest.fixture(scope="function")
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+def test_pool_checkout_stats(pooled_engine):
+    """Test that checkouts, overflow growth and timeouts are recorded."""
+    first = pooled_engine.connect()
+    first.execute(text("SELECT 1"))
+    status = pool_status(pooled_engine.pool)
+    assert status["checkouts"] == 1
+    assert status["checked_out"] == 1
+    assert status["overflow_events"] == 0
+
+    second = pooled_engine.connect()
+    status = pool_status(pooled_engine.pool)
+    assert status["checked_out"] == 2
+    assert status["overflow"] == 1
+    assert status["overflow_events"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        pooled_engine.connect()
+    status = pool_status(pooled_engine.pool)
+    assert status["timeouts"] == 1
+    assert status["wait_seconds_max"] >= 0.0
+
+    second.close()
+    first.close()
+    assert pool_status(pooled_engine.pool)["checked_out"] == 0
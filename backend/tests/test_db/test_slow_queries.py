@@ -0,0 +1,100 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.slow_queries import SlowQueryLog, normalize, slow_queries
+
+
+def test_normalize_collapses_values_and_placeholders():
+    """Test that the same query with other values, placeholders or list sizes normalizes alike."""
+    first = normalize("SELECT * FROM posts WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND title = 'a''b' LIMIT 10")
+    second = normalize("SELECT *  FROM posts\n WHERE id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER) AND title = $4 LIMIT $5")
+    assert first == second == "SELECT * FROM posts WHERE id IN (?, ...) AND title = ? LIMIT ?"
+    assert normalize("SELECT anon_1.id FROM comments_1") == "SELECT anon_1.id FROM comments_1"
+
+def test_record_dedupes_by_fingerprint_and_stays_bounded():
+    """Test that repeats aggregate on one entry and the least recently seen entry is evicted."""
+    log = SlowQueryLog(threshold_ms=100, capacity=2, explain=False)
+    assert log.record("SELECT 1 FROM users WHERE id = ?", (1,), 0.05) is None
+    assert log.record("SELECT 1 FROM users WHERE id = ?", (1,), 0.2) is not None
+    assert log.record("SELECT 1 FROM users WHERE id = ?", (2,), 0.4) is None
+    log.record("SELECT 1 FROM posts WHERE id = ?", (1,), 0.3)
+    log.record("SELECT 1 FROM users WHERE id = ?", (3,), 0.1)
+    log.record("SELECT 1 FROM comments WHERE id = ?", (1,), 0.3)
+
+    entries = log.entries()
+    assert [e["sql"] for e in entries] == ["SELECT ? FROM users WHERE id = ?", "SELECT ? FROM comments WHERE id = ?"]
+    users = entries[0]
+    assert users["count"] == 3
+    assert users["max_ms"] == 400
+    assert users["mean_ms"] == round(700 / 3, 2)
+    assert users["parameters"] == "(1,)"
+    assert log.evictions == 1
+
+def test_parameters_of_password_statements_are_redacted(caplog):
+    """Test that bind parameters are never kept or logged for statements touching password_hash."""
+    log = SlowQueryLog(threshold_ms=0, capacity=10, explain=False)
+    log.record("UPDATE users SET password_hash = ? WHERE users.id = ?", ("$2b$12$secret", 1), 1)
+    log.record("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)", [("a", "a@x", "$2b$12$x")], 1)
+    assert [e["parameters"] for e in log.entries()] == ["[redacted]", "[redacted]"]
+    assert not any("$2b$12$" in r.getMessage() for r in caplog.records)
+
+def test_slow_statement_is_explained_on_a_side_connection(tmp_path, caplog):
+    """Test that a new slow fingerprint is logged and gets its plan captured once."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    log = SlowQueryLog(threshold_ms=0, capacity=10)
+    log.watch(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO items (name) VALUES (:name)"), [{"name": "a"}, {"name": "b"}])
+        for name in ("a", "b"):
+            connection.execute(text("SELECT id FROM items WHERE name = :name"), {"name": name})
+    asyncio.run(log.wait_for_plans())
+
+    select_entry = next(e for e in log.entries() if e["sql"].startswith("SELECT"))
+    assert select_entry["count"] == 2
+    assert any("SCAN" in line for line in select_entry["plan"])
+    insert_entry = next(e for e in log.entries() if e["sql"].startswith("INSERT"))
+    assert insert_entry["parameters"] == "('a',) (+1 more rows)"
+    # The EXPLAIN statements themselves are never recorded
+    assert not any(e["sql"].startswith("EXPLAIN") for e in log.entries())
+    assert sum('"event": "slow_query"' in r.getMessage() for r in caplog.records) == len(log.entries())
+    engine.dispose()
+
+def test_async_engine_statements_are_explained(tmp_path):
+    """Test that statements through an AsyncEngine are timed and explained on the event loop."""
+    log = SlowQueryLog(threshold_ms=0, capacity=10)
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}")
+        log.watch(engine)
+        async with engine.begin() as connection:
+            await connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            await connection.execute(text("SELECT id FROM items WHERE id > :id"), {"id": 1})
+        await log.wait_for_plans()
+        await engine.dispose()
+
+    asyncio.run(run())
+    select_entry = next(e for e in log.entries() if e["sql"].startswith("SELECT"))
+    assert select_entry["plan"] and not select_entry["plan"][0].startswith("EXPLAIN failed")
+
+def test_slow_queries_endpoint(client, auth_headers, admin_headers):
+    """Test that the ring is readable and can be cleared through the internal API, by admins only."""
+    slow_queries.record("SELECT * FROM posts WHERE id = 7", None, 10)
+    try:
+        assert client.get("/api/v1/internal/slow-queries").status_code == 401
+        assert client.get("/api/v1/internal/slow-queries", headers=auth_headers).status_code == 403
+        assert client.delete("/api/v1/internal/slow-queries", headers=auth_headers).status_code == 403
+        assert slow_queries.entries()
+
+        response = client.get("/api/v1/internal/slow-queries", headers=admin_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["capacity"] >= 1
+        assert any(e["sql"] == "SELECT * FROM posts WHERE id = ?" for e in body["entries"])
+
+        assert client.delete("/api/v1/internal/slow-queries", headers=admin_headers).status_code == 204
+        assert client.get("/api/v1/internal/slow-queries", headers=admin_headers).json()["entries"] == []
+    finally:
+        slow_queries.clear()
@@ -144,4 +144,54 @@ def test_cascade_delete_with_parent(test_db, test_user, test_post):
     # The child should still exist but with parent_id set to NULL
     remaining_child = test_db.query(Comment).filter(Comment.id == child_id).first()
     assert remaining_child is not None
-    assert remaining_child.parent_id is None
\ No newline at end of file
+    assert remaining_child.parent_id is None
+
+def test_comment_materialized_path(test_db, test_comment, test_nested_comment):
+    """Test that path and depth are assigned on insert."""
+    from app.models.comment import path_segment
+
+    assert test_comment.path == path_segment(test_comment.id)
+    assert test_comment.depth == 0
+    assert test_nested_comment.path == test_comment.path + path_segment(test_nested_comment.id)
+    assert test_nested_comment.depth == 1
+
+def test_move_comment_rewrites_subtree(test_db, test_user, test_post, test_comment, test_nested_comment):
+    """Test that reparenting a comment moves its whole subtree."""
+    from app.models.comment import path_segment
+
+    grandchild = Comment(user_id=test_user.id, post_id=test_post.id,
+                         parent_id=test_nested_comment.id, content="Grandchild")
+    other = Comment(user_id=test_user.id, post_id=test_post.id, content="Other root")
+    test_db.add_all([grandchild, other])
+    test_db.commit()
+
+    test_nested_comment.parent_id = other.id
+    test_db.commit()
+    test_db.refresh(grandchild)
+
+    assert test_nested_comment.path == other.path + path_segment(test_nested_comment.id)
+    assert test_nested_comment.depth == 1
+    assert grandchild.path == test_nested_comment.path + path_segment(grandchild.id)
+    assert grandchild.depth == 2
+
+def test_delete_comment_promotes_replies(test_db, test_user, test_post, test_comment, test_nested_comment):
+    """Test that deleting a comment re-roots its replies instead of orphaning them."""
+    from app.models.comment import path_segment
+
+    grandchild = Comment(user_id=test_user.id, post_id=test_post.id,
+                         parent_id=test_nested_comment.id, content="Grandchild")
+    test_db.add(grandchild)
+    test_db.commit()
+    nested_id, grandchild_id = test_nested_comment.id, grandchild.id
+
+    test_db.delete(test_comment)
+    test_db.commit()
+
+    nested = test_db.query(Comment).filter(Comment.id == nested_id).one()
+    grandchild = test_db.query(Comment).filter(Comment.id == grandchild_id).one()
+    assert nested.parent_id is None
+    assert nested.path == path_segment(nested_id)
+    assert nested.depth == 0
+    assert grandchild.parent_id == nested_id
+    assert grandchild.path == nested.path + path_segment(grandchild_id)
+    assert grandchild.depth == 1
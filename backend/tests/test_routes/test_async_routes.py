@@ -0,0 +1,96 @@
+def test_async_get_post_with_user(async_client, test_post, test_user):
+    """Test that eager loading serves nested users without lazy IO on the event loop."""
+    response = async_client.get(f"/api/v1/posts/{test_post.id}")
+    assert response.status_code == 200
+    post = response.json()
+    assert post["id"] == test_post.id
+    assert post["user"]["username"] == test_user.username
+
+def test_async_list_pagination(async_client, test_post):
+    """Test keyset pagination through the async session."""
+    response = async_client.get("/api/v1/posts", params={"limit": 1})
+    assert response.status_code == 200
+    page = response.json()
+    assert [p["id"] for p in page["items"]] == [test_post.id]
+    assert page["next_cursor"] is None
+
+def test_async_comment_lifecycle(async_client, test_user, test_post, test_comment, auth_headers):
+    """Test creating, reading, moving and deleting comments through the async session."""
+    response = async_client.post(
+        "/api/v1/comments",
+        json={"content": "Async reply", "post_id": test_post.id, "parent_id": test_comment.id},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    reply = response.json()
+    assert reply["depth"] == 1
+
+    response = async_client.get(f"/api/v1/comments/{reply['id']}")
+    assert response.status_code == 200
+    assert response.json()["user"]["id"] == test_user.id
+
+    response = async_client.get(f"/api/v1/posts/{test_post.id}/comments", params={"max_depth": 1})
+    assert response.status_code == 200
+    thread = response.json()
+    assert [r["id"] for r in thread[0]["replies"]] == [reply["id"]]
+
+    response = async_client.delete(f"/api/v1/comments/{test_comment.id}", headers=auth_headers)
+    assert response.status_code == 204
+
+    response = async_client.get(f"/api/v1/comments/{reply['id']}")
+    assert response.status_code == 200
+    promoted = response.json()
+    assert promoted["parent_id"] is None
+    assert promoted["depth"] == 0
+
+def test_async_user_lifecycle(async_client, admin_headers):
+    """Test creating, updating and deleting a user through the async session."""
+    response = async_client.post("/api/v1/users", json={
+        "username": "asyncuser",
+        "email": "async@example.com",
+        "password": "password123",
+    })
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+
+    response = async_client.put(f"/api/v1/users/{user_id}", json={"bio": "Async bio"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["bio"] == "Async bio"
+
+    response = async_client.delete(f"/api/v1/users/{user_id}", headers=admin_headers)
+    assert response.status_code == 204
+    assert async_client.get(f"/api/v1/users/{user_id}").status_code == 404
+
+def test_async_counters(async_client, test_user, test_post, test_comment, auth_headers):
+    """Test that counters are loaded with their rows, never lazily, on the async session."""
+    response = async_client.post(
+        "/api/v1/comments",
+        json={"content": "Async reply", "post_id": test_post.id, "parent_id": test_comment.id},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert response.json()["reply_count"] == 0
+
+    assert async_client.get(f"/api/v1/posts/{test_post.id}").json()["comment_count"] == 2
+    assert async_client.get(f"/api/v1/comments/{test_comment.id}").json()["reply_count"] == 1
+    thread = async_client.get(f"/api/v1/posts/{test_post.id}/comments").json()
+    assert thread[0]["reply_count"] == 1
+
+def test_async_bulk_create_comments(async_client, test_user, test_post, test_comment, auth_headers):
+    """Test the multi-row INSERT ... RETURNING path through the async driver."""
+    items = [{"content": f"Bulk {i}", "post_id": test_post.id, "parent_id": test_comment.id} for i in range(5)]
+    response = async_client.post("/api/v1/comments/bulk", json=items, headers=auth_headers)
+    assert response.status_code == 201
+    created = response.json()["created"]
+    assert [c["content"] for c in created] == [item["content"] for item in items]
+
+    thread = async_client.get(f"/api/v1/posts/{test_post.id}/comments").json()
+    assert [r["id"] for r in thread[0]["replies"]] == [c["id"] for c in created]
+    assert thread[0]["reply_count"] == 5
+
+def test_async_search(async_client, test_post, test_comment):
+    """Test that ranked search runs on the async driver."""
+    response = async_client.get("/api/v1/search", params={"q": "test"})
+    assert response.status_code == 200
+    hits = {(hit["type"], hit["id"]) for hit in response.json()["items"]}
+    assert hits == {("post", test_post.id), ("comment", test_comment.id)}
@@ -2,7 +2,7 @@ def test_get_comments(client, test_comment):
     """Test retrieving all comments."""
     response = client.get("/api/v1/comments")
     assert response.status_code == 200
-    comments = response.json()
+    comments = response.json()["items"]
     assert isinstance(comments, list)
     assert len(comments) >= 1
     
@@ -39,7 +39,7 @@ def test_get_nonexistent_comment(client):
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_create_comment(client, test_user, test_post):
+def test_create_comment(client, test_user, test_post, auth_headers):
     """Test creating a new comment."""
     comment_data = {
         "content": "This is a new comment",
@@ -47,7 +47,7 @@ def test_create_comment(client, test_user, test_post):
         "parent_id": None
     }
     
-    response = client.post(f"/api/v1/comments?user_id={test_user.id}", json=comment_data)
+    response = client.post("/api/v1/comments", json=comment_data, headers=auth_headers)
     assert response.status_code == 201
     
     created_comment = response.json()
@@ -56,7 +56,7 @@ def test_create_comment(client, test_user, test_post):
     assert created_comment["parent_id"] == comment_data["parent_id"]
     assert created_comment["user_id"] == test_user.id
 
-def test_create_reply_comment(client, test_user, test_post, test_comment):
+def test_create_reply_comment(client, test_user, test_post, test_comment, auth_headers):
     """Test creating a reply to an existing comment."""
     comment_data = {
         "content": "This is a reply to another comment",
@@ -64,7 +64,7 @@ def test_create_reply_comment(client, test_user, test_post, test_comment):
         "parent_id": test_comment.id
     }
     
-    response = client.post(f"/api/v1/comments?user_id={test_user.id}", json=comment_data)
+    response = client.post("/api/v1/comments", json=comment_data, headers=auth_headers)
     assert response.status_code == 201
     
     created_comment = response.json()
@@ -73,13 +73,13 @@ def test_create_reply_comment(client, test_user, test_post, test_comment):
     assert created_comment["parent_id"] == comment_data["parent_id"]
     assert created_comment["user_id"] == test_user.id
 
-def test_update_comment(client, test_comment):
+def test_update_comment(client, test_comment, auth_headers):
     """Test updating a comment."""
     update_data = {
         "content": "Updated comment content"
     }
     
-    response = client.put(f"/api/v1/comments/{test_comment.id}", json=update_data)
+    response = client.put(f"/api/v1/comments/{test_comment.id}", json=update_data, headers=auth_headers)
     assert response.status_code == 200
     
     updated_comment = response.json()
@@ -89,17 +89,17 @@ def test_update_comment(client, test_comment):
     assert updated_comment["user_id"] == test_comment.user_id
     assert updated_comment["post_id"] == test_comment.post_id
 
-def test_update_nonexistent_comment(client):
+def test_update_nonexistent_comment(client, auth_headers):
     """Test updating a comment that doesn't exist."""
     update_data = {
         "content": "Updated content"
     }
     
-    response = client.put("/api/v1/comments/999", json=update_data)
+    response = client.put("/api/v1/comments/999", json=update_data, headers=auth_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_delete_comment(client, test_db, test_user, test_post):
+def test_delete_comment(client, test_db, test_user, test_post, auth_headers):
     """Test deleting a comment."""
     # Create a comment to delete
     from app.models.comment import Comment
@@ -115,16 +115,16 @@ def test_delete_comment(client, test_db, test_user, test_post):
     comment_id = temp_comment.id
     
     # Delete the comment
-    response = client.delete(f"/api/v1/comments/{comment_id}")
+    response = client.delete(f"/api/v1/comments/{comment_id}", headers=auth_headers)
     assert response.status_code == 204
     
     # Verify the comment is deleted
     check_response = client.get(f"/api/v1/comments/{comment_id}")
     assert check_response.status_code == 404
 
-def test_delete_nonexistent_comment(client):
+def test_delete_nonexistent_comment(client, auth_headers):
     """Test deleting a comment that doesn't exist."""
-    response = client.delete("/api/v1/comments/999")
+    response = client.delete("/api/v1/comments/999", headers=auth_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
@@ -153,7 +153,7 @@ def test_get_comment_replies(client, test_comment, test_nested_comment):
     response = client.get(f"/api/v1/comments/{test_comment.id}/replies")
     assert response.status_code == 200
     
-    replies = response.json()
+    replies = response.json()["items"]
     assert isinstance(replies, list)
     assert len(replies) >= 1
     
@@ -166,4 +166,247 @@ def test_get_comment_replies(client, test_comment, test_nested_comment):
             assert reply["content"] == test_nested_comment.content
             break
     
-    assert found_nested_comment
\ No newline at end of file
+    assert found_nested_comment
+
+def _create_thread(test_db, user_id, post_id, size):
+    """Create a thread of `size` comments, each replying to the one before every third comment."""
+    from app.models.comment import Comment
+    created = []
+    for i in range(size):
+        parent_id = created[-1].id if created and i % 3 else None
+        comment = Comment(user_id=user_id, post_id=post_id, parent_id=parent_id, content=f"Comment {i}")
+        test_db.add(comment)
+        test_db.commit()
+        created.append(comment)
+    return created
+
+def test_get_post_comments_nested_tree(client, test_db, test_user, test_post):
+    """Test that the whole thread is returned as a nested tree."""
+    created = _create_thread(test_db, test_user.id, test_post.id, 6)
+
+    response = client.get(f"/api/v1/posts/{test_post.id}/comments")
+    assert response.status_code == 200
+    comments = response.json()
+
+    # Comments 0 and 3 are top-level, each followed by a chain of two replies
+    assert [c["id"] for c in comments] == [created[0].id, created[3].id]
+    first = comments[0]
+    assert [r["id"] for r in first["replies"]] == [created[1].id]
+    assert [r["id"] for r in first["replies"][0]["replies"]] == [created[2].id]
+    assert first["replies"][0]["replies"][0]["replies"] == []
+
+def test_get_post_comments_constant_query_count(client, test_db, test_user, test_post, count_queries, assert_max_queries):
+    """Test that loading a thread issues the same, small number of queries however large it is."""
+    _create_thread(test_db, test_user.id, test_post.id, 6)
+    with count_queries() as small_queries:
+        small = client.get(f"/api/v1/posts/{test_post.id}/comments")
+
+    _create_thread(test_db, test_user.id, test_post.id, 60)
+    with assert_max_queries(len(small_queries)):
+        large = client.get(f"/api/v1/posts/{test_post.id}/comments")
+
+    assert small.status_code == 200
+    assert large.status_code == 200
+    assert len(large.json()) > len(small.json())
+    assert len(small_queries) <= 3
+
+def _create_wide_thread(test_db, user_id, post_id, width):
+    """Create one top-level comment with `width` replies, each with a single reply of its own."""
+    from app.models.comment import Comment
+    root = Comment(user_id=user_id, post_id=post_id, content="Root")
+    test_db.add(root)
+    test_db.commit()
+    replies = []
+    for i in range(width):
+        reply = Comment(user_id=user_id, post_id=post_id, parent_id=root.id, content=f"Reply {i}")
+        test_db.add(reply)
+        test_db.commit()
+        nested = Comment(user_id=user_id, post_id=post_id, parent_id=reply.id, content=f"Nested {i}")
+        test_db.add(nested)
+        test_db.commit()
+        replies.append(reply)
+    return root, replies
+
+def test_get_post_comments_depth_and_width_limits(client, test_db, test_user, test_post):
+    """Test that max_depth and replies_per_node truncate the tree and report what was left out."""
+    root, replies = _create_wide_thread(test_db, test_user.id, test_post.id, 5)
+
+    response = client.get(
+        f"/api/v1/posts/{test_post.id}/comments",
+        params={"max_depth": 1, "replies_per_node": 2},
+    )
+    assert response.status_code == 200
+    comments = response.json()
+    assert [c["id"] for c in comments] == [root.id]
+
+    top = comments[0]
+    assert [r["id"] for r in top["replies"]] == [replies[0].id, replies[1].id]
+    assert top["remaining_replies"] == 3
+    assert top["replies_cursor"] is not None
+
+    # Replies at the depth limit are cut off but still report their reply count
+    for reply in top["replies"]:
+        assert reply["replies"] == []
+        assert reply["remaining_replies"] == 1
+        assert reply["replies_cursor"] is None
+
+    # The cursor continues from the last returned reply
+    response = client.get(
+        f"/api/v1/comments/{root.id}/replies",
+        params={"cursor": top["replies_cursor"], "limit": 10},
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [r["id"] for r in page["items"]] == [r.id for r in replies[2:]]
+    assert page["next_cursor"] is None
+
+def test_get_post_comments_pages_top_level_comments(client, test_db, test_user, test_post):
+    """Test that replies_per_node caps top-level comments too and links to the next page of them."""
+    from app.models.comment import Comment
+    roots = []
+    for i in range(10):
+        root = Comment(user_id=test_user.id, post_id=test_post.id, content=f"Root {i}")
+        test_db.add(root)
+        test_db.commit()
+        test_db.add(Comment(user_id=test_user.id, post_id=test_post.id, parent_id=root.id, content=f"Reply {i}"))
+        test_db.commit()
+        roots.append(root)
+
+    params = {"max_depth": 1, "replies_per_node": 2}
+    response = client.get(f"/api/v1/posts/{test_post.id}/comments", params=params)
+    assert response.status_code == 200
+    comments = response.json()
+    assert [c["id"] for c in comments] == [roots[0].id, roots[1].id]
+    assert all(len(c["replies"]) == 1 for c in comments)
+
+    seen = [c["id"] for c in comments]
+    while "next" in response.links:
+        response = client.get(response.links["next"]["url"])
+        assert response.status_code == 200
+        assert 0 < len(response.json()) <= 2
+        seen += [c["id"] for c in response.json()]
+    assert seen == [root.id for root in roots]
+
+def test_get_comment_replies_with_subtrees(client, test_db, test_user, test_post):
+    """Test paging through replies while expanding one level below each of them."""
+    root, replies = _create_wide_thread(test_db, test_user.id, test_post.id, 3)
+
+    response = client.get(
+        f"/api/v1/comments/{root.id}/replies",
+        params={"limit": 2, "max_depth": 1},
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [r["id"] for r in page["items"]] == [replies[0].id, replies[1].id]
+    assert page["next_cursor"] is not None
+    for item in page["items"]:
+        assert len(item["replies"]) == 1
+        assert item["remaining_replies"] == 0
+
+def test_get_comment_ancestors(client, test_db, test_user, test_post, test_comment, test_nested_comment):
+    """Test retrieving the breadcrumb chain of a reply."""
+    from app.models.comment import Comment
+    grandchild = Comment(user_id=test_user.id, post_id=test_post.id,
+                         parent_id=test_nested_comment.id, content="Grandchild")
+    test_db.add(grandchild)
+    test_db.commit()
+
+    response = client.get(f"/api/v1/comments/{grandchild.id}/ancestors")
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [test_comment.id, test_nested_comment.id]
+
+    response = client.get(f"/api/v1/comments/{test_comment.id}/ancestors")
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_update_comment_parent(client, test_db, test_user, test_post, test_comment, test_nested_comment, auth_headers):
+    """Test moving a reply to the top level and rejecting cycles."""
+    response = client.put(f"/api/v1/comments/{test_comment.id}", json={"parent_id": test_nested_comment.id}, headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.put(f"/api/v1/comments/{test_nested_comment.id}", json={"parent_id": None}, headers=auth_headers)
+    assert response.status_code == 200
+    moved = response.json()
+    assert moved["parent_id"] is None
+    assert moved["depth"] == 0
+
+def test_get_comment_cache_invalidated_on_move(client, test_comment, test_nested_comment, auth_headers):
+    """Test that moving a comment refreshes the cached entries of its subtree."""
+    assert client.get(f"/api/v1/comments/{test_nested_comment.id}").json()["depth"] == 1
+
+    other = client.post(
+        "/api/v1/comments",
+        json={"content": "Other", "post_id": test_comment.post_id},
+        headers=auth_headers,
+    ).json()
+    response = client.put(f"/api/v1/comments/{test_comment.id}", json={"parent_id": other["id"]}, headers=auth_headers)
+    assert response.status_code == 200
+
+    nested = client.get(f"/api/v1/comments/{test_nested_comment.id}").json()
+    assert nested["depth"] == 2
+
+def test_get_comment_conditional(client, test_comment, auth_headers):
+    """Test that a comment answers 304 until its content changes."""
+    response = client.get(f"/api/v1/comments/{test_comment.id}")
+    etag = response.headers["etag"]
+
+    response = client.get(f"/api/v1/comments/{test_comment.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put(f"/api/v1/comments/{test_comment.id}", json={"content": "Edited"}, headers=auth_headers)
+    response = client.get(f"/api/v1/comments/{test_comment.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_comment_reply_count(client, test_comment, test_user, test_post, auth_headers):
+    """Test that reply counts are updated as replies come and go."""
+    assert client.get(f"/api/v1/comments/{test_comment.id}").json()["reply_count"] == 0
+
+    response = client.post(
+        "/api/v1/comments",
+        json={"content": "Reply", "post_id": test_post.id, "parent_id": test_comment.id},
+        headers=auth_headers
+    )
+    reply_id = response.json()["id"]
+    assert client.get(f"/api/v1/comments/{test_comment.id}").json()["reply_count"] == 1
+
+    client.put(f"/api/v1/comments/{reply_id}", json={"parent_id": None}, headers=auth_headers)
+    assert client.get(f"/api/v1/comments/{test_comment.id}").json()["reply_count"] == 0
+    assert client.get(f"/api/v1/posts/{test_post.id}").json()["comment_count"] == 2
+
+    client.delete(f"/api/v1/comments/{reply_id}", headers=auth_headers)
+    assert client.get(f"/api/v1/posts/{test_post.id}").json()["comment_count"] == 1
+
+def test_bulk_create_comments(client, test_db, test_comment, test_user, test_post, auth_headers):
+    """Test that bulk comments get paths, depths and counters like single inserts."""
+    from app.db.counters import find_drift
+    from app.models.post import Post
+
+    other_post = Post(user_id=test_user.id, content="Other post")
+    test_db.add(other_post)
+    test_db.commit()
+
+    items = [
+        {"content": "Top", "post_id": test_post.id},
+        {"content": "Reply", "post_id": test_post.id, "parent_id": test_comment.id},
+        {"content": "Missing post", "post_id": 999},
+        {"content": "Wrong post", "post_id": other_post.id, "parent_id": test_comment.id},
+        {"post_id": test_post.id},
+        {"content": "Second reply", "post_id": test_post.id, "parent_id": test_comment.id},
+    ]
+    response = client.post("/api/v1/comments/bulk", json=items, headers=auth_headers)
+    assert response.status_code == 201
+    result = response.json()
+
+    assert [c["content"] for c in result["created"]] == ["Top", "Reply", "Second reply"]
+    assert [c["depth"] for c in result["created"]] == [0, 1, 1]
+    assert [e["index"] for e in result["errors"]] == [2, 3, 4]
+    assert "not found" in result["errors"][0]["detail"]
+
+    thread = client.get(f"/api/v1/posts/{test_post.id}/comments").json()
+    assert [c["id"] for c in thread] == [test_comment.id, result["created"][0]["id"]]
+    assert [r["id"] for r in thread[0]["replies"]] == [result["created"][1]["id"], result["created"][2]["id"]]
+
+    assert client.get(f"/api/v1/posts/{test_post.id}").json()["comment_count"] == 4
+    assert client.get(f"/api/v1/comments/{test_comment.id}").json()["reply_count"] == 2
+    assert find_drift(test_db.connection()) == []
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.comment import Comment
+from app.models.post import Post, VisibilityType
+from app.models.user import User
+
+
+@pytest.fixture
+def mixed_rows(test_db, test_user):
+    """Rows exercising nulls, non-ASCII text, escapes and sub-second timestamps."""
+    base = datetime(2024, 3, 1, 12, 0, 0)
+    other = User(
+        username="zoë", email="zoe@example.com", password_hash="x",
+        bio=None, created_at=base, updated_at=base + timedelta(microseconds=400000),
+    )
+    test_db.add(other)
+    for i in range(5):
+        test_db.add(Post(
+            user_id=test_user.id,
+            title=None if i % 2 else f"Title \"{i}\" </script>",
+            content=f"Ünïcode ✓ line\nbreak \\ {i}",
+            visibility=VisibilityType.FRIENDS if i % 2 else VisibilityType.PUBLIC,
+            created_at=base + timedelta(minutes=i // 2, microseconds=i * 123),
+        ))
+    test_db.commit()
+    post = test_db.query(Post).first()
+    for i in range(3):
+        test_db.add(Comment(user_id=test_user.id, post_id=post.id, content=f"Reply ✓ {i}"))
+    test_db.commit()
+    return post
+
+
+def _fetch_all(client, url):
+    bodies = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        bodies.append(response.content)
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return bodies
+
+
+@pytest.mark.parametrize("url", ["/api/v1/posts", "/api/v1/users", "/api/v1/comments"])
+def test_fast_list_matches_orm_path(client, mixed_rows, monkeypatch, url):
+    """Test that the Core row path serves exactly the bytes of the ORM path, page by page."""
+    monkeypatch.setattr(settings, "FAST_LIST_READS", True)
+    fast = _fetch_all(client, url)
+    monkeypatch.setattr(settings, "FAST_LIST_READS", False)
+    slow = _fetch_all(client, url)
+    assert fast == slow
+
+
+def test_fast_user_posts_matches_orm_path(client, mixed_rows, test_user, monkeypatch):
+    """Test that the per-user post list stays scoped and identical on the fast path."""
+    url = f"/api/v1/users/{test_user.id}/posts"
+    monkeypatch.setattr(settings, "FAST_LIST_READS", True)
+    fast = _fetch_all(client, url)
+    monkeypatch.setattr(settings, "FAST_LIST_READS", False)
+    assert fast == _fetch_all(client, url)
@@ -0,0 +1,167 @@
+import asyncio
+import io
+import os
+import time
+from collections import OrderedDict
+
+import pytest
+from PIL import Image
+
+from app.api.v1.files import ZERO_COPY, SendfileResponse
+from app.core.config import settings
+from app.core.images import thumbnailer
+from app.core.storage import storage
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    monkeypatch.setattr(settings, "IMAGE_THUMBNAIL_SIZES", [16, 32])
+    # The same test images are uploaded again by other tests
+    monkeypatch.setattr(thumbnailer, "_oversized", OrderedDict())
+    return tmp_path
+
+
+def _png(width=64, height=48, color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _upload(client, headers, body, content_type="image/png"):
+    return client.post("/api/v1/images", content=body, headers={**headers, "Content-Type": content_type})
+
+def _stored_files(media):
+    return sorted(name for _, _, names in os.walk(media) for name in names)
+
+
+def test_upload_is_stored_once_by_content(client, auth_headers, media):
+    """Test that an upload is named by its sha256 and the same bytes again reuse the stored file."""
+    body = _png()
+    first = _upload(client, auth_headers, body)
+    assert first.status_code == 201
+    image = first.json()
+    assert image["content_type"] == "image/png" and image["size"] == len(body)
+    assert image["url"].endswith(f"/api/v1/images/{image['hash']}.png")
+    assert set(image["thumbnails"]) == {"16", "32"}
+
+    # The client's Content-Type is not trusted, the bytes say what the image is
+    again = _upload(client, auth_headers, body, content_type="application/octet-stream")
+    assert again.status_code == 200
+    assert again.json() == image
+    assert _stored_files(media).count(f"{image['hash']}.png") == 1
+
+def test_upload_rejects_non_images_large_bodies_and_anonymous_callers(client, auth_headers, media, monkeypatch):
+    """Test that only authenticated image uploads within the size limit are kept."""
+    assert _upload(client, {}, _png()).status_code == 401
+    assert _upload(client, auth_headers, b"<svg onload=alert(1)>").status_code == 415
+
+    monkeypatch.setattr(settings, "IMAGE_MAX_BYTES", 100)
+    assert _upload(client, auth_headers, _png(200, 200)).status_code == 413
+
+    # Without a Content-Length the limit is enforced while streaming
+    chunks = iter([_png(200, 200)[:80], b"x" * 80])
+    response = client.post("/api/v1/images", content=chunks, headers=auth_headers)
+    assert response.status_code == 413
+    # Staging files of rejected uploads are removed too
+    assert _stored_files(media) == []
+
+def test_image_is_served_with_cache_validators_and_ranges(client, auth_headers, media):
+    """Test that stored files are immutable to caches, revalidate by hash and honour byte ranges."""
+    body = _png()
+    url = _upload(client, auth_headers, body).json()["url"]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == body
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+    partial = client.get(url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == body[:10]
+    assert partial.headers["content-range"] == f"bytes 0-9/{len(body)}"
+
+    assert client.get(url.replace(".png", ".gif")).status_code == 404
+    assert client.get("/api/v1/images/../../etc/passwd").status_code == 404
+
+def test_thumbnails_are_made_in_the_background(client, auth_headers, media):
+    """Test that thumbnail URLs serve the original until the worker processes have made them."""
+    image = _upload(client, auth_headers, _png(64, 48)).json()
+    small = image["thumbnails"]["16"]
+
+    deadline = time.monotonic() + 60
+    while True:
+        response = client.get(small)
+        if response.headers["cache-control"] != "no-cache":
+            break
+        # Served in the meantime, and not to be cached for good
+        assert response.content == client.get(image["url"]).content
+        assert time.monotonic() < deadline, "thumbnails were never made"
+        time.sleep(0.2)
+
+    thumbnail = Image.open(io.BytesIO(response.content))
+    assert thumbnail.size == (16, 12)
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert client.get(image["thumbnails"]["32"]).headers["cache-control"] != "no-cache"
+
+def test_thumbnail_of_an_unknown_image_is_404(client, media):
+    """Test that a thumbnail URL without a stored original is not found."""
+    assert client.get(f"/api/v1/images/{'0' * 64}_16.png").status_code == 404
+
+def test_thumbnail_in_an_unmade_size_is_404(client, auth_headers, media, monkeypatch):
+    """Test that only the configured thumbnail sizes are served, and nothing is scheduled for others."""
+    image = _upload(client, auth_headers, _png()).json()
+    scheduled = []
+    monkeypatch.setattr(thumbnailer, "schedule", lambda digest, ext: scheduled.append(digest))
+    assert client.get(f"/api/v1/images/{image['hash']}_99999.png").status_code == 404
+    assert scheduled == []
+
+def test_images_over_the_pixel_limit_get_no_thumbnails(client, auth_headers, media, monkeypatch):
+    """Test that an image with too many pixels is never decoded and not scheduled again."""
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 64 * 48 - 1)
+    image = _upload(client, auth_headers, _png(64, 48)).json()
+
+    deadline = time.monotonic() + 60
+    while image["hash"] not in thumbnailer._oversized:
+        assert time.monotonic() < deadline, "the oversized image was never refused"
+        time.sleep(0.2)
+    response = client.get(image["thumbnails"]["16"])
+    assert response.headers["cache-control"] == "no-cache"
+    assert image["hash"] not in thumbnailer._jobs
+    assert not [name for name in _stored_files(media) if "_" in name]
+
+def test_whole_files_go_through_zero_copy_send_when_offered(media):
+    """Test that a server offering the ASGI zero-copy extension gets the file descriptor, not its bytes."""
+    path = media / "image.png"
+    path.write_bytes(_png())
+    messages = []
+
+    async def send(message):
+        if message["type"] == ZERO_COPY:
+            message = {**message, "file": message["file"].read()}
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    def scope(**headers):
+        return {
+            "type": "http", "method": "GET", "extensions": {ZERO_COPY: {}},
+            "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+        }
+
+    asyncio.run(SendfileResponse(str(path), media_type="image/png")(scope(), receive, send))
+    assert [m["type"] for m in messages] == ["http.response.start", ZERO_COPY]
+    assert messages[1]["file"] == path.read_bytes()
+
+    # Ranges are cut by Starlette, with a plain body
+    messages.clear()
+    asyncio.run(SendfileResponse(str(path), media_type="image/png")(scope(range="bytes=0-3"), receive, send))
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.body"
+
+def test_thumbnailer_shuts_down_cleanly(media):
+    """Test that shutdown stops the worker processes and can run with nothing started."""
+    asyncio.run(thumbnailer.shutdown())
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/api/v1/internal/db-pool"),
+    ("GET", "/api/v1/internal/cache"),
+    ("GET", "/api/v1/internal/startup"),
+    ("GET", "/api/v1/internal/slow-queries"),
+    ("DELETE", "/api/v1/internal/slow-queries"),
+])
+def test_internal_routes_require_an_admin(client, auth_headers, method, path):
+    """Test that every internal route is 401 without a token and 403 for a regular user."""
+    assert client.request(method, path).status_code == 401
+    assert client.request(method, path, headers=auth_headers).status_code == 403
+
+def test_get_db_pool_stats(client, admin_headers):
+    """Test that pool gauges and checkout stats are exposed for both engines."""
+    response = client.get("/api/v1/internal/db-pool", headers=admin_headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["active"] in ("async", "sync")
+    assert stats["threadpool_size"] >= 1
+    for engine in ("async", "sync"):
+        assert "pool_class" in stats[engine]
+
+def test_get_cache_stats(client, test_user, admin_headers):
+    """Test that cache counters are exposed."""
+    client.get(f"/api/v1/users/{test_user.id}")
+    client.get(f"/api/v1/users/{test_user.id}")
+
+    response = client.get("/api/v1/internal/cache", headers=admin_headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
+    assert "evictions" in stats
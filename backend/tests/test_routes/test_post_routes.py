@@ -2,7 +2,7 @@ def test_get_posts(client, test_post):
     """Test retrieving all posts."""
     response = client.get("/api/v1/posts")
     assert response.status_code == 200
-    posts = response.json()
+    posts = response.json()["items"]
     assert isinstance(posts, list)
     assert len(posts) >= 1
     
@@ -37,7 +37,7 @@ def test_get_nonexistent_post(client):
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_create_post(client, test_user):
+def test_create_post(client, test_user, auth_headers):
     """Test creating a new post."""
     post_data = {
         "title": "New Post Title",
@@ -46,7 +46,7 @@ def test_create_post(client, test_user):
         "visibility": "public"
     }
     
-    response = client.post(f"/api/v1/posts?user_id={test_user.id}", json=post_data)
+    response = client.post("/api/v1/posts", json=post_data, headers=auth_headers)
     assert response.status_code == 201
     
     created_post = response.json()
@@ -56,13 +56,13 @@ def test_create_post(client, test_user):
     assert created_post["visibility"] == post_data["visibility"]
     assert created_post["user_id"] == test_user.id
 
-def test_create_minimal_post(client, test_user):
+def test_create_minimal_post(client, test_user, auth_headers):
     """Test creating a post with only required fields."""
     post_data = {
         "content": "This is a minimal post"
     }
     
-    response = client.post(f"/api/v1/posts?user_id={test_user.id}", json=post_data)
+    response = client.post("/api/v1/posts", json=post_data, headers=auth_headers)
     assert response.status_code == 201
     
     created_post = response.json()
@@ -72,14 +72,14 @@ def test_create_minimal_post(client, test_user):
     assert created_post["visibility"] == "public"  # Default value
     assert created_post["user_id"] == test_user.id
 
-def test_update_post(client, test_post):
+def test_update_post(client, test_post, auth_headers):
     """Test updating a post."""
     update_data = {
         "title": "Updated Title",
         "content": "Updated content"
     }
     
-    response = client.put(f"/api/v1/posts/{test_post.id}", json=update_data)
+    response = client.put(f"/api/v1/posts/{test_post.id}", json=update_data, headers=auth_headers)
     assert response.status_code == 200
     
     updated_post = response.json()
@@ -89,13 +89,13 @@ def test_update_post(client, test_post):
     # Other fields should remain unchanged
     assert updated_post["user_id"] == test_post.user_id
 
-def test_update_post_visibility(client, test_post):
+def test_update_post_visibility(client, test_post, auth_headers):
     """Test updating only the visibility of a post."""
     update_data = {
         "visibility": "private"
     }
     
-    response = client.put(f"/api/v1/posts/{test_post.id}", json=update_data)
+    response = client.put(f"/api/v1/posts/{test_post.id}", json=update_data, headers=auth_headers)
     assert response.status_code == 200
     
     updated_post = response.json()
@@ -104,17 +104,17 @@ def test_update_post_visibility(client, test_post):
     # Other fields should remain unchanged
     assert updated_post["content"] == test_post.content
 
-def test_update_nonexistent_post(client):
+def test_update_nonexistent_post(client, auth_headers):
     """Test updating a post that doesn't exist."""
     update_data = {
         "title": "Updated Title"
     }
     
-    response = client.put("/api/v1/posts/999", json=update_data)
+    response = client.put("/api/v1/posts/999", json=update_data, headers=auth_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_delete_post(client, test_db, test_user):
+def test_delete_post(client, test_db, test_user, auth_headers):
     """Test deleting a post."""
     # Create a post to delete
     from app.models.post import Post
@@ -129,16 +129,16 @@ def test_delete_post(client, test_db, test_user):
     post_id = temp_post.id
     
     # Delete the post
-    response = client.delete(f"/api/v1/posts/{post_id}")
+    response = client.delete(f"/api/v1/posts/{post_id}", headers=auth_headers)
     assert response.status_code == 204
     
     # Verify the post is deleted
     check_response = client.get(f"/api/v1/posts/{post_id}")
     assert check_response.status_code == 404
 
-def test_delete_nonexistent_post(client):
+def test_delete_nonexistent_post(client, auth_headers):
     """Test deleting a post that doesn't exist."""
-    response = client.delete("/api/v1/posts/999")
+    response = client.delete("/api/v1/posts/999", headers=auth_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
@@ -147,7 +147,7 @@ def test_get_user_posts(client, test_user, test_post):
     response = client.get(f"/api/v1/users/{test_user.id}/posts")
     assert response.status_code == 200
     
-    posts = response.json()
+    posts = response.json()["items"]
     assert isinstance(posts, list)
     assert len(posts) >= 1
     
@@ -160,4 +160,121 @@ def test_get_user_posts(client, test_user, test_post):
             assert post["content"] == test_post.content
             break
     
-    assert found_test_post
\ No newline at end of file
+    assert found_test_post
+
+def test_get_posts_keyset_pagination(client, test_db, test_user):
+    """Test walking the post list page by page with the returned cursor."""
+    from datetime import datetime, timedelta
+    from app.models.post import Post
+
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    # Two posts share a timestamp so the id tie-breaker is exercised
+    timestamps = [base, base + timedelta(minutes=1), base + timedelta(minutes=1),
+                  base + timedelta(minutes=2), base + timedelta(minutes=3)]
+    for i, created_at in enumerate(timestamps):
+        test_db.add(Post(user_id=test_user.id, content=f"Post {i}", created_at=created_at))
+    test_db.commit()
+
+    expected = [p.id for p in test_db.query(Post).order_by(Post.created_at.desc(), Post.id.desc())]
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/posts", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(post["id"] for post in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 3
+
+def test_get_posts_invalid_cursor(client):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/v1/posts", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"].lower()
+
+def test_get_posts_limit_bounds(client):
+    """Test that the page size is validated."""
+    response = client.get("/api/v1/posts", params={"limit": 0})
+    assert response.status_code == 422
+    response = client.get("/api/v1/posts", params={"limit": 1000})
+    assert response.status_code == 422
+
+def test_get_post_conditional(client, test_post):
+    """Test that a post answers 304 to its own ETag."""
+    response = client.get(f"/api/v1/posts/{test_post.id}")
+    etag = response.headers["etag"]
+
+    response = client.get(f"/api/v1/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(f"/api/v1/posts/{test_post.id}", headers={"If-None-Match": '"stale", ' + etag})
+    assert response.status_code == 304
+
+def test_get_post_etag_tracks_author(client, test_post, test_user, auth_headers):
+    """Test that editing the embedded author invalidates the post's ETag."""
+    etag = client.get(f"/api/v1/posts/{test_post.id}").headers["etag"]
+
+    client.put(f"/api/v1/users/{test_user.id}", json={"bio": "New author bio"}, headers=auth_headers)
+    response = client.get(f"/api/v1/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["user"]["bio"] == "New author bio"
+
+def test_get_post_comment_count(client, test_post, test_user, auth_headers):
+    """Test that a post reports its comment count and revalidates when it changes."""
+    response = client.get(f"/api/v1/posts/{test_post.id}")
+    assert response.json()["comment_count"] == 0
+    etag = response.headers["etag"]
+
+    client.post("/api/v1/comments", json={"content": "First", "post_id": test_post.id}, headers=auth_headers)
+    response = client.get(f"/api/v1/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["comment_count"] == 1
+
+    response = client.get("/api/v1/posts")
+    assert response.json()["items"][0]["comment_count"] == 1
+
+def test_bulk_create_posts(client, test_user, auth_headers):
+    """Test that a batch is inserted in order and invalid items are reported without failing it."""
+    items = [
+        {"title": "First", "content": "One"},
+        {"title": "Missing content"},
+        {"content": "Three", "visibility": "friends"},
+        {"content": "Bad visibility", "visibility": "everyone"},
+    ]
+    response = client.post("/api/v1/posts/bulk", json=items, headers=auth_headers)
+    assert response.status_code == 201
+    result = response.json()
+
+    assert [post["content"] for post in result["created"]] == ["One", "Three"]
+    assert all(post["user_id"] == test_user.id for post in result["created"])
+    assert result["created"][1]["visibility"] == "friends"
+    assert [error["index"] for error in result["errors"]] == [1, 3]
+    assert "content" in result["errors"][0]["detail"]
+
+    response = client.get(f"/api/v1/posts/{result['created'][0]['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "First"
+
+def test_bulk_create_posts_limits(client, test_user, monkeypatch, auth_headers, token_headers):
+    """Test the configurable batch size limit and the check that the caller still exists."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+
+    response = client.post("/api/v1/posts/bulk", json=[{"content": "x"}] * 3, headers=auth_headers)
+    assert response.status_code == 413
+
+    response = client.post("/api/v1/posts/bulk", json=[{"content": "x"}], headers=token_headers(999))
+    assert response.status_code == 401
@@ -0,0 +1,103 @@
+from app.models.comment import Comment
+from app.models.post import Post, VisibilityType
+from app.models.user import User
+
+
+def _post(test_db, user_id, content, title=None, visibility=VisibilityType.PUBLIC):
+    post = Post(user_id=user_id, title=title, content=content, visibility=visibility)
+    test_db.add(post)
+    test_db.commit()
+    return post
+
+def _comment(test_db, user_id, post_id, content):
+    comment = Comment(user_id=user_id, post_id=post_id, content=content)
+    test_db.add(comment)
+    test_db.commit()
+    return comment
+
+def _search(client, q, headers=None, **params):
+    response = client.get("/api/v1/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _hits(body):
+    return [(hit["type"], hit["id"]) for hit in body["items"]]
+
+def test_search_posts_and_comments_ranked(client, test_db, test_user):
+    """Test that posts and comments matching every word come back best match first."""
+    titled = _post(test_db, test_user.id, "We went hiking in the mountains", title="Mountain hiking")
+    body_only = _post(test_db, test_user.id, "Pictures from a long hiking trip, mostly of mountains and lakes and trees")
+    _post(test_db, test_user.id, "Nothing to see here")
+    comment = _comment(test_db, test_user.id, body_only.id, "Which mountains were these hiking pictures from?")
+
+    body = _search(client, "hiking mountains")
+    assert set(_hits(body)) == {("post", titled.id), ("post", body_only.id), ("comment", comment.id)}
+    # A match in the title outranks one in the content
+    assert body["items"][0]["id"] == titled.id
+    ranks = [hit["rank"] for hit in body["items"]]
+    assert ranks == sorted(ranks, reverse=True)
+    assert next(hit for hit in body["items"] if hit["type"] == "comment")["post_id"] == body_only.id
+
+    assert _hits(_search(client, "hiking", type="comment")) == [("comment", comment.id)]
+
+def test_search_respects_visibility(client, test_db, test_user, token_headers):
+    """Test that private and friends-only posts, and comments on them, only show up for their author."""
+    other = User(username="other", email="other@example.com", password_hash="x", is_active=True, role="user")
+    test_db.add(other)
+    test_db.commit()
+    public = _post(test_db, other.id, "Secret recipe for public bread")
+    private = _post(test_db, other.id, "Secret recipe for private bread", visibility=VisibilityType.PRIVATE)
+    friends = _post(test_db, other.id, "Secret recipe for friends bread", visibility=VisibilityType.FRIENDS)
+    hidden_comment = _comment(test_db, test_user.id, private.id, "Secret ingredient?")
+
+    assert set(_hits(_search(client, "secret"))) == {("post", public.id)}
+    assert set(_hits(_search(client, "secret", headers=token_headers(test_user.id)))) == {("post", public.id)}
+    assert set(_hits(_search(client, "secret", headers=token_headers(other.id)))) == {
+        ("post", public.id), ("post", private.id), ("post", friends.id), ("comment", hidden_comment.id)
+    }
+
+def test_search_index_follows_writes(client, test_db, test_user, auth_headers):
+    """Test that creates, updates and deletes through the API and the ORM are reflected immediately."""
+    created = client.post("/api/v1/posts", json={"content": "A zeppelin flew over"}, headers=auth_headers).json()
+    assert _hits(_search(client, "zeppelin")) == [("post", created["id"])]
+
+    client.put(f"/api/v1/posts/{created['id']}", json={"content": "A balloon flew over"}, headers=auth_headers)
+    assert _hits(_search(client, "zeppelin")) == []
+    assert _hits(_search(client, "balloon")) == [("post", created["id"])]
+
+    bulk = client.post("/api/v1/comments/bulk",
+                       json=[{"post_id": created["id"], "content": "balloon ride"}], headers=auth_headers).json()
+    assert ("comment", bulk["created"][0]["id"]) in _hits(_search(client, "balloon"))
+
+    client.delete(f"/api/v1/comments/{bulk['created'][0]['id']}", headers=auth_headers)
+    assert _hits(_search(client, "balloon")) == [("post", created["id"])]
+    client.delete(f"/api/v1/posts/{created['id']}", headers=auth_headers)
+    assert _hits(_search(client, "balloon")) == []
+
+def test_search_keyset_pagination(client, test_db, test_user):
+    """Test that paging with next_cursor walks every hit once, in rank order."""
+    post = _post(test_db, test_user.id, "kayak")
+    for i in range(6):
+        _post(test_db, test_user.id, "kayak " + "paddle " * i)
+        _comment(test_db, test_user.id, post.id, "kayak " + "river " * i)
+
+    everything = _hits(_search(client, "kayak", limit=100))
+    assert len(everything) == 13
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        body = _search(client, "kayak", **params)
+        seen.extend(_hits(body))
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == everything
+
+def test_search_odd_input(client, test_post):
+    """Test that query syntax in user input is searched literally and bad cursors are rejected."""
+    assert _search(client, 'content" OR NEAR(')["items"] == []
+    assert _hits(_search(client, "Test -content*")) == [("post", test_post.id)]
+    assert _search(client, "!!!")["items"] == []
+    assert client.get("/api/v1/search", params={"q": "x", "cursor": "bm90IGEgY3Vyc29y"}).status_code == 400
+    assert client.get("/api/v1/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from app.api.v1.fields import parse_fields, sparse_schema
+from app.core.config import settings
+from app.db.last_login import last_logins
+from app.models.post import Post
+from app.schemas.post import PostSchema
+
+
+@pytest.fixture
+def posts(test_db, test_user):
+    rows = [Post(user_id=test_user.id, title=f"Post {i}", content="x" * 2000) for i in range(5)]
+    test_db.add_all(rows)
+    test_db.commit()
+    return rows
+
+
+def _pages(client, url, **params):
+    items, cursor = [], None
+    while True:
+        response = client.get(url, params={"limit": 2, **params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        items += response.json()["items"]
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_returns_only_requested_fields(client, posts, monkeypatch, count_queries, fast):
+    """Test that ?fields= trims every item and keeps the columns left out in the database."""
+    monkeypatch.setattr(settings, "FAST_LIST_READS", fast)
+    full = _pages(client, "/api/v1/posts")
+
+    with count_queries() as statements:
+        sparse = _pages(client, "/api/v1/posts", fields="created_at,title,id")
+    # Schema order, whatever order they were asked in
+    assert [list(item) for item in sparse] == [["title", "id", "created_at"]] * len(posts)
+    assert sparse == [{key: item[key] for key in ("title", "id", "created_at")} for item in full]
+    selects = [s for s in statements if s.startswith("SELECT") and "FROM posts" in s]
+    assert selects and not [s for s in selects if "posts.content" in s]
+
+@pytest.mark.parametrize("url", ["/api/v1/posts", "/api/v1/users", "/api/v1/comments"])
+def test_sparse_fast_list_matches_orm_path(client, posts, test_comment, monkeypatch, url):
+    """Test that both list paths serve the same trimmed bytes."""
+    fields = {"/api/v1/posts": "id,title", "/api/v1/users": "username,created_at", "/api/v1/comments": "content"}[url]
+    monkeypatch.setattr(settings, "FAST_LIST_READS", True)
+    fast = client.get(url, params={"fields": fields})
+    monkeypatch.setattr(settings, "FAST_LIST_READS", False)
+    slow = client.get(url, params={"fields": fields})
+    assert fast.content == slow.content
+
+def test_invalid_fields_are_rejected(client, posts):
+    """Test that unknown names and an empty list get a 400 naming the problem."""
+    response = client.get("/api/v1/posts", params={"fields": "id,password_hash"})
+    assert response.status_code == 400
+    assert "password_hash" in response.json()["detail"]
+    assert client.get("/api/v1/posts", params={"fields": " , "}).status_code == 400
+    # Fields of the embedded author only exist on the single-post read
+    assert client.get("/api/v1/posts", params={"fields": "user"}).status_code == 400
+
+def test_single_read_has_its_own_etag(client, posts):
+    """Test that a trimmed single-entity body is tagged apart from the full one and revalidates."""
+    url = f"/api/v1/posts/{posts[0].id}"
+    full = client.get(url)
+    sparse = client.get(url, params={"fields": "title,user"})
+    assert sparse.status_code == 200
+    assert sparse.json() == {"title": full.json()["title"], "user": full.json()["user"]}
+    assert sparse.headers["etag"] != full.headers["etag"]
+
+    cached = client.get(url, params={"fields": "title,user"}, headers={"If-None-Match": sparse.headers["etag"]})
+    assert cached.status_code == 304
+    assert client.get(url, headers={"If-None-Match": sparse.headers["etag"]}).status_code == 200
+
+def test_sparse_users_merge_pending_logins(client, test_user, monkeypatch):
+    """Test that a buffered login shows in a trimmed user list on both paths."""
+    login_at = datetime(2030, 1, 1)
+    last_logins._pending[test_user.id] = login_at
+    for fast in (True, False):
+        monkeypatch.setattr(settings, "FAST_LIST_READS", fast)
+        items = client.get("/api/v1/users", params={"fields": "username,last_login"}).json()["items"]
+        assert items == [{"username": test_user.username, "last_login": login_at.isoformat()}]
+
+def test_trimmed_schema_is_built_once_per_field_set():
+    """Test that every spelling of a field set resolves to one cached model."""
+    fields = parse_fields(PostSchema, "title, id")
+    assert fields == parse_fields(PostSchema, "id,title,id") == ("title", "id")
+    assert sparse_schema(PostSchema, fields) is sparse_schema(PostSchema, ("title", "id"))
+    assert list(sparse_schema(PostSchema, fields).model_fields) == ["title", "id"]
@@ -2,7 +2,7 @@ def test_get_users(client, test_user):
     """Test retrieving all users."""
     response = client.get("/api/v1/users")
     assert response.status_code == 200
-    users = response.json()
+    users = response.json()["items"]
     assert isinstance(users, list)
     assert len(users) >= 1
     
@@ -82,14 +82,14 @@ def test_create_user_duplicate_email(client, test_user):
     assert response.status_code == 400
     assert "already exists" in response.json()["detail"].lower()
 
-def test_update_user(client, test_user):
+def test_update_user(client, test_user, auth_headers):
     """Test updating a user."""
     update_data = {
         "bio": "Updated bio",
         "profile_image_url": "http://example.com/new_image.jpg"
     }
     
-    response = client.put(f"/api/v1/users/{test_user.id}", json=update_data)
+    response = client.put(f"/api/v1/users/{test_user.id}", json=update_data, headers=auth_headers)
     assert response.status_code == 200
     
     updated_user = response.json()
@@ -99,17 +99,17 @@ def test_update_user(client, test_user):
     assert updated_user["bio"] == update_data["bio"]  # Updated
     assert updated_user["profile_image_url"] == update_data["profile_image_url"]  # Updated
 
-def test_update_nonexistent_user(client):
+def test_update_nonexistent_user(client, auth_headers):
     """Test updating a user that doesn't exist."""
     update_data = {
         "bio": "Updated bio"
     }
     
-    response = client.put("/api/v1/users/999", json=update_data)
+    response = client.put("/api/v1/users/999", json=update_data, headers=auth_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_delete_user(client, test_db):
+def test_delete_user(client, test_db, admin_headers):
     """Test deleting a user."""
     # Create a user to delete
     from app.models.user import User
@@ -125,30 +125,258 @@ def test_delete_user(client, test_db):
     user_id = temp_user.id
     
     # Delete the user
-    response = client.delete(f"/api/v1/users/{user_id}")
+    response = client.delete(f"/api/v1/users/{user_id}", headers=admin_headers)
     assert response.status_code == 204
     
     # Verify the user is deleted
     check_response = client.get(f"/api/v1/users/{user_id}")
     assert check_response.status_code == 404
 
-def test_delete_nonexistent_user(client):
+def test_delete_nonexistent_user(client, admin_headers):
     """Test deleting a user that doesn't exist."""
-    response = client.delete("/api/v1/users/999")
+    response = client.delete("/api/v1/users/999", headers=admin_headers)
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
 
-def test_login_user(client, test_user):
-    """Test updating the last_login time for a user."""
-    response = client.post(f"/api/v1/users/{test_user.id}/login")
+def _login(client, username, password):
+    return client.post("/api/v1/users/login", data={"username": username, "password": password})
+
+def test_login_user(client, test_db, test_user):
+    """Test that logging in issues a working token and updates last_login."""
+    from app.core.security import pwd_context
+    test_user.password_hash = pwd_context.hash("secret")
+    test_db.commit()
+
+    response = _login(client, "testuser", "secret")
     assert response.status_code == 200
-    
-    logged_in_user = response.json()
-    assert logged_in_user["id"] == test_user.id
-    assert logged_in_user["last_login"] is not None  # Should be updated
+    token = response.json()
+    assert token["token_type"] == "bearer"
+    assert token["expires_in"] > 0
 
-def test_login_nonexistent_user(client):
-    """Test logging in a user that doesn't exist."""
-    response = client.post("/api/v1/users/999/login")
-    assert response.status_code == 404
-    assert "not found" in response.json()["detail"].lower()
\ No newline at end of file
+    me = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["id"] == test_user.id
+    assert me.json()["last_login"] is not None  # Should be updated
+
+def test_login_rejects_bad_credentials(client, test_db, test_user):
+    """Test that a wrong password, an unknown user and an inactive account get no token."""
+    from app.core.security import pwd_context
+    test_user.password_hash = pwd_context.hash("secret")
+    test_db.commit()
+
+    assert _login(client, "testuser", "wrong").status_code == 401
+    assert _login(client, "nobody", "secret").status_code == 401
+
+    test_user.is_active = False
+    test_db.commit()
+    assert _login(client, "testuser", "secret").status_code == 403
+
+def test_login_upgrades_legacy_hashes(client, test_db, test_user):
+    """Test that an unsalted sha256 hash still logs in and is replaced by a bcrypt hash."""
+    import hashlib
+    test_user.password_hash = hashlib.sha256(b"secret").hexdigest()
+    test_db.commit()
+
+    assert _login(client, "testuser", "secret").status_code == 200
+    test_db.refresh(test_user)
+    assert test_user.password_hash.startswith("$2b$")
+    assert _login(client, "testuser", "secret").status_code == 200
+
+def test_signup_and_login_shed_load_when_hashing_is_saturated(client, test_user, monkeypatch):
+    """Test that a full hashing pool answers 503 at once instead of queueing."""
+    from app.core.security import hashing_pool
+    monkeypatch.setattr(hashing_pool, "pending", hashing_pool.workers + hashing_pool.max_waiting)
+
+    response = client.post("/api/v1/users", json={"username": "late", "email": "late@example.com", "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert _login(client, "testuser", "secret").status_code == 503
+
+def test_writes_require_a_valid_token(client, test_post, token_headers):
+    """Test that writes reject missing, forged, expired and inactive tokens."""
+    post = {"content": "Hello"}
+    response = client.post("/api/v1/posts", json=post)
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+    forged = token_headers(test_post.user_id, role="admin")
+    forged["Authorization"] = forged["Authorization"].rsplit(".", 1)[0] + "." + token_headers(test_post.user_id)["Authorization"].rsplit(".", 1)[1]
+    assert client.post("/api/v1/posts", json=post, headers=forged).status_code == 401
+    expired = token_headers(test_post.user_id, expires_in=-1)
+    assert client.post("/api/v1/posts", json=post, headers=expired).status_code == 401
+    inactive = token_headers(test_post.user_id, is_active=False)
+    assert client.post("/api/v1/posts", json=post, headers=inactive).status_code == 403
+
+def test_only_owners_and_admins_change_content(client, test_user, test_post, test_comment, token_headers, admin_headers):
+    """Test that other users get 403 on posts, comments and profiles they do not own, admins do not."""
+    stranger = token_headers(test_user.id + 1)
+    assert client.put(f"/api/v1/posts/{test_post.id}", json={"title": "Mine"}, headers=stranger).status_code == 403
+    assert client.delete(f"/api/v1/comments/{test_comment.id}", headers=stranger).status_code == 403
+    assert client.put(f"/api/v1/users/{test_user.id}", json={"bio": "Mine"}, headers=stranger).status_code == 403
+
+    assert client.put(f"/api/v1/posts/{test_post.id}", json={"title": "Moderated"}, headers=admin_headers).status_code == 200
+
+def test_roles_are_assigned_by_admins_only(client, test_user, auth_headers, admin_headers):
+    """Test that users cannot sign up as or promote themselves to admin."""
+    admin = {"username": "boss", "email": "boss@example.com", "password": "secret", "role": "admin"}
+    assert client.post("/api/v1/users", json=admin).status_code == 403
+    assert client.put(f"/api/v1/users/{test_user.id}", json={"role": "admin"}, headers=auth_headers).status_code == 403
+    assert client.post("/api/v1/users", json=admin, headers=admin_headers).status_code == 201
+
+def test_authenticated_requests_do_not_read_users(client, test_post, auth_headers, count_queries):
+    """Test that identity comes from the token: an authenticated update never queries users."""
+    with count_queries() as statements:
+        response = client.put(f"/api/v1/posts/{test_post.id}", json={"title": "Edited"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert not any("FROM users" in statement for statement in statements)
+
+def test_get_user_cache_invalidated_on_update(client, test_user, auth_headers):
+    """Test that a cached profile is refreshed after an update."""
+    first = client.get(f"/api/v1/users/{test_user.id}")
+    assert first.status_code == 200
+    assert first.json()["bio"] == test_user.bio
+
+    response = client.put(f"/api/v1/users/{test_user.id}", json={"bio": "Fresh bio"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    second = client.get(f"/api/v1/users/{test_user.id}")
+    assert second.json()["bio"] == "Fresh bio"
+
+def test_post_reuses_cached_user(client, test_post, test_user):
+    """Test that a post's author is served from the shared user cache entry."""
+    from app.core.cache import cache
+
+    client.get(f"/api/v1/users/{test_user.id}")
+    hits = cache.stats()["hits"]
+
+    response = client.get(f"/api/v1/posts/{test_post.id}")
+    assert response.status_code == 200
+    assert response.json()["user"]["id"] == test_user.id
+    assert cache.stats()["hits"] == hits + 1
+
+def test_get_user_conditional(client, test_user, auth_headers):
+    """Test that a matching If-None-Match yields 304 until the user changes."""
+    response = client.get(f"/api/v1/users/{test_user.id}")
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    response = client.get(f"/api/v1/users/{test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    client.put(f"/api/v1/users/{test_user.id}", json={"bio": "Changed bio"}, headers=auth_headers)
+    response = client.get(f"/api/v1/users/{test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["bio"] == "Changed bio"
+
+def test_get_user_if_modified_since(client, test_user):
+    """Test that If-Modified-Since is honoured when no ETag is sent."""
+    response = client.get(f"/api/v1/users/{test_user.id}")
+    last_modified = response.headers["last-modified"]
+
+    response = client.get(f"/api/v1/users/{test_user.id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    response = client.get(
+        f"/api/v1/users/{test_user.id}",
+        headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
+
+def _make_users(test_db, *usernames, is_active=True):
+    from app.models.user import User
+    users = [
+        User(username=name, email=f"{name.lower()}@example.com", password_hash="x", is_active=is_active, role="user")
+        for name in usernames
+    ]
+    test_db.add_all(users)
+    test_db.commit()
+    return users
+
+def _complete(client, prefix, **params):
+    response = client.get("/api/v1/users/autocomplete", params={"prefix": prefix, **params})
+    assert response.status_code == 200, response.text
+    return [match["username"] for match in response.json()]
+
+def _wait_for_index(loaded_after=0.0):
+    import time
+    from app.db.username_index import username_index
+    deadline = time.monotonic() + 5
+    while not (username_index.ready and username_index.loaded_at > loaded_after):
+        assert time.monotonic() < deadline, "username index was never rebuilt"
+        time.sleep(0.01)
+
+def test_autocomplete_from_database(client, test_db, monkeypatch):
+    """Test the database prefix query, case-insensitive, escaped and skipping inactive users."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "USERNAME_INDEX", False)
+    _make_users(test_db, "alice", "Alicia", "al_bundy", "bob")
+    _make_users(test_db, "alistair", is_active=False)
+
+    assert _complete(client, "ALI") == ["alice", "Alicia"]
+    assert _complete(client, "al_") == ["al_bundy"]
+    assert _complete(client, "al", limit=2) == ["al_bundy", "alice"]
+    assert _complete(client, "zed") == []
+    assert client.get("/api/v1/users/autocomplete").status_code == 422
+
+def test_autocomplete_builds_index_on_first_use(client, test_db, count_queries):
+    """Test that the first request is served from the database and loads the index behind it."""
+    from app.db.username_index import username_index
+    _make_users(test_db, "alice", "Alicia", "bob")
+    assert not username_index.ready
+
+    assert _complete(client, "ali") == ["alice", "Alicia"]
+    _wait_for_index()
+    with count_queries() as statements:
+        assert _complete(client, "ali") == ["alice", "Alicia"]
+        assert _complete(client, "b") == ["bob"]
+    assert statements == []
+
+def test_autocomplete_from_index(client, test_db, count_queries, admin_headers):
+    """Test that a loaded index answers alone and follows this process's user writes."""
+    from app.db.username_index import username_index
+    alice, alicia, _ = _make_users(test_db, "alice", "Alicia", "bob")
+    username_index.load([(alice.id, alice.username), (alicia.id, alicia.username)])
+
+    with count_queries() as statements:
+        assert _complete(client, "ali", limit=2) == ["alice", "Alicia"]
+    assert statements == []
+
+    created = client.post("/api/v1/users", json={
+        "username": "Alina", "email": "alina@example.com", "password": "secret"
+    }).json()
+    client.put(f"/api/v1/users/{alicia.id}", json={"username": "Zalicia"}, headers=admin_headers)
+    client.delete(f"/api/v1/users/{alice.id}", headers=admin_headers)
+    assert username_index.complete("ali", 10) == [(created["id"], "Alina")]
+    assert username_index.complete("z", 10) == [(alicia.id, "Zalicia")]
+
+def test_autocomplete_index_miss_falls_back(client, test_db):
+    """Test that a prefix with no match in the index asks the database and learns the result."""
+    from app.db.username_index import username_index
+    alice, = _make_users(test_db, "alice")
+    username_index.load([(alice.id, alice.username)])
+    # Written around this process's routes, so the index has not seen it
+    alistair, = _make_users(test_db, "alistair")
+
+    assert _complete(client, "alis") == ["alistair"]
+    assert username_index.complete("ali", 10) == [(alice.id, "alice"), (alistair.id, "alistair")]
+
+def test_autocomplete_index_expires(client, test_db, monkeypatch):
+    """Test that an index older than the TTL is rebuilt, dropping users removed elsewhere."""
+    from app.core.config import settings
+    from app.db.username_index import username_index
+    alice, alicia = _make_users(test_db, "alice", "alicia")
+    username_index.load([(alice.id, alice.username), (alicia.id, alicia.username)])
+    loaded_at = username_index.loaded_at
+    # Deactivated around this process's routes
+    alicia.is_active = False
+    test_db.commit()
+
+    assert _complete(client, "ali") == ["alice", "alicia"]
+    monkeypatch.setattr(settings, "USERNAME_INDEX_TTL_SECONDS", 0.0)
+    _complete(client, "ali")
+    _wait_for_index(loaded_after=loaded_at)
+    monkeypatch.setattr(settings, "USERNAME_INDEX_TTL_SECONDS", 300.0)
+    assert _complete(client, "ali") == ["alice"]